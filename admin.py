@@ -1,18 +1,27 @@
 # admin.py
 
+import os
 import re
+import tempfile
 import secrets
 import string
 from datetime import datetime, timedelta
 
 import streamlit as st
 
+import exporter
+import candidate_import
+import password_hasher
+import query_registry
+import db_instrumentation
+import page_profiler
 from auth import get_current_user
+from login_throttle import get_login_metrics
 from db_postgres import (
-    get_conn, update_user_password,
+    get_conn, update_user_password, update_user_password_hashes,
     get_all_users_with_permissions, set_user_permission,
     get_all_candidates, get_total_cv_storage_usage, get_candidate_statistics,
-    delete_candidate, get_user_permissions, create_user_in_db
+    delete_candidate, create_user_in_db, bump_permissions_version, get_page_metrics
 )
 
 # -------------------------
@@ -58,6 +67,9 @@ def _update_email(uid: int, new_email: str) -> bool:
         cur.execute("UPDATE users SET email=%s WHERE id=%s", (new_email, uid))
         ok = cur.rowcount > 0
     conn.close()
+    if ok:
+        # email is carried in the session token
+        bump_permissions_version(uid)
     return ok
 
 def _reset_password(uid: int, new_password: str) -> bool:
@@ -70,6 +82,14 @@ def _reset_password(uid: int, new_password: str) -> bool:
         email = row[0]
     return update_user_password(email, new_password)
 
+def _reset_passwords_bulk(users) -> tuple:
+    """Reset many users to random passwords: hash in parallel, store in one UPDATE.
+    Returns (reset_count, failed_count, hash_stats)."""
+    ids = [u["id"] for u in users]
+    hashes, stats = password_hasher.hash_many([_random_password() for _ in ids])
+    updated = update_user_password_hashes(list(zip(ids, hashes)))
+    return updated, len(ids) - updated, stats
+
 def _users_older_than_30_days(users):
     cutoff = datetime.utcnow() - timedelta(days=30)
     res = []
@@ -96,6 +116,78 @@ def _human_bytes(n: int) -> str:
 # -------------------------
 # Admin Panel (with access control)
 # -------------------------
+def _render_export_panel():
+    """Stream a dataset to a temp file on the server, then offer it for download once."""
+    formats = exporter.available_formats()
+    c1, c2, c3 = st.columns([2, 1, 1])
+    with c1:
+        dataset = st.selectbox("Data", exporter.DATASETS, format_func=str.title, key="export_dataset")
+    with c2:
+        fmt = st.selectbox("Format", formats, format_func=str.upper, key="export_format")
+    with c3:
+        st.write("")
+        build = st.button("📤 Build export", key="export_build")
+    if len(formats) < len(exporter.FORMATS):
+        st.caption("XLSX needs openpyxl and Parquet needs pyarrow installed on the server.")
+    if not build:
+        return
+
+    with st.spinner(f"Exporting {dataset}…"):
+        try:
+            result = exporter.export(dataset, fmt)
+        except Exception as e:
+            st.error(f"Export failed: {e}")
+            return
+    # The button only exists in the run that built the export, and the temp file is gone
+    # before it renders; downloading does not rerun the page.
+    try:
+        size = os.path.getsize(result.path)
+        with open(result.path, "rb") as f:
+            data = f.read()
+    finally:
+        os.remove(result.path)
+    st.caption(f"{result.rows:,} rows • {_human_bytes(size)} • {result.seconds:.1f}s")
+    st.download_button(f"⬇️ Download {result.filename}", data, file_name=result.filename,
+                       mime=result.mime, key="export_download", on_click="ignore")
+
+
+def _render_import_panel():
+    """Upload a CSV/XLSX/legacy .db of walk-in applicants and bulk-load it."""
+    upload = st.file_uploader("Applicants file", type=["csv", "xlsx", "db", "sqlite"], key="import_file")
+    if upload is not None and st.button("📥 Import", key="import_run"):
+        previous = st.session_state.pop("import_report", None)
+        if previous and previous.reject_path and os.path.exists(previous.reject_path):
+            os.remove(previous.reject_path)
+        suffix = os.path.splitext(upload.name)[1].lower()
+        fd, path = tempfile.mkstemp(prefix="import_", suffix=suffix)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(upload.getbuffer())
+            user = get_current_user() or {}
+            progress = st.empty()
+            with st.spinner(f"Importing {upload.name}…"):
+                st.session_state["import_report"] = candidate_import.import_file(
+                    path, actor=f"import:{user.get('email', 'admin')}",
+                    progress=lambda n: progress.caption(f"Read {n:,} rows…"))
+            progress.empty()
+        except Exception as e:
+            st.error(f"Import failed: {e}")
+        finally:
+            os.remove(path)
+
+    report = st.session_state.get("import_report")
+    if report:
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Read", f"{report.read:,}")
+        c2.metric("Imported", f"{report.inserted:,}")
+        c3.metric("Rejected", f"{report.rejected:,}")
+        st.caption(f"{report.source} • {report.seconds:.1f}s • {report.rows_per_second:,.0f} rows/s")
+        if report.reject_path and os.path.exists(report.reject_path):
+            with open(report.reject_path, "rb") as f:
+                st.download_button("⬇️ Download rejected rows", f, file_name=f"rejects_{report.source}.csv",
+                                   mime="text/csv", key="import_rejects")
+
+
 def show_admin_panel():
     st.header("⚙️ Admin — Administration Panel")
 
@@ -104,8 +196,8 @@ def show_admin_panel():
         st.error("No active user session. Please log in.")
         return
 
-    # Load permissions
-    perms = get_user_permissions(current_user["id"]) or {}
+    # Permissions come from the verified session token
+    perms = current_user
     role = current_user.get("role", "").lower()
     is_ceo = (role == "ceo")
 
@@ -130,6 +222,16 @@ def show_admin_panel():
 
     st.markdown("---")
 
+    # -------------------------
+    # EXPORTS
+    # -------------------------
+    if role in ("ceo", "admin"):
+        with st.expander("📤 Export Data", expanded=False):
+            _render_export_panel()
+        with st.expander("📥 Import Applicants", expanded=False):
+            _render_import_panel()
+        st.markdown("---")
+
     # -------------------------
     # USER PERMISSION MANAGEMENT
     # -------------------------
@@ -165,6 +267,85 @@ def show_admin_panel():
                             st.error("Failed to update permissions.")
 
         st.markdown("---")
+        with st.expander("Login Health (this server process)", expanded=False):
+            lm = get_login_metrics()
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Successful Logins", lm["outcomes"].get("ok", 0))
+            m2.metric("Failed Logins", lm["outcomes"].get("invalid", 0))
+            m3.metric("Rejected (throttled/busy)", lm["rejections"])
+            st.caption(
+                f"Login latency p50 {lm['latency_p50'] * 1000:.0f} ms · p95 {lm['latency_p95'] * 1000:.0f} ms · "
+                f"max {lm['latency_max'] * 1000:.0f} ms · at most {lm['max_concurrent_verify']} concurrent checks"
+            )
+
+        with st.expander("Prepared Statements (this server process)", expanded=False):
+            qs = query_registry.get_statement_stats()
+            if not qs:
+                st.caption("No prepared statements executed yet.")
+            else:
+                st.dataframe([
+                    {
+                        "statement": name,
+                        "executions": int(s["executions"]),
+                        "prepares": int(s["prepares"]),
+                        "mean prepare (ms)": round(s["mean_prepare_ms"], 2),
+                        "mean execute (ms)": round(s["mean_execute_ms"], 2),
+                        "max execute (ms)": round(s["max_execute_seconds"] * 1000, 2),
+                        "replans": int(s["replans"]),
+                        "errors": int(s["errors"]),
+                    }
+                    for name, s in sorted(qs.items())
+                ], use_container_width=True)
+
+        with st.expander("Query Statistics (this server process)", expanded=False):
+            dq = db_instrumentation.get_query_stats()
+            if not dq:
+                st.caption("No queries recorded yet.")
+            else:
+                top = sorted(dq.items(), key=lambda kv: kv[1]["total_ms"], reverse=True)[:25]
+                st.dataframe([
+                    {
+                        "fingerprint": fp,
+                        "statement": s["statement"][:120],
+                        "calls": s["calls"],
+                        "total (ms)": round(s["total_ms"], 1),
+                        "mean (ms)": round(s["mean_ms"], 2),
+                        "p95 (ms)": round(s["p95_ms"], 1),
+                        "max (ms)": round(s["max_ms"], 1),
+                        "rows": s["rows"],
+                        "KB": round(s["bytes"] / 1024, 1),
+                        "slow": s["slow"],
+                        "top caller": max(s["callers"], key=s["callers"].get),
+                    }
+                    for fp, s in top
+                ], use_container_width=True)
+                st.caption(f"Statements over {db_instrumentation.SLOW_QUERY_MS:.0f} ms are written to "
+                           "logs/slow_queries.log")
+
+        with st.expander("Page Render Latency (last 7 days)", expanded=False):
+            try:
+                trend = get_page_metrics(days=7)
+            except Exception as e:
+                trend = []
+                st.warning(f"Could not load page metrics: {e}")
+            if not trend:
+                st.caption(f"No page metrics yet; windows are flushed every "
+                           f"{page_profiler.PAGE_METRICS_FLUSH_SECONDS:.0f} s of activity.")
+            else:
+                st.dataframe([
+                    {
+                        "page": r["page"],
+                        "day": r["day"].date() if r["day"] else None,
+                        "renders": int(r["renders"] or 0),
+                        "p50 (ms)": round(float(r["p50_ms"] or 0), 0),
+                        "p95 (ms)": round(float(r["p95_ms"] or 0), 0),
+                        "max (ms)": round(float(r["max_ms"] or 0), 0),
+                        "DB calls / render": round(float(r["avg_db_calls"] or 0), 1),
+                    }
+                    for r in trend
+                ], use_container_width=True)
+
+        st.markdown("---")
     else:
         st.info("🔒 Only CEO can manage user permissions.")
 
@@ -252,13 +433,13 @@ def show_admin_panel():
         else:
             st.write(f"{len(stale)} user(s) have passwords older than 30 days.")
             if st.button("Reset All (generate random passwords)"):
-                ok, fail = 0, 0
-                for u in stale:
-                    if _reset_password(u["id"], _random_password()):
-                        ok += 1
-                    else:
-                        fail += 1
+                with st.spinner(f"Hashing {len(stale)} password(s)..."):
+                    ok, fail, stats = _reset_passwords_bulk(stale)
                 st.success(f"Done. Reset: {ok}, Failed: {fail}.")
+                st.caption(
+                    f"Hashed {stats['count']} passwords in {stats['seconds']:.1f}s "
+                    f"({stats['per_second']:.1f}/s, cost {stats['rounds']}, {stats['workers']} workers)"
+                )
     else:
         st.info("🔒 Only CEO can manage user accounts and passwords.")
 
@@ -0,0 +1,171 @@
+# analytics.py
+"""
+Hiring funnel analytics, computed in SQL.
+
+A candidate's stages are taken from the rows that already exist:
+
+    applied      candidates.created_at
+    assessed     first receptionist_assessments.created_at
+    interviewed  first interview held: a pass / fail / completed / on hold
+                 result, dated by scheduled time (else created time), not in
+                 the future; interviews only scheduled do not count
+    passed       first interview whose result is 'pass' / 'passed'
+
+Every query is bounded to the cohort of candidates who applied in
+[start, end) and walks the (candidate_id, ...) indexes from db_indexes, so cost
+grows with the window rather than the table. Callers cache per window
+(ceo._get_hiring_analytics keys on whole dates).
+
+    data = analytics.get_hiring_analytics(date(2025, 1, 1), date(2025, 4, 1))
+"""
+from datetime import date, datetime, time
+from typing import Any, Dict, Optional, Union
+
+from psycopg2.extras import RealDictCursor
+
+from db_postgres import get_conn
+
+STAGES = ("applied", "assessed", "interviewed", "passed")
+
+# One row per cohort candidate with the timestamp it reached each stage (NULL = not yet)
+_STAGES_CTE = """
+    WITH cohort AS (
+        SELECT candidate_id, created_at AS applied_at
+        FROM candidates
+        WHERE created_at >= %(start)s AND created_at < %(end)s
+    ),
+    first_assessment AS (
+        SELECT a.candidate_id, MIN(a.created_at) AS assessed_at
+        FROM receptionist_assessments a
+        JOIN cohort USING (candidate_id)
+        GROUP BY a.candidate_id
+    ),
+    cohort_interviews AS (
+        SELECT candidate_id, interviewer, at, result,
+               result IN ('pass', 'fail', 'completed', 'on hold') AND at <= CURRENT_TIMESTAMP AS held
+        FROM (SELECT i.candidate_id,
+                     i.interviewer,
+                     COALESCE(i.scheduled_at, i.created_at) AS at,
+                     -- same normalization as db_postgres.stage_for_interview_result
+                     CASE REPLACE(LOWER(TRIM(COALESCE(i.result, ''))), '_', ' ')
+                         WHEN 'passed' THEN 'pass'
+                         WHEN 'failed' THEN 'fail'
+                         ELSE REPLACE(LOWER(TRIM(COALESCE(i.result, ''))), '_', ' ')
+                         END AS result
+              FROM interviews i
+              JOIN cohort USING (candidate_id)) r
+    ),
+    first_interview AS (
+        SELECT candidate_id,
+               MIN(at) FILTER (WHERE held) AS interviewed_at,
+               MIN(at) FILTER (WHERE result = 'pass') AS passed_at
+        FROM cohort_interviews
+        GROUP BY candidate_id
+    ),
+    stages AS (
+        SELECT c.candidate_id, c.applied_at, fa.assessed_at, fi.interviewed_at, fi.passed_at
+        FROM cohort c
+        LEFT JOIN first_assessment fa USING (candidate_id)
+        LEFT JOIN first_interview fi USING (candidate_id)
+    )
+"""
+
+_FUNNEL_SQL = _STAGES_CTE + """
+    SELECT COUNT(*)::int AS applied,
+           COUNT(assessed_at)::int AS assessed,
+           COUNT(interviewed_at)::int AS interviewed,
+           COUNT(passed_at)::int AS passed,
+           PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM assessed_at - applied_at))
+               / 3600.0 AS applied_to_assessed_hours,
+           PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM interviewed_at - assessed_at))
+               / 3600.0 AS assessed_to_interviewed_hours,
+           PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM passed_at - applied_at))
+               / 3600.0 AS applied_to_passed_hours
+    FROM stages
+"""
+
+_COHORT_SQL = _STAGES_CTE + """
+    SELECT DATE_TRUNC('week', applied_at)::date AS week,
+           COUNT(*)::int AS applied,
+           COUNT(assessed_at)::int AS assessed,
+           COUNT(interviewed_at)::int AS interviewed,
+           COUNT(passed_at)::int AS passed,
+           ROUND(100.0 * COUNT(passed_at) / COUNT(*), 1)::float AS pass_rate_pct,
+           SUM(COUNT(*)) OVER (ORDER BY DATE_TRUNC('week', applied_at))::int AS applied_cumulative
+    FROM stages
+    GROUP BY 1
+    ORDER BY 1
+"""
+
+_INTERVIEWER_SQL = _STAGES_CTE + """
+    , per_week AS (
+        SELECT COALESCE(NULLIF(interviewer, ''), 'unknown') AS interviewer,
+               DATE_TRUNC('week', at)::date AS week,
+               COUNT(*)::int AS interviews,
+               COUNT(*) FILTER (WHERE result = 'pass')::int AS passed,
+               COUNT(*) FILTER (WHERE result = 'fail')::int AS failed
+        FROM cohort_interviews
+        WHERE held
+        GROUP BY 1, 2
+    )
+    SELECT interviewer,
+           week,
+           interviews,
+           passed,
+           failed,
+           SUM(interviews) OVER (PARTITION BY interviewer ORDER BY week)::int AS interviews_cumulative,
+           RANK() OVER (PARTITION BY week ORDER BY interviews DESC) AS week_rank
+    FROM per_week
+    ORDER BY week, interviews DESC
+"""
+
+DateLike = Union[date, datetime]
+
+
+def _bounds(start: DateLike, end: DateLike) -> Dict[str, datetime]:
+    """Dates become midnight; end is exclusive."""
+    as_dt = lambda d: d if isinstance(d, datetime) else datetime.combine(d, time.min)
+    return {"start": as_dt(start), "end": as_dt(end)}
+
+
+def _conversion(funnel: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    """Stage-to-stage and overall conversion percentages (None when the earlier stage is empty)."""
+    pct = lambda num, den: round(100.0 * num / den, 1) if den else None
+    return {
+        "assessed_pct": pct(funnel["assessed"], funnel["applied"]),
+        "interviewed_pct": pct(funnel["interviewed"], funnel["assessed"]),
+        "passed_pct": pct(funnel["passed"], funnel["interviewed"]),
+        "overall_pct": pct(funnel["passed"], funnel["applied"]),
+    }
+
+
+def get_hiring_analytics(start: DateLike, end: DateLike) -> Dict[str, Any]:
+    """
+    Funnel counts with conversion rates and median stage latencies (hours), weekly cohorts and
+    per-interviewer weekly throughput for candidates who applied in [start, end).
+    """
+    params = _bounds(start, end)
+    conn = get_conn()
+    try:
+        with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(_FUNNEL_SQL, params)
+            funnel = dict(cur.fetchone())
+            cur.execute(_COHORT_SQL, params)
+            cohorts = cur.fetchall()
+            cur.execute(_INTERVIEWER_SQL, params)
+            interviewers = cur.fetchall()
+    finally:
+        conn.close()
+
+    latencies = {}
+    for key in ("applied_to_assessed_hours", "assessed_to_interviewed_hours", "applied_to_passed_hours"):
+        value = funnel.pop(key)
+        latencies[key] = round(value, 1) if value is not None else None
+    return {
+        "window": {"start": params["start"], "end": params["end"]},
+        "funnel": funnel,
+        "conversion": _conversion(funnel),
+        "median_hours": latencies,
+        "cohorts": cohorts,
+        "interviewers": interviewers,
+    }
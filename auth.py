@@ -1,15 +1,16 @@
 # auth.py
 import streamlit as st
 import os
-import secrets
-import time
 import jwt
 import datetime
+from typing import Optional, Tuple
+import metrics
+from login_throttle import check_login
 from db_postgres import (
-    get_user_by_email, get_user_by_id,
+    get_user_by_id,
     create_user_in_db, update_user_password,
-    verify_password, seed_sample_users,
-    get_all_users_with_permissions, get_user_permissions
+    seed_sample_users, get_permissions_version,
+    get_all_users_with_permissions
 )
 
 # === SESSION HELPERS ===
@@ -61,26 +62,42 @@ def logout():
 
 # === AUTH LOGIC ===
 
-def login_user(email: str, password: str) -> bool:
-    """Check credentials and set session state."""
-    user = get_user_by_email(email)
+def _client_ip() -> Optional[str]:
+    """Best-effort client IP (first X-Forwarded-For hop behind a proxy)."""
+    try:
+        forwarded = st.context.headers.get("X-Forwarded-For")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+        return getattr(st.context, "ip_address", None)
+    except Exception:
+        return None
+
+
+def login_user(email: str, password: str) -> Tuple[bool, str]:
+    """Check credentials (throttled) and set session state.
+    Returns (success, reason) with reason ∈ {"ok", "invalid", "throttled", "busy"}.
+    """
+    user, reason = check_login(email, password, _client_ip())
     if not user:
-        return False
-    if not verify_password(password, user["password_hash"]):
-        return False
+        return False, reason
 
-    # Generate session token
-    st.session_state.auth_token = secrets.token_hex(16)
-    # fetch fresh user with permission flags
-    st.session_state.user = {
-        "id": user["id"],
-        "email": user["email"],
-        "role": user["role"],
-        "can_view_cvs": user.get("can_view_cvs", False),
-        "can_delete_records": user.get("can_delete_records", False),
-        "can_grant_delete": user.get("can_grant_delete", False),
+    _start_session(user)
+    return True, "ok"
+
+
+def _start_session(db_user: dict) -> dict:
+    """Store the user snapshot and a freshly signed session token in session state."""
+    sess_user = {
+        "id": db_user["id"],
+        "email": db_user["email"],
+        "role": (db_user.get("role") or "").strip(),
+        "can_view_cvs": bool(db_user.get("can_view_cvs", False)),
+        "can_delete_records": bool(db_user.get("can_delete_records", False)),
+        "can_grant_delete": bool(db_user.get("can_grant_delete", False)),
     }
-    return True
+    st.session_state.auth_token = issue_session_token(sess_user, db_user.get("permissions_version") or 0)
+    st.session_state.user = sess_user
+    return sess_user
 
 
 def register_user(email: str, password: str, role: str = "candidate") -> bool:
@@ -96,7 +113,10 @@ create_user = register_user
 
 
 def get_current_user(refresh: bool = True) -> dict:
-    """Return the current logged-in user, refreshing from DB to ensure up-to-date role and permissions.
+    """Return the current logged-in user from the signed session token.
+    The token's claims are trusted while it is unexpired and its permissions_version matches the
+    user's current one; otherwise role and permissions are reloaded from the DB and a new token issued.
+    refresh=False skips the version check and returns the session snapshot.
     If no user is logged in, returns {}.
     """
     _init_session()
@@ -108,20 +128,24 @@ def get_current_user(refresh: bool = True) -> dict:
         return dict(sess_user)
 
     try:
-        # Pull the latest user record (role and flags) by ID
-        db_user = get_user_by_id(sess_user["id"]) or {}
-        # Fallback to session values if any field missing
-        merged = {
-            "id": db_user.get("id", sess_user.get("id")),
-            "email": db_user.get("email", sess_user.get("email")),
-            "role": (db_user.get("role") or sess_user.get("role") or "").strip(),
-            "can_view_cvs": bool(db_user.get("can_view_cvs", sess_user.get("can_view_cvs", False))),
-            "can_delete_records": bool(db_user.get("can_delete_records", sess_user.get("can_delete_records", False))),
-            "can_grant_delete": bool(db_user.get("can_grant_delete", sess_user.get("can_grant_delete", False))),
-        }
-        # Persist back to session to keep it consistent across pages
-        st.session_state.user = merged
-        return dict(merged)
+        claims = verify_session_token(st.session_state.get("auth_token"))
+        if claims and int(claims["sub"]) == sess_user["id"]:
+            current_version = get_permissions_version(sess_user["id"])
+            if current_version is None:
+                # User was deleted
+                st.session_state.user = None
+                st.session_state.auth_token = None
+                return {}
+            if claims.get("pv") == current_version:
+                return _user_from_claims(claims)
+
+        # Token expired, tampered with, or permissions changed: reload the user record by ID
+        db_user = get_user_by_id(sess_user["id"])
+        if not db_user:
+            st.session_state.user = None
+            st.session_state.auth_token = None
+            return {}
+        return dict(_start_session(db_user))
     except Exception:
         # If DB refresh fails, return the session snapshot
         return dict(sess_user)
@@ -141,12 +165,16 @@ def login_view():
         submitted = st.form_submit_button("Login")
 
     if submitted:
-        if login_user(email.strip(), password.strip()):
+        ok, reason = login_user(email.strip(), password.strip())
+        if ok:
             _flash("Login successful.", "success")
-            st.rerun()
+        elif reason == "throttled":
+            _flash("Too many login attempts. Please wait a minute and try again.", "error")
+        elif reason == "busy":
+            _flash("The server is busy. Please try again in a moment.", "error")
         else:
             _flash("Invalid credentials.", "error")
-            st.rerun()
+        st.rerun()
 
     col1, col2 = st.columns([1, 1])
     with col1:
@@ -272,9 +300,54 @@ def seed_users_if_needed():
     seed_sample_users()
 
 
-# === PASSWORD RESET TOKEN HELPERS ===
+# === SESSION TOKEN HELPERS ===
 
 SECRET_KEY = os.getenv("SECRET_KEY", "super-secret-key")
+SESSION_TOKEN_EXPIRY = int(os.getenv("SESSION_TOKEN_EXPIRY", "900"))  # 15 minutes
+
+
+def issue_session_token(user: dict, permissions_version: int) -> str:
+    """Sign a short-lived session token carrying role and permission flags."""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    payload = {
+        "typ": "session",
+        "sub": str(user["id"]),
+        "email": user.get("email"),
+        "role": user.get("role"),
+        "can_view_cvs": bool(user.get("can_view_cvs", False)),
+        "can_delete_records": bool(user.get("can_delete_records", False)),
+        "can_grant_delete": bool(user.get("can_grant_delete", False)),
+        "pv": int(permissions_version or 0),
+        "iat": now,
+        "exp": now + datetime.timedelta(seconds=SESSION_TOKEN_EXPIRY),
+    }
+    return jwt.encode(payload, SECRET_KEY, algorithm="HS256")
+
+
+def verify_session_token(token: Optional[str]) -> Optional[dict]:
+    """Return the token's claims if the signature and expiry are valid, else None."""
+    if not token:
+        return None
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+    except jwt.InvalidTokenError:
+        return None
+    return claims if claims.get("typ") == "session" else None
+
+
+def _user_from_claims(claims: dict) -> dict:
+    return {
+        "id": int(claims["sub"]),
+        "email": claims.get("email"),
+        "role": claims.get("role") or "",
+        "can_view_cvs": bool(claims.get("can_view_cvs")),
+        "can_delete_records": bool(claims.get("can_delete_records")),
+        "can_grant_delete": bool(claims.get("can_grant_delete")),
+    }
+
+
+# === PASSWORD RESET TOKEN HELPERS ===
+
 RESET_TOKEN_EXPIRY = 3600  # 1 hour
 
 
@@ -315,7 +388,9 @@ def send_reset_email(to_email: str, token: str) -> bool:
                 server.starttls()
                 server.login(os.getenv("SMTP_USER"), os.getenv("SMTP_PASS"))
             server.send_message(msg)
+        metrics.record_email("password_reset", ok=True)
         return True
     except Exception as e:
         print("Email sending failed:", e)
+        metrics.record_email("password_reset", ok=False)
         return False
@@ -0,0 +1,132 @@
+# benchmarks/bench_candidate_codes.py
+"""
+Candidate inserts under concurrent submissions: caller-generated random codes
+(the old candidate_view path) vs codes allocated from the sequence by
+db_postgres.create_candidate_in_db(None, ...).
+
+    python -m benchmarks.bench_candidate_codes --threads 8 --per-thread 200
+
+Each worker thread inserts its share through create_candidate_in_db, one
+connection per insert as the app does. Reports inserts/s, latency percentiles
+and how many random codes were already taken and had to be redrawn. Rows are
+written with created_by 'bench:codes' and deleted again afterwards.
+"""
+import time
+import uuid
+import string
+import secrets
+import argparse
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import candidate_codes
+import db_postgres
+from benchmarks.common import percentile, write_report
+
+ACTOR = "bench:codes"
+
+
+def _random_code() -> str:
+    chars = string.ascii_uppercase + string.digits
+    return "BRV-" + "".join(secrets.choice(chars) for _ in range(6))
+
+
+STRATEGIES: Dict[str, Callable[[], Optional[str]]] = {
+    "random code": _random_code,
+    "sequence code": lambda: None,
+}
+
+
+def _insert(code_fn: Callable[[], Optional[str]]) -> int:
+    """One submission; returns how many requested codes were already taken before one went in."""
+    tag = uuid.uuid4().hex[:12]
+    conflicts = 0
+    while db_postgres.create_candidate_in_db(
+            candidate_id=code_fn(), name=f"Bench Codes {tag}", address="", dob=None, caste=None,
+            email=f"codes-{tag}@bench.local", phone=str(int(tag, 16))[-10:].rjust(10, "0"),
+            form_data={"bench": "codes"}, created_by=ACTOR,
+    ) is None:
+        conflicts += 1
+    return conflicts
+
+
+def run_strategy(name: str, threads: int, per_thread: int) -> Dict[str, float]:
+    code_fn = STRATEGIES[name]
+    latencies: List[float] = []
+    conflicts = 0
+    lock = threading.Lock()
+
+    def worker(_):
+        nonlocal conflicts
+        for _ in range(per_thread):
+            started = time.perf_counter()
+            taken = _insert(code_fn)
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+                conflicts += taken
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, range(threads)))
+    seconds = time.perf_counter() - started
+    return {
+        "inserts": len(latencies),
+        "seconds": seconds,
+        "inserts_per_s": len(latencies) / seconds if seconds else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "mean_ms": statistics.fmean(latencies) if latencies else 0.0,
+        "code_conflicts": conflicts,
+    }
+
+
+def encode_cost(runs: int = 100_000) -> float:
+    """Microseconds per candidate_codes.encode() call (pure Python, no DB)."""
+    started = time.perf_counter()
+    for n in range(1, runs + 1):
+        candidate_codes.encode(n)
+    return (time.perf_counter() - started) / runs * 1e6
+
+
+def cleanup() -> int:
+    conn = db_postgres.get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("DELETE FROM candidates WHERE created_by = %s RETURNING candidate_id", (ACTOR,))
+            ids = [r[0] for r in cur.fetchall()]
+            cur.execute("DELETE FROM candidate_events WHERE candidate_id = ANY(%s)", (ids,))
+            cur.execute("DELETE FROM candidate_tombstones WHERE candidate_id = ANY(%s)", (ids,))
+            return len(ids)
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="*", default=[1, 4, 8])
+    parser.add_argument("--per-thread", type=int, default=200)
+    parser.add_argument("--keep", action="store_true", help="leave the inserted rows in place")
+    args = parser.parse_args(argv)
+
+    report = {"encode_us": encode_cost(), "runs": {}}
+    print(f"candidate_codes.encode: {report['encode_us']:.1f} µs/code")
+    try:
+        for threads in args.threads:
+            print(f"\n{threads} concurrent submitters x {args.per_thread} inserts")
+            for name in STRATEGIES:
+                r = run_strategy(name, threads, args.per_thread)
+                report["runs"][f"{name} x{threads}"] = r
+                print(f"  {name:<14} {r['inserts_per_s']:8.0f}/s   p50 {r['p50_ms']:7.1f} ms   "
+                      f"p95 {r['p95_ms']:7.1f} ms   conflicts {r['code_conflicts']}")
+    finally:
+        if not args.keep:
+            print(f"\nRemoved {cleanup()} bench rows")
+    print(f"Report: {write_report('bench_candidate_codes', report)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/bench_ceo_dashboard.py
+"""
+CEO dashboard data load: sequential db_postgres calls vs one db_async.gather(),
+and the per-rerun cost of patching the candidate list from the change feed.
+
+    python -m benchmarks.bench_ceo_dashboard --runs 20
+
+Needs DATABASE_URL pointing at a populated database. Prints p50/p95/mean per
+strategy in milliseconds; the Streamlit cache is not involved.
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, Dict, List
+
+import db_async
+import db_postgres
+
+
+def _sequential():
+    stats = db_postgres.get_candidate_statistics()
+    candidates = db_async.fetch_all_sync(db_async.CANDIDATE_PAGE_SQL, (1000, 0))
+    users = db_postgres.get_all_users_with_permissions()
+    return stats, candidates, users
+
+
+def _concurrent():
+    return db_async.gather(
+        db_async.get_candidate_statistics(),
+        db_async.get_candidates_page(limit=1000),
+        db_async.get_all_users_with_permissions(),
+    )
+
+
+def _delta_poll():
+    token = db_postgres.get_candidate_changes(None, columns=db_async.CANDIDATE_LIST_COLUMNS)["token"]
+
+    def _poll():
+        db_postgres.get_candidate_changes(token, columns=db_async.CANDIDATE_LIST_COLUMNS)
+
+    return _poll
+
+
+def _time(fn: Callable, runs: int, warmup: int) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "p50": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+        "mean": statistics.fmean(ordered),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    args = parser.parse_args()
+
+    driver = "psycopg 3 async" if db_async.is_native() else "thread fallback"
+    print(f"CEO dashboard load, {args.runs} runs ({driver})")
+    results = {
+        "sequential": _summary(_time(_sequential, args.runs, args.warmup)),
+        "concurrent": _summary(_time(_concurrent, args.runs, args.warmup)),
+        "delta poll": _summary(_time(_delta_poll(), args.runs, args.warmup)),
+    }
+    for name, s in results.items():
+        print(f"  {name:<11} p50 {s['p50']:8.1f} ms   p95 {s['p95']:8.1f} ms   mean {s['mean']:8.1f} ms")
+    seq, conc = results["sequential"]["p50"], results["concurrent"]["p50"]
+    if seq > 0:
+        print(f"  p50 reduction: {(1 - conc / seq) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/bench_db.py
+"""
+Micro-benchmarks for the db_postgres read helpers.
+
+    python -m benchmarks.bench_db --runs 50
+
+Point lookups cycle through a fixed sample of bench candidates; whole-table
+helpers run fewer times (--bulk-runs) since they scale with the data set.
+"""
+import argparse
+import itertools
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import analytics
+import db_postgres
+from benchmarks import generator
+from benchmarks.common import measure, print_table, write_report
+
+
+def _cycle(values: List[Any]) -> Callable[[], Any]:
+    it = itertools.cycle(values or [None])
+    return lambda: next(it)
+
+
+def read_helpers(users: Dict[str, int], candidate_ids: List[str]) -> List[Tuple[str, Callable[[], Any], bool]]:
+    """(name, zero-arg call, is_bulk) for every read helper in db_postgres."""
+    cid = _cycle(candidate_ids)
+    ceo = users.get("ceo")
+    email = "bench-ceo@bench.local"
+    return [
+        ("get_user_by_email", lambda: db_postgres.get_user_by_email(email), False),
+        ("get_user_by_id", lambda: db_postgres.get_user_by_id(ceo), False),
+        ("get_user_permissions", lambda: db_postgres.get_user_permissions(ceo), False),
+        ("get_permissions_version", lambda: db_postgres.get_permissions_version(ceo), False),
+        ("user_can_delete", lambda: db_postgres.user_can_delete(ceo), False),
+        ("user_can_manage_delete", lambda: db_postgres.user_can_manage_delete(ceo), False),
+        ("get_candidate_by_id", lambda: db_postgres.get_candidate_by_id(cid()), False),
+        ("get_candidate_cv_secure", lambda: db_postgres.get_candidate_cv_secure(cid(), ceo), False),
+        ("get_receptionist_assessments", lambda: db_postgres.get_receptionist_assessments(cid()), False),
+        ("get_interviews_for_candidate", lambda: db_postgres.get_interviews_for_candidate(cid()), False),
+        ("get_candidate_history", lambda: db_postgres.get_candidate_history(cid()), False),
+        ("find_candidates_by_name", lambda: db_postgres.find_candidates_by_name("patel"), False),
+        ("search_candidates_by_name_or_email", lambda: db_postgres.search_candidates_by_name_or_email("shah"), False),
+        ("get_interviewer_performance_stats",
+         lambda: db_postgres.get_interviewer_performance_stats(users.get("interviewer")), False),
+        ("get_interviewer_leaderboard", db_postgres.get_interviewer_leaderboard, True),
+        ("get_all_users", db_postgres.get_all_users, True),
+        ("get_all_users_with_permissions", db_postgres.get_all_users_with_permissions, True),
+        ("get_all_candidates", db_postgres.get_all_candidates, True),
+        ("get_all_interviews", db_postgres.get_all_interviews, True),
+        ("get_candidate_statistics", db_postgres.get_candidate_statistics, True),
+        ("get_total_cv_storage_usage", db_postgres.get_total_cv_storage_usage, True),
+        ("get_hiring_analytics (365d)",
+         lambda: analytics.get_hiring_analytics(date.today() - timedelta(days=365), date.today() + timedelta(days=1)),
+         True),
+    ]
+
+
+def run(runs: int = 50, bulk_runs: int = 5, only: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+    users = generator.ensure_bench_users()
+    candidate_ids = generator.sample_candidate_ids(100)
+    results = {}
+    for name, call, bulk in read_helpers(users, candidate_ids):
+        if only and name not in only:
+            continue
+        try:
+            results[name] = measure(call, bulk_runs if bulk else runs)
+        except Exception as e:
+            results[name] = {"error": str(e)}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--bulk-runs", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="helper names to run")
+    args = parser.parse_args(argv)
+
+    results = run(args.runs, args.bulk_runs, args.only)
+    scale = generator.existing_count()
+    print_table(f"db_postgres read helpers ({scale} bench candidates)", results)
+    print(f"\nReport: {write_report('bench_db', {'candidates': scale, 'results': results})}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_pages.py
+"""
+Headless page runs through Streamlit's AppTest, one per role.
+
+    python -m benchmarks.bench_pages --runs 5
+    python -m benchmarks.bench_pages --roles ceo --cold
+
+Each run executes main.py with a bench user's session already established
+(no login round trip). Warm runs keep st.cache_data between reruns, like a
+user clicking around; --cold clears it before every run.
+"""
+import os
+import argparse
+from typing import Dict, List, Optional
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from auth import issue_session_token
+from benchmarks import generator
+from benchmarks.common import measure, print_table, write_report
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+# Roles whose first sidebar page is a dashboard worth timing
+PAGE_ROLES = ("ceo", "receptionist", "interviewer", "hr", "candidate")
+
+
+def _session_user(role: str, user_id: int) -> Dict:
+    privileged = role in ("ceo", "admin")
+    return {
+        "id": user_id,
+        "email": f"bench-{role}@bench.local",
+        "role": role,
+        "can_view_cvs": privileged,
+        "can_delete_records": privileged,
+        "can_grant_delete": False,
+    }
+
+
+def page_run(role: str, user_id: int, timeout: float, cold: bool):
+    user = _session_user(role, user_id)
+    token = issue_session_token(user, 0)
+
+    def _run():
+        if cold:
+            st.cache_data.clear()
+        at = AppTest.from_file(MAIN_SCRIPT, default_timeout=timeout)
+        at.session_state["user"] = user
+        at.session_state["auth_token"] = token
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+
+    return _run
+
+
+def run(runs: int = 5, roles: Optional[List[str]] = None, timeout: float = 300, cold: bool = False):
+    users = generator.ensure_bench_users()
+    results = {}
+    for role in roles or PAGE_ROLES:
+        label = f"{role} ({'cold' if cold else 'warm'} cache)"
+        try:
+            results[label] = measure(page_run(role, users[role], timeout, cold), runs, warmup=0 if cold else 1)
+        except Exception as e:
+            results[label] = {"error": str(e)}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--roles", nargs="*", choices=PAGE_ROLES)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--cold", action="store_true", help="clear st.cache_data before every run")
+    args = parser.parse_args(argv)
+
+    results = run(args.runs, args.roles, args.timeout, args.cold)
+    scale = generator.existing_count()
+    print_table(f"Page reruns via AppTest ({scale} bench candidates)", results)
+    print(f"\nReport: {write_report('bench_pages', {'candidates': scale, 'results': results})}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# benchmarks/common.py
+"""Shared helpers: timing loops, percentiles, per-call query counting, peak RSS and report output."""
+import os
+import json
+import time
+import resource
+import statistics
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+import db_instrumentation
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far (ru_maxrss is KB on Linux, bytes on macOS)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if os.uname().sysname == "Darwin" else rss / 1024
+
+
+class QueryCounter:
+    """Counts statements and bytes recorded by db_instrumentation while active."""
+
+    def __init__(self):
+        self.queries = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self._active = False
+        self._lock = threading.Lock()
+        db_instrumentation.add_listener(self._on_query)
+
+    def _on_query(self, entry: Dict[str, Any]):
+        if self._active:
+            with self._lock:
+                self.queries += 1
+                self.bytes += entry.get("bytes") or 0
+                self.seconds += entry["seconds"]
+
+    @contextmanager
+    def counting(self):
+        self.queries, self.bytes, self.seconds = 0, 0, 0.0
+        self._active = True
+        try:
+            yield self
+        finally:
+            self._active = False
+
+
+_counter = None
+
+
+def query_counter() -> QueryCounter:
+    global _counter
+    if _counter is None:
+        _counter = QueryCounter()
+    return _counter
+
+
+def measure(fn: Callable[[], Any], runs: int, warmup: int = 1) -> Dict[str, float]:
+    """Time fn() `runs` times; report latency percentiles (ms) plus queries/bytes per call."""
+    for _ in range(warmup):
+        fn()
+    counter = query_counter()
+    samples, queries, nbytes = [], 0, 0
+    for _ in range(runs):
+        with counter.counting():
+            started = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - started) * 1000)
+        queries += counter.queries
+        nbytes += counter.bytes
+    return {
+        "runs": runs,
+        "p50_ms": percentile(samples, 50),
+        "p95_ms": percentile(samples, 95),
+        "p99_ms": percentile(samples, 99),
+        "mean_ms": statistics.fmean(samples) if samples else 0.0,
+        "queries_per_call": queries / runs if runs else 0.0,
+        "kb_per_call": nbytes / runs / 1024 if runs else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def print_table(title: str, rows: Dict[str, Dict[str, float]]):
+    print(f"\n{title}")
+    print(f"  {'name':<38} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8} {'KB':>9} {'RSS MB':>8}")
+    for name, r in rows.items():
+        if "error" in r:
+            print(f"  {name:<38} ERROR {r['error']}")
+            continue
+        print(f"  {name:<38} {r['p50_ms']:9.1f} {r['p95_ms']:9.1f} {r['p99_ms']:9.1f} "
+              f"{r['queries_per_call']:8.1f} {r['kb_per_call']:9.1f} {r['peak_rss_mb']:8.0f}")
+
+
+def write_report(name: str, payload: Dict[str, Any]) -> str:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, default=str)
+    return path
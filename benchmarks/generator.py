@@ -0,0 +1,225 @@
+# benchmarks/generator.py
+"""
+Synthetic data for benchmarks, seeded into the database at DATABASE_URL.
+
+    python -m benchmarks.generator --candidates 10000 --cv-kb 64
+    python -m benchmarks.generator --clear
+
+Candidates get ids BENCH-0000001..N, so runs are reproducible (--seed) and
+top-ups only insert what is missing. Bench users (one per role, password
+"bench123") are created for the AppTest page runs. Never point this at
+production data.
+"""
+import os
+import json
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from psycopg2.extras import Json, execute_values
+
+import password_hasher
+from db_postgres import get_conn, init_db, stage_for_interview_result
+
+ID_PREFIX = "BENCH-"
+BENCH_PASSWORD = "bench123"
+BENCH_ROLES = ("ceo", "admin", "receptionist", "interviewer", "hr", "candidate")
+
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Diya", "Ananya", "Ishaan", "Kavya", "Rohan", "Sneha", "Arjun",
+               "Meera", "Kabir", "Priya", "Rahul", "Neha", "Vikram", "Pooja", "Siddharth", "Riya", "Karan"]
+LAST_NAMES = ["Shah", "Patel", "Mehta", "Desai", "Joshi", "Iyer", "Reddy", "Nair", "Gupta", "Kulkarni",
+              "Sharma", "Verma", "Chopra", "Rao", "Pillai", "Bhatt", "Trivedi", "Parikh", "Modi", "Jain"]
+CITIES = ["Ahmedabad", "Surat", "Vadodara", "Rajkot", "Mumbai", "Pune", "Gandhinagar", "Anand"]
+QUALIFICATIONS = ["12th Pass", "B.Com", "B.Sc", "BCA", "B.E.", "MBA", "M.Com", "Diploma"]
+EXPERIENCE = ["Fresher", "6 months BPO", "1 year data entry", "2 years customer support",
+              "3 years back office", "5 years team lead"]
+REFERRALS = ["Walk-in", "Employee referral", "Job portal", "Newspaper", "Social media", "Campus drive"]
+MARITAL = ["Single", "Married", "Prefer not to say"]
+RESULTS = [None, "scheduled", "pass", "fail", "on hold", "completed"]
+INTERVIEWERS = ["Neha Mehta", "Rahul Shah", "Priya Iyer", "Vikram Desai", "Kavya Nair"]
+COMMITMENT = ["Low", "Medium", "High"]
+ENGLISH = ["Poor", "Average", "Good", "Excellent"]
+
+
+def candidate_id(n: int) -> str:
+    return f"{ID_PREFIX}{n:07d}"
+
+
+def _fake_pdf(rng: random.Random, size_kb: int) -> bytes:
+    header = b"%PDF-1.4\n% benchmark resume\n"
+    body = rng.randbytes(max(0, size_kb * 1024 - len(header) - 6))
+    return header + body + b"\n%%EOF"
+
+
+def _candidate_row(n: int, rng: random.Random, now: datetime, cv_kb: int, cv_ratio: float):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    name = f"{first} {last}"
+    email = f"{first}.{last}.{n}@bench.local".lower()
+    phone = f"9{rng.randrange(10**8, 10**9)}"
+    created = now - timedelta(days=rng.randrange(0, 365), minutes=rng.randrange(0, 1440))
+    city = rng.choice(CITIES)
+    dob = datetime(rng.randrange(1985, 2005), rng.randrange(1, 13), rng.randrange(1, 29)).date()
+    form_data = {
+        "name": name,
+        "email": email,
+        "phone": phone,
+        "current_address": f"{rng.randrange(1, 400)}, {rng.choice(['MG Road', 'CG Road', 'Ring Road', 'SG Highway'])}, {city}",
+        "permanent_address": f"{rng.randrange(1, 400)}, Station Road, {rng.choice(CITIES)}",
+        "dob": dob.isoformat(),
+        "caste": rng.choice(["General", "OBC", "SC", "ST", ""]),
+        "sub_caste": "",
+        "marital_status": rng.choice(MARITAL),
+        "highest_qualification": rng.choice(QUALIFICATIONS),
+        "work_experience": rng.choice(EXPERIENCE),
+        "referral": rng.choice(REFERRALS),
+        "ready_festivals": rng.choice(["Yes", "No"]),
+        "ready_late_nights": rng.choice(["Yes", "No"]),
+        "updated_at": created.isoformat(),
+    }
+    has_cv = rng.random() < cv_ratio
+    cv = _fake_pdf(rng, cv_kb) if has_cv and cv_kb > 0 else None
+    return (candidate_id(n), name, email, phone, form_data["current_address"], Json(form_data),
+            rng.random() < 0.2, "benchmark", created, created, cv, f"{first}_{last}_cv.pdf" if cv else None), created
+
+
+def ensure_bench_users() -> Dict[str, int]:
+    """One user per role (bench-<role>@bench.local); returns role -> user id."""
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            emails = [f"bench-{role}@bench.local" for role in BENCH_ROLES]
+            cur.execute("SELECT email FROM users WHERE email = ANY(%s)", (emails,))
+            existing = {r[0] for r in cur.fetchall()}
+            missing = [role for role in BENCH_ROLES if f"bench-{role}@bench.local" not in existing]
+            if missing:
+                hashes, _ = password_hasher.hash_many([BENCH_PASSWORD] * len(missing), rounds=4)
+                execute_values(cur, """
+                    INSERT INTO users (email, password_hash, role, can_view_cvs, can_delete_records)
+                    VALUES %s ON CONFLICT (email) DO NOTHING
+                """, [(f"bench-{role}@bench.local", h, role, role in ("ceo", "admin"), role in ("ceo", "admin"))
+                      for role, h in zip(missing, hashes)])
+            cur.execute("SELECT role, id FROM users WHERE email = ANY(%s)", (emails,))
+            return {role: uid for role, uid in cur.fetchall()}
+    finally:
+        conn.close()
+
+
+def existing_count() -> int:
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM candidates WHERE candidate_id LIKE %s", (ID_PREFIX + "%",))
+            return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def generate(n: int, cv_kb: int = 64, cv_ratio: float = 0.7, assessment_ratio: float = 0.6,
+             interview_ratio: float = 0.4, seed: int = 42, batch: int = 500) -> Dict[str, float]:
+    """Top up bench candidates to n (plus assessments, interviews and CVs). Returns counts and timing."""
+    start_n = existing_count() + 1
+    started = time.perf_counter()
+    totals = {"candidates": 0, "assessments": 0, "interviews": 0, "cv_bytes": 0}
+    now = datetime.now()
+    conn = get_conn()
+    try:
+        for lo in range(start_n, n + 1, batch):
+            hi = min(n, lo + batch - 1)
+            cand_rows, assess_rows, interview_rows = [], [], []
+            for i in range(lo, hi + 1):
+                rng = random.Random(f"{seed}-{i}")  # per-row seed: same data regardless of batch/top-up
+                row, created = _candidate_row(i, rng, now, cv_kb, cv_ratio)
+                totals["cv_bytes"] += len(row[10] or b"")
+                stage = "applied"
+                if rng.random() < assessment_ratio:
+                    stage = "assessed"
+                    assess_rows.append((row[0], rng.randrange(20, 100), rng.randrange(50, 100),
+                                        rng.choice(COMMITMENT), rng.choice(ENGLISH),
+                                        "Benchmark assessment", created + timedelta(hours=1)))
+                    if rng.random() < interview_ratio / max(assessment_ratio, 1e-9):
+                        notes = {"attitude": rng.choice(["Positive", "Neutral"]),
+                                 "english": rng.choice(ENGLISH), "other_notes": "Benchmark interview"}
+                        interview_rows.append((row[0], created + timedelta(days=rng.randrange(1, 10)),
+                                               rng.choice(INTERVIEWERS), rng.choice(RESULTS),
+                                               json.dumps(notes), created + timedelta(days=1)))
+                        stage = stage_for_interview_result(interview_rows[-1][3])
+                cand_rows.append(row + (stage,))
+            with conn, conn.cursor() as cur:
+                execute_values(cur, """
+                    INSERT INTO candidates (candidate_id, name, email, phone, current_address, form_data,
+                                            can_edit, created_by, created_at, updated_at, cv_file, cv_filename,
+                                            stage)
+                    VALUES %s ON CONFLICT (candidate_id) DO NOTHING
+                """, cand_rows, page_size=batch)
+                execute_values(cur, """
+                    INSERT INTO candidate_events (candidate_id, event_type, actor, data, created_at) VALUES %s
+                """, [(r[0], "candidate_created", "benchmark", Json({"name": r[1]}), r[8]) for r in cand_rows],
+                    page_size=batch)
+                if assess_rows:
+                    execute_values(cur, """
+                        INSERT INTO receptionist_assessments (candidate_id, speed_test, accuracy_test,
+                                                              work_commitment, english_understanding,
+                                                              comments, created_at)
+                        VALUES %s
+                    """, assess_rows, page_size=batch)
+                if interview_rows:
+                    execute_values(cur, """
+                        INSERT INTO interviews (candidate_id, scheduled_at, interviewer, result, notes, created_at)
+                        VALUES %s
+                    """, interview_rows, page_size=batch)
+            totals["candidates"] += len(cand_rows)
+            totals["assessments"] += len(assess_rows)
+            totals["interviews"] += len(interview_rows)
+            print(f"  seeded {hi}/{n} candidates", end="\r", flush=True)
+    finally:
+        conn.close()
+    totals["seconds"] = time.perf_counter() - started
+    return totals
+
+
+def clear():
+    """Remove every bench candidate (assessments/interviews cascade), their events and the bench users."""
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("DELETE FROM candidates WHERE candidate_id LIKE %s", (ID_PREFIX + "%",))
+            deleted = cur.rowcount
+            cur.execute("DELETE FROM candidate_events WHERE candidate_id LIKE %s", (ID_PREFIX + "%",))
+            cur.execute("DELETE FROM users WHERE email LIKE %s", ("bench-%@bench.local",))
+            return deleted
+    finally:
+        conn.close()
+
+
+def sample_candidate_ids(k: int = 50, seed: int = 7) -> List[str]:
+    total = existing_count()
+    rng = random.Random(seed)
+    return [candidate_id(rng.randrange(1, total + 1)) for _ in range(min(k, total))] if total else []
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=1000)
+    parser.add_argument("--cv-kb", type=int, default=64, help="size of each generated CV (0 = none)")
+    parser.add_argument("--cv-ratio", type=float, default=0.7)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--clear", action="store_true", help="delete bench data and exit")
+    args = parser.parse_args(argv)
+
+    if not os.getenv("DATABASE_URL"):
+        parser.error("DATABASE_URL must point at a local/bench Postgres")
+    init_db()
+    if args.clear:
+        print(f"Removed {clear()} bench candidates")
+        return
+    ensure_bench_users()
+    totals = generate(args.candidates, cv_kb=args.cv_kb, cv_ratio=args.cv_ratio, seed=args.seed)
+    print(f"\nInserted {totals['candidates']} candidates, {totals['assessments']} assessments, "
+          f"{totals['interviews']} interviews, {totals['cv_bytes'] / 1024 / 1024:.1f} MB of CVs "
+          f"in {totals['seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# benchmarks/run_all.py
+"""
+Full benchmark sweep at increasing data sizes.
+
+    python -m benchmarks.run_all                       # 1k, 10k, 100k candidates
+    python -m benchmarks.run_all --scales 1000 10000 --page-runs 3
+
+For each scale the generator tops the bench data up to that many candidates,
+then the read-helper micro-benchmarks and the AppTest page runs execute. One
+JSON report covering every scale is written to benchmarks/results/.
+Scales only grow; use `python -m benchmarks.generator --clear` to start over.
+"""
+import argparse
+
+from db_postgres import init_db
+from benchmarks import bench_db, bench_pages, generator
+from benchmarks.common import peak_rss_mb, print_table, write_report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="*", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--cv-kb", type=int, default=64)
+    parser.add_argument("--db-runs", type=int, default=50)
+    parser.add_argument("--bulk-runs", type=int, default=3)
+    parser.add_argument("--page-runs", type=int, default=5)
+    parser.add_argument("--skip-pages", action="store_true")
+    args = parser.parse_args(argv)
+
+    init_db()
+    generator.ensure_bench_users()
+    report = {"cv_kb": args.cv_kb, "scales": {}}
+    for scale in sorted(args.scales):
+        print(f"\n=== {scale} candidates ===")
+        seeded = generator.generate(scale, cv_kb=args.cv_kb)
+        print(f"\nSeeded {seeded['candidates']} new candidates in {seeded['seconds']:.1f}s")
+
+        entry = {"seeded": seeded, "db": bench_db.run(args.db_runs, args.bulk_runs)}
+        print_table(f"db_postgres read helpers @ {scale}", entry["db"])
+        if not args.skip_pages:
+            entry["pages_warm"] = bench_pages.run(args.page_runs)
+            entry["pages_cold"] = bench_pages.run(args.page_runs, cold=True)
+            print_table(f"Pages (warm cache) @ {scale}", entry["pages_warm"])
+            print_table(f"Pages (cold cache) @ {scale}", entry["pages_cold"])
+        entry["peak_rss_mb"] = peak_rss_mb()
+        report["scales"][scale] = entry
+
+    print(f"\nReport: {write_report('run_all', report)}")
+
+
+if __name__ == "__main__":
+    main()
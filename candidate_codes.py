@@ -0,0 +1,123 @@
+# candidate_codes.py
+"""
+Candidate codes (BRV-XXXXXX) allocated from a database sequence.
+
+Each sequence value goes through a keyed Feistel permutation of the six-character
+base36 space before it is encoded, so codes are unique by construction (no
+collision retries between new codes), allocated in the same round trip as the
+insert, and do not reveal how many candidates exist or what the neighbouring
+codes are. decode() reverses it, which is handy when tracing a code back to its
+allocation order.
+
+CANDIDATE_CODE_KEY must be set (codes are not allocated without it, since a
+published key would make the order recoverable) and must stay the same once
+codes have been issued; the insert helpers in db_postgres still retry allocated
+codes on a conflict, which covers codes issued before this scheme (random
+suffixes) or under a different key.
+"""
+import os
+import string
+import hashlib
+import logging
+from typing import Any, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+CODE_PREFIX = "BRV"
+CODE_LENGTH = 6
+CODE_ALPHABET = string.digits + string.ascii_uppercase
+CODE_SPACE = len(CODE_ALPHABET) ** CODE_LENGTH  # 36^6 ≈ 2.18e9
+CODE_SEQUENCE = "candidate_code_seq"
+# A new code is tried at most this many times when an insert hits an existing candidate_id
+CODE_ALLOCATION_ATTEMPTS = 3
+
+_KEY = os.getenv("CANDIDATE_CODE_KEY", "").encode()
+if not _KEY:
+    logger.error("CANDIDATE_CODE_KEY is not set; candidate codes cannot be allocated")
+_ROUNDS = 4
+_HALF_BITS = 16  # the Feistel network permutes 32-bit values; cycle-walking keeps results below CODE_SPACE
+_HALF_MASK = (1 << _HALF_BITS) - 1
+
+
+def _require_key() -> None:
+    if not _KEY:
+        raise RuntimeError("CANDIDATE_CODE_KEY environment variable not set")
+
+
+def _round(i: int, half: int) -> int:
+    digest = hashlib.blake2b(bytes([i]) + half.to_bytes(2, "big"), key=_KEY, digest_size=2).digest()
+    return int.from_bytes(digest, "big")
+
+
+def _feistel(x: int) -> int:
+    left, right = x >> _HALF_BITS, x & _HALF_MASK
+    for i in range(_ROUNDS):
+        left, right = right, left ^ _round(i, right)
+    return (left << _HALF_BITS) | right
+
+
+def _feistel_inverse(x: int) -> int:
+    left, right = x >> _HALF_BITS, x & _HALF_MASK
+    for i in reversed(range(_ROUNDS)):
+        left, right = right ^ _round(i, left), left
+    return (left << _HALF_BITS) | right
+
+
+def permute(n: int) -> int:
+    """Bijection on [0, CODE_SPACE): walk the 32-bit permutation until it lands inside the code space."""
+    if not 0 <= n < CODE_SPACE:
+        raise ValueError(f"Candidate code space exhausted or invalid sequence value: {n}")
+    _require_key()
+    x = _feistel(n)
+    while x >= CODE_SPACE:
+        x = _feistel(x)
+    return x
+
+
+def unpermute(x: int) -> int:
+    _require_key()
+    n = _feistel_inverse(x)
+    while n >= CODE_SPACE:
+        n = _feistel_inverse(n)
+    return n
+
+
+def encode(n: int) -> str:
+    """Sequence value -> 'BRV-XXXXXX'."""
+    x = permute(n)
+    chars = []
+    for _ in range(CODE_LENGTH):
+        x, r = divmod(x, len(CODE_ALPHABET))
+        chars.append(CODE_ALPHABET[r])
+    return f"{CODE_PREFIX}-{''.join(reversed(chars))}"
+
+
+def decode(code: str) -> Optional[int]:
+    """'BRV-XXXXXX' -> sequence value, or None if it is not a code of this shape."""
+    prefix, _, body = (code or "").strip().upper().partition("-")
+    if prefix != CODE_PREFIX or len(body) != CODE_LENGTH or any(c not in CODE_ALPHABET for c in body):
+        return None
+    x = 0
+    for c in body:
+        x = x * len(CODE_ALPHABET) + CODE_ALPHABET.index(c)
+    return unpermute(x)
+
+
+def _first(row: Any) -> Any:
+    return next(iter(row.values())) if isinstance(row, dict) else row[0]
+
+
+def allocate_codes(cur, n: int = 1) -> List[str]:
+    """Reserve n codes in one statement (works with tuple and RealDict cursors)."""
+    if n <= 0:
+        return []
+    _require_key()  # before nextval, so no sequence values are burnt
+    cur.execute(f"SELECT nextval('{CODE_SEQUENCE}') FROM generate_series(1, %s)", (n,))
+    return [encode(_first(row)) for row in cur.fetchall()]
+
+
+def allocate_code(cur) -> str:
+    return allocate_codes(cur, 1)[0]
@@ -0,0 +1,382 @@
+# candidate_import.py
+"""
+Bulk import of walk-in applicants from CSV/XLSX exports (Google Form / Sheets
+intake) or the legacy SQLite applicants DB (data/brv_applicants.db).
+
+Each row is mapped onto the candidate columns by header (see FIELD_ALIASES;
+everything else lands in form_data), email and phone are normalized and
+validated, and duplicates are dropped, both within the file and against
+existing candidates (LOWER(email) / phone indexes). Valid rows are loaded in
+batches: COPY into a temp staging table, then one set-based merge into
+candidates plus their candidate_created events, one transaction per batch.
+
+    python -m candidate_import applicants.csv
+    python -m candidate_import data/brv_applicants.db --rejects rejects.csv
+
+Rejected rows (with the reason) are written to a CSV reject file.
+"""
+import io
+import os
+import re
+import sys
+import csv
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from psycopg2.extras import execute_values
+
+from db_postgres import get_conn, normalize_phone
+from candidate_codes import CODE_ALLOCATION_ATTEMPTS, allocate_codes
+
+try:
+    from openpyxl import load_workbook
+except ImportError:  # optional dependency
+    load_workbook = None
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "2000"))
+PHONE_MIN_DIGITS = 10
+EMAIL_RE = re.compile(r"^[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}$", re.I)
+
+# candidate column -> accepted headers (lowercase, non-alphanumerics folded to "_")
+FIELD_ALIASES = {
+    "name": ("name", "full_name", "candidate_name", "applicant_name"),
+    "email": ("email", "email_address", "e_mail", "email_id"),
+    "phone": ("phone", "phone_number", "mobile", "mobile_number", "contact_number", "whatsapp_number"),
+    "current_address": ("current_address", "address", "residential_address"),
+    "created_at": ("timestamp", "created_at", "submitted_at", "submission_time"),
+}
+_ALIAS_TO_FIELD = {alias: field for field, aliases in FIELD_ALIASES.items() for alias in aliases}
+
+_TIMESTAMP_FORMATS = ("%m/%d/%Y %H:%M:%S", "%d/%m/%Y %H:%M:%S", "%Y-%m-%d %H:%M:%S", "%d-%m-%Y %H:%M")
+
+_STAGING_COLUMNS = ("row_no", "candidate_id", "name", "email", "phone", "current_address", "form_data", "created_at")
+
+
+class ImportReport(NamedTuple):
+    source: str
+    read: int
+    inserted: int
+    rejected: int
+    seconds: float
+    reject_path: Optional[str]
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.read / self.seconds if self.seconds else 0.0
+
+
+# -----------------------------
+# Readers: each yields (row number, {header: value})
+# -----------------------------
+def _read_csv(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for i, row in enumerate(csv.DictReader(f), start=2):  # row 1 is the header
+            yield i, row
+
+
+def _read_xlsx(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    if load_workbook is None:
+        raise ValueError("XLSX import needs openpyxl installed")
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(h or "").strip() for h in next(rows, ())]
+        for i, values in enumerate(rows, start=2):
+            if any(v not in (None, "") for v in values):
+                yield i, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def _read_legacy_sqlite(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Legacy walk-in DB: the applicants and candidates tables, form_data JSON merged in."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        n = 0
+        for table in ("applicants", "candidates"):
+            if table not in tables:
+                continue
+            for row in conn.execute(f"SELECT * FROM {table}"):
+                n += 1
+                record = {k: row[k] for k in row.keys() if k not in ("id", "form_data", "hr_data")}
+                try:
+                    form = json.loads(row["form_data"] or "{}")
+                except (TypeError, ValueError):
+                    form = {}
+                if isinstance(form, dict):
+                    # explicit columns win over the form copy
+                    record = {**form, **{k: v for k, v in record.items() if v not in (None, "")}}
+                record["legacy_source"] = f"{table}:{row['id']}"
+                yield n, record
+    finally:
+        conn.close()
+
+
+def _reader_for(path: str):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return _read_csv
+    if ext in (".xlsx", ".xlsm"):
+        return _read_xlsx
+    if ext in (".db", ".sqlite", ".sqlite3"):
+        return _read_legacy_sqlite
+    raise ValueError(f"Unsupported import file type: {ext or path}")
+
+
+# -----------------------------
+# Normalization / validation
+# -----------------------------
+def _header_key(header: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", str(header).strip().lower()).strip("_")
+
+
+def normalize_email(raw: Any) -> str:
+    return str(raw or "").strip().lower()
+
+
+def _parse_timestamp(raw: Any) -> Optional[datetime]:
+    if isinstance(raw, datetime):
+        return raw
+    text = str(raw or "").strip()
+    if not text:
+        return None
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        pass
+    for fmt in _TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _json_safe(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def normalize_row(raw: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """(candidate fields + form_data, None) or (None, reject reason)."""
+    fields: Dict[str, Any] = {}
+    form: Dict[str, Any] = {}
+    for header, value in raw.items():
+        if header is None:
+            continue
+        key = _header_key(header)
+        field = _ALIAS_TO_FIELD.get(key)
+        if field and field not in fields and value not in (None, ""):
+            fields[field] = value
+        elif key and value not in (None, ""):
+            form[key] = _json_safe(value)
+
+    name = " ".join(str(fields.get("name") or "").split())
+    email = normalize_email(fields.get("email"))
+    phone = normalize_phone(fields.get("phone"))
+    if not name:
+        return None, "missing_name"
+    if not EMAIL_RE.match(email):
+        return None, "invalid_email"
+    if not PHONE_MIN_DIGITS <= len(phone) <= 15:
+        return None, "invalid_phone"
+
+    address = str(fields.get("current_address") or "").strip()
+    form.update({"name": name, "email": email, "phone": phone, "current_address": address})
+    return {
+        "name": name,
+        "email": email,
+        "phone": phone,
+        "current_address": address,
+        "form_data": form,
+        "created_at": _parse_timestamp(fields.get("created_at")),
+    }, None
+
+
+# -----------------------------
+# Loading
+# -----------------------------
+def _create_staging(conn):
+    with conn, conn.cursor() as cur:
+        cur.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS candidate_import_staging
+                    (
+                        row_no INTEGER PRIMARY KEY,
+                        candidate_id VARCHAR(50) NOT NULL,
+                        name VARCHAR(255) NOT NULL,
+                        email VARCHAR(255) NOT NULL,
+                        phone VARCHAR(50) NOT NULL,
+                        current_address TEXT,
+                        form_data JSONB NOT NULL,
+                        created_at TIMESTAMP
+                    ) ON COMMIT DELETE ROWS
+                    """)
+
+
+def _load_batch(conn, batch: List[Dict[str, Any]], actor: str, source: str) -> Tuple[int, List[Tuple[int, str]]]:
+    """COPY one batch into staging and merge it; returns (inserted, [(row_no, reason), ...])."""
+    with conn, conn.cursor() as cur:
+        # one statement reserves every code of the batch; codes of rows rejected below are simply skipped
+        for r, code in zip(batch, allocate_codes(cur, len(batch))):
+            r["candidate_id"] = code
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for r in batch:
+            writer.writerow([r["row_no"], r["candidate_id"], r["name"], r["email"], r["phone"], r["current_address"],
+                             json.dumps(r["form_data"], ensure_ascii=False),
+                             r["created_at"].isoformat() if r["created_at"] else None])
+        buf.seek(0)
+        cur.copy_expert(f"COPY candidate_import_staging ({', '.join(_STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                        buf)
+        cur.execute("""
+                    DELETE FROM candidate_import_staging s
+                    USING candidates c
+                    WHERE LOWER(c.email) = s.email OR c.phone = s.phone
+                    RETURNING s.row_no,
+                              CASE WHEN LOWER(c.email) = s.email THEN 'duplicate_email' ELSE 'duplicate_phone' END
+                    """)
+        rejects = dict(cur.fetchall())
+        inserted: List[str] = []
+        for _ in range(CODE_ALLOCATION_ATTEMPTS):
+            cur.execute("""
+                        INSERT INTO candidates (candidate_id, name, email, phone, current_address, form_data,
+                                                created_by, can_edit, created_at, updated_at)
+                        SELECT candidate_id, name, email, phone, current_address, form_data, %s, FALSE,
+                               COALESCE(created_at, CURRENT_TIMESTAMP), COALESCE(created_at, CURRENT_TIMESTAMP)
+                        FROM candidate_import_staging
+                        WHERE candidate_id <> ALL(%s)
+                        ON CONFLICT (candidate_id) DO NOTHING
+                        RETURNING candidate_id
+                        """, (actor, inserted))
+            inserted.extend(r[0] for r in cur.fetchall())
+            # rows whose code an older (pre-sequence) candidate already holds: give them fresh codes and retry
+            cur.execute("SELECT row_no FROM candidate_import_staging WHERE candidate_id <> ALL(%s)", (inserted,))
+            left = [r[0] for r in cur.fetchall()]
+            if not left:
+                break
+            execute_values(cur, """
+                UPDATE candidate_import_staging s SET candidate_id = v.code
+                FROM (VALUES %s) AS v(row_no, code) WHERE s.row_no = v.row_no
+            """, list(zip(left, allocate_codes(cur, len(left)))))
+        else:
+            for row_no in left:
+                rejects.setdefault(row_no, "code_collision")
+        cur.execute("""
+                    INSERT INTO candidate_events (candidate_id, event_type, actor, data, created_at)
+                    SELECT candidate_id, 'candidate_created', %s,
+                           jsonb_build_object('name', name, 'source', %s::text),
+                           COALESCE(created_at, CURRENT_TIMESTAMP)
+                    FROM candidate_import_staging
+                    WHERE candidate_id = ANY(%s)
+                    """, (actor, source, inserted))
+    return len(inserted), sorted(rejects.items())
+
+
+def import_file(path: str, actor: str = "import", batch_size: int = IMPORT_BATCH_SIZE,
+                reject_path: Optional[str] = None, progress=None) -> ImportReport:
+    """
+    Import one file; `progress(read_so_far)` is called after every batch if given.
+    Rejects go to reject_path (default: a temp CSV, returned in the report; None if nothing was rejected).
+    """
+    reader = _reader_for(path)
+    source = os.path.basename(path)
+    if reject_path is None:
+        fd, reject_path = tempfile.mkstemp(prefix="import_rejects_", suffix=".csv")
+        os.close(fd)
+
+    started = time.perf_counter()
+    read = inserted = rejected = 0
+    seen_emails, seen_phones = set(), set()
+    raw_by_row: Dict[int, Dict[str, Any]] = {}
+    batch: List[Dict[str, Any]] = []
+
+    conn = get_conn()
+    try:
+        _create_staging(conn)
+        with open(reject_path, "w", newline="", encoding="utf-8-sig") as rf:
+            rejects = csv.writer(rf)
+            rejects.writerow(["row", "reason", "name", "email", "phone", "raw"])
+
+            def reject(row_no: int, reason: str, raw: Dict[str, Any]):
+                nonlocal rejected
+                rejected += 1
+                rejects.writerow([row_no, reason, raw.get("name", ""), raw.get("email", ""), raw.get("phone", ""),
+                                  json.dumps({str(k): _json_safe(v) for k, v in raw.items()}, ensure_ascii=False)])
+
+            def flush():
+                nonlocal inserted
+                if not batch:
+                    return
+                n, batch_rejects = _load_batch(conn, batch, actor, source)
+                inserted += n
+                for row_no, reason in batch_rejects:
+                    reject(row_no, reason, raw_by_row.get(row_no, {}))
+                batch.clear()
+                raw_by_row.clear()
+                if progress:
+                    progress(read)
+
+            for row_no, raw in reader(path):
+                read += 1
+                row, reason = normalize_row(raw)
+                if row is None:
+                    reject(row_no, reason, raw)
+                    continue
+                if row["email"] in seen_emails:
+                    reject(row_no, "duplicate_in_file_email", row)
+                    continue
+                if row["phone"] in seen_phones:
+                    reject(row_no, "duplicate_in_file_phone", row)
+                    continue
+                seen_emails.add(row["email"])
+                seen_phones.add(row["phone"])
+                row["row_no"] = row_no
+                batch.append(row)
+                raw_by_row[row_no] = row
+                if len(batch) >= batch_size:
+                    flush()
+            flush()
+    finally:
+        conn.close()
+
+    seconds = time.perf_counter() - started
+    if not rejected:
+        os.remove(reject_path)
+        reject_path = None
+    logger.info("Imported %d of %d rows from %s in %.1fs (%d rejected)", inserted, read, source, seconds, rejected)
+    return ImportReport(source, read, inserted, rejected, seconds, reject_path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="CSV, XLSX or legacy SQLite (.db) file")
+    parser.add_argument("--rejects", help="where to write rejected rows (default: a temp file)")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--actor", default="import", help="recorded as created_by and event actor")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    report = import_file(args.path, actor=args.actor, batch_size=args.batch_size, reject_path=args.rejects,
+                         progress=lambda n: print(f"  read {n} rows", end="\r", flush=True))
+    print(f"\nRead {report.read} rows, inserted {report.inserted}, rejected {report.rejected} "
+          f"in {report.seconds:.1f}s ({report.rows_per_second:.0f} rows/s)")
+    if report.reject_path:
+        print(f"Rejects: {report.reject_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,34 +12,38 @@
 #       - View application by candidate code
 #       - Upload/Replace CV, secure fetch + inline PDF preview
 #       - If allowed (can_edit), edit application with validation
-#   • Session-state preservation of in-progress form inputs
+#   • Draft autosave of in-progress form inputs (applications_draft, token in the URL)
 #   • Small quality-of-life helpers (summary sidebar, clear error list, etc.)
 #
 # Notes:
 #   - This module relies on the following functions from db_postgres:
-#       create_candidate_in_db, update_candidate_form_data, get_candidate_by_id,
-#       save_candidate_cv, get_candidate_cv_secure, get_all_candidates
+#       promote_application_draft (+ draft save/get/purge), update_candidate_form_data,
+#       get_candidate_by_id, save_candidate_cv, get_candidate_cv_secure, normalize_phone
 #   - Email is sent with smtp_mailer.send_email(to_email, subject, text, html=None)
 #   - No changes required in smtp_mailer.py
 # ------------------------------------------------------------------------------------
 
 import json
+import time
 import secrets
-import string
+import threading
 from datetime import datetime, date
-from typing import Any, Dict, Optional, List, Tuple
+from typing import Any, Dict, List, Optional
 
 import streamlit as st
 import base64
 
 # DB glue
 from db_postgres import (
-    create_candidate_in_db,
     update_candidate_form_data,
     get_candidate_by_id,
     save_candidate_cv,
     get_candidate_cv_secure,
-    get_all_candidates,
+    save_application_draft,
+    get_application_draft,
+    promote_application_draft,
+    purge_stale_drafts,
+    normalize_phone,
 )
 
 # ------------------------------------------------------------------------------
@@ -54,6 +58,19 @@ DOB_MAX = date.today()
 
 MARITAL_OPTIONS = ["Single", "Married", "Divorced", "Widowed", "Prefer not to say"]
 
+# Draft autosave: fields that are stored, and the minimum gap between writes per session
+DRAFT_FIELDS = (
+    "name", "email", "phone", "current_address", "permanent_address", "dob", "caste", "sub_caste",
+    "marital_status", "highest_qualification", "work_experience", "referral", "ready_festivals",
+    "ready_late_nights",
+)
+DRAFT_DEBOUNCE_SECONDS = 3
+DRAFT_PURGE_INTERVAL_SECONDS = 3600
+
+# Last stale-draft purge in this process (monotonic seconds); shared by all sessions
+_drafts_purged_at: Optional[float] = None
+_drafts_purge_lock = threading.Lock()
+
 # Toggle for debugging helpers (prints)
 DEBUG = False
 
@@ -61,13 +78,6 @@ DEBUG = False
 # UTILS
 # ------------------------------------------------------------------------------
 
-def _gen_candidate_code(prefix: str = "BRV") -> str:
-    """Generate a short unique candidate code."""
-    chars = string.ascii_uppercase + string.digits
-    suffix = "".join(secrets.choice(chars) for _ in range(6))
-    return f"{prefix}-{suffix}"
-
-
 def _safe_json(o: Any) -> Any:
     """Return JSON-serializable object; if not serializable, return {}."""
     try:
@@ -77,13 +87,6 @@ def _safe_json(o: Any) -> Any:
         return {}
 
 
-def _normalize_phone(raw: str) -> str:
-    """Strip to digits only."""
-    if not raw:
-        return ""
-    return "".join(filter(str.isdigit, raw))
-
-
 def _valid_email(email: str) -> bool:
     """Very lightweight email validation without external libs."""
     if not email or "@" not in email:
@@ -102,32 +105,6 @@ def _debug(msg: str):
         st.write(f"DEBUG: {msg}")
 
 
-def _dup_exists(email: str, phone: str) -> Tuple[bool, Optional[str]]:
-    """
-    Check duplicates by email OR phone using get_all_candidates().
-    Returns (exists, reason) where reason is "email" or "phone".
-    """
-    try:
-        records = get_all_candidates() or []
-    except Exception as e:
-        # If DB helper fails, we surface but still allow form to continue;
-        # however, safer to block create to avoid accidental duplicates.
-        st.error(f"Error fetching candidates for duplicate check: {e}")
-        return True, "db_error"
-
-    email_lower = (email or "").strip().lower()
-    phone_norm = (phone or "").strip()
-    for c in records:
-        # DB may store under top-level or within form_data
-        c_email = (c.get("email") or (c.get("form_data") or {}).get("email") or "").strip().lower()
-        c_phone = (c.get("phone") or (c.get("form_data") or {}).get("phone") or "").strip()
-        if c_email and c_email == email_lower:
-            return True, "email"
-        if c_phone and c_phone == phone_norm:
-            return True, "phone"
-    return False, None
-
-
 def _cv_uploader(candidate_id: str):
     """Reusable CV upload block for returning candidates."""
     st.markdown("### Upload/Replace CV")
@@ -138,7 +115,7 @@ def _cv_uploader(candidate_id: str):
     )
     if file is not None:
         file_bytes = file.read()
-        ok = save_candidate_cv(candidate_id, file_bytes, file.name)
+        ok = save_candidate_cv(candidate_id, file_bytes, file.name, actor="candidate")
         if ok:
             st.success("CV saved.")
         else:
@@ -183,6 +160,7 @@ BRV Recruitment
             subject="Your Candidate Code",
             text=body_text,
             html=body_html,
+            kind="candidate_code",
         )
         return True
     except Exception as e:
@@ -222,256 +200,346 @@ def _summary_sidebar(form_data: Dict[str, Any]):
 # FORM RENDERERS
 # ------------------------------------------------------------------------------
 
+def _draft_token() -> str:
+    """Draft token for this tab; kept in the URL so a reload or reconnect resumes the same draft."""
+    token = st.query_params.get("draft")
+    if not token:
+        token = secrets.token_urlsafe(16)
+        st.query_params["draft"] = token
+        _purge_stale_drafts()
+    return token
+
+
+def _purge_stale_drafts():
+    """At most once per DRAFT_PURGE_INTERVAL_SECONDS per process: drop drafts untouched for DRAFT_MAX_AGE_DAYS."""
+    global _drafts_purged_at
+    with _drafts_purge_lock:
+        now = time.monotonic()
+        if _drafts_purged_at is not None and now - _drafts_purged_at < DRAFT_PURGE_INTERVAL_SECONDS:
+            return
+        _drafts_purged_at = now
+    try:
+        purge_stale_drafts()
+    except Exception as e:
+        _debug(f"draft purge failed: {e}")
+
+
+def _draft_restore(token: str):
+    """Seed the form from the stored draft once per session (e.g. after the tablet lost its connection)."""
+    if st.session_state.get("draft_loaded") == token:
+        return
+    st.session_state.draft_loaded = token
+    st.session_state.draft_pending = {}
+    try:
+        draft = get_application_draft(token)
+    except Exception:
+        draft = None
+    if not draft:
+        return
+    if draft.get("candidate_id"):
+        # Already submitted from this link: start a fresh draft instead of editing a promoted one
+        del st.query_params["draft"]
+        st.session_state.form_data = {}
+        return
+    restored = {k: v for k, v in (draft.get("form_data") or {}).items() if k in DRAFT_FIELDS}
+    st.session_state.form_data = {**restored, **(st.session_state.get("form_data") or {})}
+
+
+def _draft_touch(field: str):
+    """on_change: remember the new value; _draft_flush writes it out (debounced)."""
+    value = st.session_state.get(f"cand_{field}")
+    if isinstance(value, date):
+        value = value.isoformat()
+    st.session_state.form_data[field] = value
+    st.session_state.setdefault("draft_pending", {})[field] = value
+
+
+def _draft_flush(token: str, force: bool = False):
+    """Write pending field changes as one small patch, at most every DRAFT_DEBOUNCE_SECONDS."""
+    pending = st.session_state.get("draft_pending")
+    if not pending:
+        return
+    now = time.monotonic()
+    if not force and now - st.session_state.get("draft_flushed_at", 0.0) < DRAFT_DEBOUNCE_SECONDS:
+        return
+    patch = dict(pending)
+    try:
+        save_application_draft(token, patch)
+    except Exception as e:
+        _debug(f"draft autosave failed: {e}")
+        return
+    for k, v in patch.items():
+        if pending.get(k) == v:
+            pending.pop(k)
+    st.session_state.draft_flushed_at = now
+    st.session_state.draft_saved_at = datetime.now().strftime("%H:%M:%S")
+
+
+@st.fragment(run_every=DRAFT_DEBOUNCE_SECONDS)
+def _draft_autosave(token: str):
+    """Trailing flush for the last edits before the candidate pauses, plus a 'saved' hint."""
+    _draft_flush(token)
+    saved_at = st.session_state.get("draft_saved_at")
+    if saved_at:
+        st.caption(f"💾 Draft saved at {saved_at}")
+
+
 def _render_new_candidate_form():
     """
-    Render the New Candidate form inside a st.form. Handles:
-      - Session-state persistence
+    Render the New Candidate form. Handles:
+      - Draft autosave (changed fields only, debounced) so a dropped connection loses nothing
       - Validation
-      - Duplicate check
-      - Record creation
+      - Duplicate check + record creation in one transaction (promote_application_draft)
       - CV upload
       - Email with candidate code
     """
     st.subheader("Pre-Interview Form")
     st.info(REQUIRED_NOTE)
 
-    with st.form("candidate_form", clear_on_submit=False):
-        # Initialize session state storage for in-progress form values
-        if "form_data" not in st.session_state:
-            st.session_state.form_data = {}
+    # Initialize session state storage for in-progress form values
+    if "form_data" not in st.session_state:
+        st.session_state.form_data = {}
+    token = _draft_token()
+    _draft_restore(token)
+    _draft_flush(token)
 
-        initial = st.session_state.form_data
+    initial = st.session_state.form_data
 
-        # Basic Info
-        name = st.text_input("Full Name *", value=initial.get("name", ""), help="Required field")
-        email = st.text_input("Email *", value=initial.get("email", ""), help="Required field")
-        phone = st.text_input("Phone *", value=initial.get("phone", ""), help="Required field - 10 digits minimum")
+    def watch(field: str) -> Dict[str, Any]:
+        return {"key": f"cand_{field}", "on_change": _draft_touch, "args": (field,)}
 
-        # Addresses
-        current_address = st.text_area(
-            "Current Address *", value=initial.get("current_address", ""), help="Required field"
-        )
-        permanent_address = st.text_area(
-            "Permanent Address *", value=initial.get("permanent_address", ""), help="Required field"
-        )
+    # Basic Info
+    name = st.text_input("Full Name *", value=initial.get("name", ""), help="Required field", **watch("name"))
+    email = st.text_input("Email *", value=initial.get("email", ""), help="Required field", **watch("email"))
+    phone = st.text_input("Phone *", value=initial.get("phone", ""), help="Required field - 10 digits minimum",
+                          **watch("phone"))
 
-        # Personal details row
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            # DOB
-            dob_default = None
-            if initial.get("dob"):
-                try:
-                    dob_default = datetime.fromisoformat(initial["dob"]).date()
-                except Exception:
-                    dob_default = None
-
-            if dob_default:
-                dob = st.date_input(
-                    "Date of Birth *",
-                    value=dob_default,
-                    min_value=DOB_MIN,
-                    max_value=DOB_MAX,
-                    help="Required field",
-                )
-            else:
-                dob = st.date_input(
-                    "Date of Birth *",
-                    min_value=DOB_MIN,
-                    max_value=DOB_MAX,
-                    help="Required field - Please select your date of birth",
-                )
-
-        with col2:
-            caste = st.text_input("Caste", value=initial.get("caste", ""))
-
-        with col3:
-            sub_caste = st.text_input("Sub-caste", value=initial.get("sub_caste", ""))
-
-        # Marital + Education
-        col4, col5 = st.columns(2)
-        with col4:
-            m_index = MARITAL_OPTIONS.index(initial["marital_status"]) if initial.get("marital_status") in MARITAL_OPTIONS else 0
-            marital_status = st.selectbox("Marital Status", options=MARITAL_OPTIONS, index=m_index)
-        with col5:
-            highest_qualification = st.text_input(
-                "Highest Qualification *",
-                value=initial.get("highest_qualification", ""),
-                help="Required field",
-            )
+    # Addresses
+    current_address = st.text_area(
+        "Current Address *", value=initial.get("current_address", ""), help="Required field",
+        **watch("current_address")
+    )
+    permanent_address = st.text_area(
+        "Permanent Address *", value=initial.get("permanent_address", ""), help="Required field",
+        **watch("permanent_address")
+    )
 
-        # Work + Referral
-        work_experience = st.text_area(
-            "Work Experience (years/summary) *",
-            value=initial.get("work_experience", ""),
-            help="Required field - Describe your work experience",
-        )
-        referral = st.text_input(
-            "Referral (if any) *",
-            value=initial.get("referral", ""),
-            help="Required field - How did you hear about us?",
-        )
+    # Personal details row
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        # DOB
+        dob_default = None
+        if initial.get("dob"):
+            try:
+                dob_default = datetime.fromisoformat(initial["dob"]).date()
+            except Exception:
+                dob_default = None
 
-        # Availability
-        col6, col7 = st.columns(2)
-        with col6:
-            festivals_index = 1 if initial.get("ready_festivals") == "Yes" else 0
-            ready_festivals = st.selectbox(
-                "Ready to work on festivals and national holidays?",
-                options=["No", "Yes"],
-                index=festivals_index,
+        if dob_default:
+            dob = st.date_input(
+                "Date of Birth *",
+                value=dob_default,
+                min_value=DOB_MIN,
+                max_value=DOB_MAX,
+                help="Required field",
+                **watch("dob"),
             )
-        with col7:
-            nights_index = 1 if initial.get("ready_late_nights") == "Yes" else 0
-            ready_late_nights = st.selectbox(
-                "Ready to work late nights if needed?",
-                options=["No", "Yes"],
-                index=nights_index,
+        else:
+            dob = st.date_input(
+                "Date of Birth *",
+                min_value=DOB_MIN,
+                max_value=DOB_MAX,
+                help="Required field - Please select your date of birth",
+                **watch("dob"),
             )
 
-        # CV
-        st.markdown("### CV Upload *")
-        uploaded_cv = st.file_uploader(
-            "Upload Your Resume (PDF/DOC/DOCX preferred) — REQUIRED",
-            type=["pdf", "doc", "docx"],
-            help="This is a required field. Please upload your CV.",
+    with col2:
+        caste = st.text_input("Caste", value=initial.get("caste", ""), **watch("caste"))
+
+    with col3:
+        sub_caste = st.text_input("Sub-caste", value=initial.get("sub_caste", ""), **watch("sub_caste"))
+
+    # Marital + Education
+    col4, col5 = st.columns(2)
+    with col4:
+        m_index = MARITAL_OPTIONS.index(initial["marital_status"]) if initial.get("marital_status") in MARITAL_OPTIONS else 0
+        marital_status = st.selectbox("Marital Status", options=MARITAL_OPTIONS, index=m_index,
+                                      **watch("marital_status"))
+    with col5:
+        highest_qualification = st.text_input(
+            "Highest Qualification *",
+            value=initial.get("highest_qualification", ""),
+            help="Required field",
+            **watch("highest_qualification"),
         )
 
-        submitted = st.form_submit_button("Submit Application", type="primary")
-
-        # On submit, collect + validate
-        if submitted:
-            form_data = {
-                "name": (name or "").strip(),
-                "email": (email or "").strip(),
-                "phone": _normalize_phone(phone),
-                "current_address": (current_address or "").strip(),
-                "permanent_address": (permanent_address or "").strip(),
-                "dob": dob.isoformat() if isinstance(dob, date) else None,
-                "caste": (caste or "").strip(),
-                "sub_caste": (sub_caste or "").strip(),
-                "marital_status": marital_status,
-                "highest_qualification": (highest_qualification or "").strip(),
-                "work_experience": (work_experience or "").strip(),
-                "referral": (referral or "").strip(),
-                "ready_festivals": "Yes" if ready_festivals == "Yes" else "No",
-                "ready_late_nights": "Yes" if ready_late_nights == "Yes" else "No",
-                "uploaded_cv": uploaded_cv,
-                "updated_at": datetime.utcnow().isoformat(),
-            }
-
-            # Persist to session so user doesn't lose work on validation errors
-            st.session_state.form_data = form_data
-
-            # Show a quick summary in the sidebar
-            _summary_sidebar(form_data)
-
-            # Validation
-            errors: List[str] = []
-
-            if not form_data["name"]:
-                errors.append("• Full Name is required")
-
-            if not _valid_email(form_data["email"]):
-                errors.append("• Please enter a valid Email address")
-
-            if not form_data["phone"]:
-                errors.append("• Phone number is required")
-            elif len(form_data["phone"]) < PHONE_MIN_DIGITS:
-                errors.append(f"• Phone number must be at least {PHONE_MIN_DIGITS} digits")
-
-            if not form_data["dob"]:
-                errors.append("• Date of Birth is required")
-
-            if not form_data["current_address"]:
-                errors.append("• Current Address is required")
+    # Work + Referral
+    work_experience = st.text_area(
+        "Work Experience (years/summary) *",
+        value=initial.get("work_experience", ""),
+        help="Required field - Describe your work experience",
+        **watch("work_experience"),
+    )
+    referral = st.text_input(
+        "Referral (if any) *",
+        value=initial.get("referral", ""),
+        help="Required field - How did you hear about us?",
+        **watch("referral"),
+    )
 
-            if not form_data["permanent_address"]:
-                errors.append("• Permanent Address is required")
+    # Availability
+    col6, col7 = st.columns(2)
+    with col6:
+        festivals_index = 1 if initial.get("ready_festivals") == "Yes" else 0
+        ready_festivals = st.selectbox(
+            "Ready to work on festivals and national holidays?",
+            options=["No", "Yes"],
+            index=festivals_index,
+            **watch("ready_festivals"),
+        )
+    with col7:
+        nights_index = 1 if initial.get("ready_late_nights") == "Yes" else 0
+        ready_late_nights = st.selectbox(
+            "Ready to work late nights if needed?",
+            options=["No", "Yes"],
+            index=nights_index,
+            **watch("ready_late_nights"),
+        )
 
-            if not form_data["highest_qualification"]:
-                errors.append("• Highest Qualification is required")
+    # CV (files are not part of the draft; re-select after a reload)
+    st.markdown("### CV Upload *")
+    uploaded_cv = st.file_uploader(
+        "Upload Your Resume (PDF/DOC/DOCX preferred) — REQUIRED",
+        type=["pdf", "doc", "docx"],
+        help="This is a required field. Please upload your CV.",
+    )
 
-            if not form_data["work_experience"]:
-                errors.append("• Work Experience is required")
+    _draft_autosave(token)
+    submitted = st.button("Submit Application", type="primary")
+
+    # On submit, collect + validate
+    if submitted:
+        form_data = {
+            "name": (name or "").strip(),
+            "email": (email or "").strip(),
+            "phone": normalize_phone(phone),
+            "current_address": (current_address or "").strip(),
+            "permanent_address": (permanent_address or "").strip(),
+            "dob": dob.isoformat() if isinstance(dob, date) else None,
+            "caste": (caste or "").strip(),
+            "sub_caste": (sub_caste or "").strip(),
+            "marital_status": marital_status,
+            "highest_qualification": (highest_qualification or "").strip(),
+            "work_experience": (work_experience or "").strip(),
+            "referral": (referral or "").strip(),
+            "ready_festivals": "Yes" if ready_festivals == "Yes" else "No",
+            "ready_late_nights": "Yes" if ready_late_nights == "Yes" else "No",
+            "updated_at": datetime.utcnow().isoformat(),
+        }
+
+        # Persist to session so user doesn't lose work on validation errors
+        st.session_state.form_data = {k: v for k, v in form_data.items() if k in DRAFT_FIELDS}
+
+        # Show a quick summary in the sidebar
+        _summary_sidebar(form_data)
+
+        # Validation
+        errors: List[str] = []
+
+        if not form_data["name"]:
+            errors.append("• Full Name is required")
+
+        if not _valid_email(form_data["email"]):
+            errors.append("• Please enter a valid Email address")
+
+        if not form_data["phone"]:
+            errors.append("• Phone number is required")
+        elif len(form_data["phone"]) < PHONE_MIN_DIGITS:
+            errors.append(f"• Phone number must be at least {PHONE_MIN_DIGITS} digits")
+
+        if not form_data["dob"]:
+            errors.append("• Date of Birth is required")
+
+        if not form_data["current_address"]:
+            errors.append("• Current Address is required")
+
+        if not form_data["permanent_address"]:
+            errors.append("• Permanent Address is required")
+
+        if not form_data["highest_qualification"]:
+            errors.append("• Highest Qualification is required")
+
+        if not form_data["work_experience"]:
+            errors.append("• Work Experience is required")
+
+        if not form_data["referral"]:
+            errors.append("• Referral is required")
+
+        if not uploaded_cv:
+            errors.append("• CV upload is required")
+
+        if errors:
+            _draft_flush(token, force=True)
+            _required_error_list(errors)
+            return
+
+        # Duplicate check (email/phone) + record creation, one transaction
+        try:
+            record, reason = promote_application_draft(token, _safe_json(form_data), created_by="candidate")
+        except Exception as e:
+            _debug(f"promote failed: {e}")
+            record, reason = None, "db_error"
+
+        if not record:
+            if reason == "email":
+                _required_error_list(["• An application with this email already exists."])
+            elif reason == "phone":
+                _required_error_list(["• An application with this phone number already exists."])
+            else:
+                st.error("Failed to create candidate record. Please try again.")
+            return
+        candidate_id = record["candidate_id"]
 
-            if not form_data["referral"]:
-                errors.append("• Referral is required")
+        # Success UI
+        st.success(f"✅ Application submitted! Your candidate code is: **{candidate_id}**")
 
-            if not form_data["uploaded_cv"]:
-                errors.append("• CV upload is required")
+        # Helpful copy widget for the code
+        st.text_input("Copy your candidate code:", value=candidate_id, key="copy_code", help="Copy this code and keep it safe.")
 
-            # Duplicate check (email/phone)
-            if not errors:
-                exists, reason = _dup_exists(form_data["email"], form_data["phone"])
-                if exists:
-                    if reason == "email":
-                        errors.append("• An application with this email already exists.")
-                    elif reason == "phone":
-                        errors.append("• An application with this phone number already exists.")
-                    else:
-                        errors.append("• Unable to verify duplicates due to a database error. Please try again.")
+        # Try emailing the code (a repeated submit already sent it)
+        if reason == "created" and _send_candidate_code_email(form_data["email"], candidate_id):
+            st.info("📧 Candidate code has also been emailed to you.")
 
-            if errors:
-                _required_error_list(errors)
-                return
+        # Save CV now
+        try:
+            file_bytes = uploaded_cv.getvalue()
+        except Exception:
+            # Streamlit file-like objects can be re-read once; if None, ask re-upload
+            file_bytes = None
 
-            # Create record
-            candidate_id = _gen_candidate_code()
-            record = create_candidate_in_db(
-                candidate_id=candidate_id,
-                name=form_data["name"],
-                address=form_data["current_address"],
-                dob=form_data["dob"],
-                caste=form_data["caste"],
-                email=form_data["email"],
-                phone=form_data["phone"],
-                form_data=_safe_json(form_data),
-                created_by="candidate",
-            )
+        if file_bytes:
+            ok = save_candidate_cv(candidate_id, file_bytes, uploaded_cv.name, actor="candidate")
+            if ok:
+                st.success("📄 CV uploaded successfully.")
+            else:
+                st.error("⚠️ Failed to save CV.")
+        else:
+            st.warning("CV file stream not available; please re-upload from Returning Candidate section if needed.")
 
-            if not record:
-                st.error("Failed to create candidate record. Please try again.")
-                return
+        # Optional: Offer a quick "Resend Email" button
+        with st.expander("Need the email again?"):
+            if st.button("Resend Candidate Code"):
+                if _send_candidate_code_email(form_data["email"], candidate_id):
+                    st.success("Email re-sent successfully.")
 
-            # Success UI
-            st.success(f"✅ Application submitted! Your candidate code is: **{candidate_id}**")
-
-            # Helpful copy widget for the code
-            st.text_input("Copy your candidate code:", value=candidate_id, key="copy_code", help="Copy this code and keep it safe.")
-
-            # Try emailing the code
-            sent = _send_candidate_code_email(form_data["email"], candidate_id)
-            if sent:
-                st.info("📧 Candidate code has also been emailed to you.")
-
-            # Save CV now
-            cv_file = form_data.get("uploaded_cv")
-            if cv_file:
-                try:
-                    file_bytes = cv_file.read()
-                except Exception:
-                    # Streamlit file-like objects can be re-read once; if None, ask re-upload
-                    file_bytes = None
-
-                if file_bytes:
-                    ok = save_candidate_cv(candidate_id, file_bytes, cv_file.name)
-                    if ok:
-                        st.success("📄 CV uploaded successfully.")
-                    else:
-                        st.error("⚠️ Failed to save CV.")
-                else:
-                    st.warning("CV file stream not available; please re-upload from Returning Candidate section if needed.")
-
-            # Optional: Offer a quick "Resend Email" button
-            with st.expander("Need the email again?"):
-                if st.button("Resend Candidate Code"):
-                    if _send_candidate_code_email(form_data["email"], candidate_id):
-                        st.success("Email re-sent successfully.")
-
-            # Clear form data and rerun so the form resets cleanly
-            st.session_state.form_data = {}
-            st.rerun()
+        # Clear form data and the draft link, then rerun so the form resets cleanly
+        st.session_state.form_data = {}
+        st.session_state.draft_pending = {}
+        st.session_state.pop("draft_saved_at", None)
+        for field in DRAFT_FIELDS:
+            st.session_state.pop(f"cand_{field}", None)
+        del st.query_params["draft"]
+        st.rerun()
 
 
 def _render_returning_candidate():
@@ -591,7 +659,7 @@ def _render_returning_candidate():
 
             name_v = (name or "").strip()
             email_v = (email or "").strip()
-            phone_v = _normalize_phone(phone)
+            phone_v = normalize_phone(phone)
             current_address_v = (current_address or "").strip()
             permanent_address_v = (permanent_address or "").strip()
             dob_v = dob.isoformat() if isinstance(dob, date) else None
@@ -637,10 +705,16 @@ def _render_returning_candidate():
                 "referral": ref_v,
                 "ready_festivals": "Yes" if ready_festivals == "Yes" else "No",
                 "ready_late_nights": "Yes" if ready_late_nights == "Yes" else "No",
-                "updated_at": datetime.utcnow().isoformat(),
             }
 
-            ok = update_candidate_form_data(candidate_code.strip(), updated_data)
+            # Write only what changed: those columns, plus the same keys patched into form_data
+            changed = {k: v for k, v in updated_data.items() if existing_form.get(k) != v}
+            if not changed:
+                st.info("No changes to save.")
+                return
+            changed["form_patch"] = {**changed, "updated_at": datetime.utcnow().isoformat()}
+
+            ok = update_candidate_form_data(candidate_code.strip(), changed, actor="candidate")
             if ok:
                 st.success("Your application has been updated.")
             else:
@@ -5,8 +5,9 @@ from __future__ import annotations
 
 import base64
 import json
+import threading
 from typing import Dict, Any, List, Optional, Tuple, Iterable
-from datetime import datetime
+from datetime import date, datetime, timedelta
 import uuid
 import mimetypes
 import traceback
@@ -15,9 +16,6 @@ import psycopg2
 from smtp_mailer import send_email
 import streamlit as st
 import streamlit.components.v1 as components
-import asyncio
-import concurrent.futures
-import threading
 from functools import partial
 
 # Set page config once
@@ -31,92 +29,121 @@ from db_postgres import (
     update_user_permissions,
     get_candidate_cv_secure,
     get_user_permissions,
-    get_candidate_statistics,
     get_all_candidates,
     delete_candidate,
     set_candidate_permission,
     get_candidate_history,
+    get_interviewer_leaderboard,
+    get_candidate_changes,
     get_conn
 )
+import db_async
+import analytics
+import metrics
+import page_profiler
 from auth import require_login, get_current_user
 
 
 # =============================================================================
-# Performance Optimizations with Async/Threading and Better Caching
+# Performance Optimizations with Concurrent Fetching and Better Caching
 # =============================================================================
 
-@st.cache_data(ttl=600, show_spinner=False)  # 10 minute cache
-def _get_candidates_fast():
-    """Ultra-fast candidate loading with connection pooling."""
-    try:
-        conn = get_conn()
-        with conn.cursor() as cur:
-            # Optimized query - get only essential data first
-            cur.execute("""
-                        SELECT candidate_id,
-                               name,
-                               email,
-                               phone,
-                               created_at,
-                               updated_at,
-                               can_edit,
-                               cv_file IS NOT NULL as has_cv_file,
-                               resume_link IS NOT NULL AND resume_link != '' as has_resume_link,
-                    form_data
-                        FROM candidates
-                        ORDER BY created_at DESC
-                            LIMIT 1000
-                        """)
-
-            candidates = []
-            for row in cur.fetchall():
-                candidate = {
-                    'candidate_id': row[0],
-                    'name': row[1],
-                    'email': row[2],
-                    'phone': row[3],
-                    'created_at': row[4],
-                    'updated_at': row[5],
-                    'can_edit': row[6],
-                    'has_cv_file': row[7],
-                    'has_resume_link': row[8],
-                    'form_data': row[9] or {}
-                }
+def _shape_candidate_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """List-view candidate dict with form_data fields merged in."""
+    candidate = dict(row)
+    candidate['form_data'] = candidate.get('form_data') or {}
 
-                # Merge form_data efficiently
-                if isinstance(candidate['form_data'], dict):
-                    for key, value in candidate['form_data'].items():
-                        if value and str(value).strip():
-                            candidate[f'form_{key}'] = value
-                            if key not in candidate:
-                                candidate[key] = value
+    # Merge form_data efficiently
+    if isinstance(candidate['form_data'], dict):
+        for key, value in candidate['form_data'].items():
+            if value and str(value).strip():
+                candidate[f'form_{key}'] = value
+                if key not in candidate:
+                    candidate[key] = value
+    return candidate
+
+
+@metrics.cache_data(ttl=300, show_spinner=False)
+def _get_dashboard_data() -> Dict[str, Any]:
+    """Statistics and users list, fetched concurrently in one round of queries (raises, so failures aren't cached)."""
+    stats, users = db_async.gather(
+        db_async.get_candidate_statistics(),
+        db_async.get_all_users_with_permissions(),
+    )
+    return {
+        "stats": stats or {},
+        "users": users or [],
+    }
 
-                candidates.append(candidate)
 
-        conn.close()
-        return candidates
-    except Exception as e:
-        st.error(f"Failed to load candidates: {e}")
-        return []
+CANDIDATE_LIST_LIMIT = 1000
+
+
+@st.cache_resource
+def _candidate_list_sync() -> Dict[str, Any]:
+    """Process-wide dashboard candidate list, shared by every CEO session."""
+    return {"lock": threading.Lock(), "token": None, "rows": {}}
+
+
+def _get_candidates_synced() -> List[Dict[str, Any]]:
+    """
+    Newest CANDIDATE_LIST_LIMIT candidates, patched on every call with only the rows changed or
+    deleted since the last call (db_postgres.get_candidate_changes) instead of being reloaded.
+    """
+    state = _candidate_list_sync()
+    with state["lock"]:
+        try:
+            delta = get_candidate_changes(state["token"], columns=db_async.CANDIDATE_LIST_COLUMNS,
+                                          limit=CANDIDATE_LIST_LIMIT)
+        except Exception as e:
+            st.error(f"Failed to load candidates: {e}")
+            return [dict(r) for r in state["rows"].values()]
+        rows: Dict[str, Dict[str, Any]] = state["rows"]
+        if delta["full"]:
+            rows.clear()
+        for candidate_id in delta["deleted"]:
+            rows.pop(candidate_id, None)
+
+        # Once the window is full, changes to older candidates than its oldest stay out of it
+        full = not delta["full"] and len(rows) >= CANDIDATE_LIST_LIMIT
+        oldest = min(r["created_at"] for r in rows.values()) if full else None
+        for r in delta["changed"]:
+            seen = rows.get(r["candidate_id"])
+            if seen is not None and seen["row_version"] >= r["row_version"]:
+                continue
+            if seen is None and oldest is not None and r["created_at"] < oldest:
+                continue
+            rows[r["candidate_id"]] = _shape_candidate_row(r)
+        state["token"] = delta["token"]
+
+        ordered = sorted(rows.values(), key=lambda r: r["created_at"], reverse=True)
+        for dropped in ordered[CANDIDATE_LIST_LIMIT:]:
+            rows.pop(dropped["candidate_id"], None)
+        return [dict(r) for r in ordered[:CANDIDATE_LIST_LIMIT]]
+
+
+def _resync_candidates():
+    """Throw the patched list away; the next _get_candidates_synced() takes a fresh snapshot."""
+    state = _candidate_list_sync()
+    with state["lock"]:
+        state["token"] = None
+
+
+# Every candidates column except cv_file (the blob is fetched separately, behind the CV permission check)
+_DETAIL_COLUMNS = [
+    "id", "candidate_id", "name", "email", "phone", "address", "form_data", "resume_link", "can_edit",
+    "created_by", "created_at", "updated_at", "current_address", "permanent_address", "dob", "caste",
+    "sub_caste", "marital_status", "highest_qualification", "work_experience", "referral",
+    "ready_festivals", "ready_late_nights", "cv_filename",
+]
 
 
 def _get_detailed_candidate_data(candidate_id: str) -> Dict[str, Any]:
     """Load detailed data for a specific candidate only when needed."""
+    select_parts = _DETAIL_COLUMNS
     try:
         conn = get_conn()
         with conn.cursor() as cur:
-            # Get all columns for this specific candidate
-            cur.execute("""
-                        SELECT column_name
-                        FROM information_schema.columns
-                        WHERE table_name = 'candidates'
-                        ORDER BY ordinal_position
-                        """)
-            existing_columns = [row[0] for row in cur.fetchall()]
-
-            # Build comprehensive SELECT
-            select_parts = [col for col in existing_columns if col not in ['cv_file']]
-
             query = f"""
                 SELECT {', '.join(select_parts)}
                 FROM candidates
@@ -149,19 +176,107 @@ def _get_detailed_candidate_data(candidate_id: str) -> Dict[str, Any]:
     return {}
 
 
-@st.cache_data(ttl=300, show_spinner=False)
-def _get_stats_fast():
-    """Fast statistics loading."""
+def _clear_candidate_cache():
+    """Clear candidate cache for refresh (the candidate list itself catches up through the change feed)."""
+    _get_dashboard_data.clear()
+    _get_hiring_analytics.clear()
+    _get_interviewer_leaderboard.clear()
+
+
+# =============================================================================
+# Hiring Funnel Analytics
+# =============================================================================
+
+FUNNEL_WINDOWS = (30, 90, 180, 365)
+
+
+@metrics.cache_data(ttl=900, show_spinner=False)
+def _get_hiring_analytics(start: date, end: date) -> Dict[str, Any]:
+    """Funnel/cohort/interviewer analytics, cached per (start, end) date window."""
+    return analytics.get_hiring_analytics(start, end)
+
+
+@metrics.cache_data(ttl=900, show_spinner=False)
+def _get_interviewer_leaderboard() -> List[Dict[str, Any]]:
+    return get_interviewer_leaderboard()
+
+
+def _format_hours(hours: Optional[float]) -> str:
+    if hours is None:
+        return "—"
+    return f"{hours:.1f} h" if hours < 48 else f"{hours / 24:.1f} d"
+
+
+def _render_hiring_analytics():
+    """Conversion funnel, median time-to-stage, weekly cohorts and interviewer throughput."""
+    days = st.selectbox("Window", FUNNEL_WINDOWS, index=1, format_func=lambda d: f"Applied in the last {d} days",
+                        key="funnel_window")
+    end = date.today() + timedelta(days=1)
     try:
-        return get_candidate_statistics() or {}
-    except Exception:
-        return {}
+        with page_profiler.section("hiring analytics"):
+            data = _get_hiring_analytics(end - timedelta(days=days), end)
+    except Exception as e:
+        st.error(f"Failed to load analytics: {e}")
+        return
 
+    funnel, conversion, median = data["funnel"], data["conversion"], data["median_hours"]
+    if not funnel.get("applied"):
+        st.info("No candidates applied in this window.")
+        return
 
-def _clear_candidate_cache():
-    """Clear candidate cache for refresh."""
-    _get_candidates_fast.clear()
-    _get_stats_fast.clear()
+    stage_cols = st.columns(4)
+    stage_pct = {"assessed": "assessed_pct", "interviewed": "interviewed_pct", "passed": "passed_pct"}
+    for col, stage in zip(stage_cols, analytics.STAGES):
+        pct = conversion.get(stage_pct.get(stage, ""))
+        with col:
+            st.metric(stage.title(), funnel[stage],
+                      delta=f"{pct}% of previous" if pct is not None else None, delta_color="off")
+    st.caption(f"Overall applied → passed: {conversion['overall_pct']}%")
+    st.bar_chart({"stage": [s.title() for s in analytics.STAGES],
+                  "candidates": [funnel[s] for s in analytics.STAGES]}, x="stage", y="candidates")
+
+    st.markdown("**Median time to stage**")
+    lat_cols = st.columns(3)
+    lat_cols[0].metric("Applied → Assessed", _format_hours(median["applied_to_assessed_hours"]))
+    lat_cols[1].metric("Assessed → Interviewed", _format_hours(median["assessed_to_interviewed_hours"]))
+    lat_cols[2].metric("Applied → Passed", _format_hours(median["applied_to_passed_hours"]))
+
+    if data["cohorts"]:
+        st.markdown("**Weekly cohorts** (by application week)")
+        st.line_chart({
+            "week": [str(r["week"]) for r in data["cohorts"]],
+            **{s: [r[s] for r in data["cohorts"]] for s in analytics.STAGES},
+        }, x="week", y=list(analytics.STAGES))
+
+    if data["interviewers"]:
+        st.markdown("**Interviewer throughput**")
+        totals: Dict[str, Dict[str, int]] = {}
+        for r in data["interviewers"]:
+            t = totals.setdefault(r["interviewer"], {"interviews": 0, "passed": 0, "failed": 0})
+            for k in t:
+                t[k] += r[k]
+        names = sorted(totals, key=lambda n: -totals[n]["interviews"])
+        st.bar_chart({"interviewer": names, "interviews": [totals[n]["interviews"] for n in names],
+                      "passed": [totals[n]["passed"] for n in names]}, x="interviewer", y=["interviews", "passed"])
+        st.dataframe(data["interviewers"], use_container_width=True, hide_index=True)
+
+    st.markdown("**Interviewer leaderboard** (all time, by logged-in interviewer)")
+    try:
+        leaderboard = _get_interviewer_leaderboard()
+    except Exception as e:
+        st.caption(f"Leaderboard unavailable: {e}")
+        leaderboard = []
+    if leaderboard:
+        st.dataframe([{
+            "Interviewer": r["interviewer_email"],
+            "Interviews": r["total_interviews"],
+            "Completed": r["completed"],
+            "Passed": r["passed"],
+            "Success rate %": r["success_rate"],
+            "Avg. assessment → interview": _format_hours(r["avg_hours_assessment_to_interview"]),
+        } for r in leaderboard], use_container_width=True, hide_index=True)
+    else:
+        st.caption("No interviews linked to interviewer accounts yet.")
 
 
 # =============================================================================
@@ -842,7 +957,12 @@ def _render_bulk_user_controls(users: List[Dict], perms: Dict[str, Any]):
 def _check_user_permissions(user_id: int) -> Dict[str, Any]:
     """Check user permissions with STRICT enforcement."""
     try:
-        perms = get_user_permissions(user_id)
+        current = get_current_user()
+        if current and current.get("id") == user_id:
+            # Current user: flags from the verified session token, no DB round trip
+            perms = current
+        else:
+            perms = get_user_permissions(user_id)
         if not perms:
             return {"role": "user", "can_view_cvs": False, "can_delete_records": False, "can_manage_users": False}
 
@@ -873,36 +993,14 @@ def _get_cv_with_proper_access(candidate_id: str, user_id: int) -> Tuple[Optiona
         conn = get_conn()
         try:
             with conn.cursor() as cur:
-                # Check what CV columns exist
-                cur.execute("""
-                            SELECT column_name
-                            FROM information_schema.columns
-                            WHERE table_name = 'candidates'
-                              AND column_name IN ('cv_file', 'cv_filename', 'resume_link')
-                            """)
-                existing_cols = {row[0] for row in cur.fetchall()}
-
-                select_parts = []
-                if 'cv_file' in existing_cols:
-                    select_parts.append('cv_file')
-                if 'cv_filename' in existing_cols:
-                    select_parts.append('cv_filename')
-                if 'resume_link' in existing_cols:
-                    select_parts.append('resume_link')
-
-                if not select_parts:
-                    return None, None, "not_found"
-
-                query = f"SELECT {', '.join(select_parts)} FROM candidates WHERE candidate_id = %s"
-                cur.execute(query, (candidate_id,))
+                cur.execute("SELECT cv_file, cv_filename, resume_link FROM candidates WHERE candidate_id = %s",
+                            (candidate_id,))
                 result = cur.fetchone()
 
                 if not result:
                     return None, None, "not_found"
 
-                cv_file = result[0] if len(result) > 0 and 'cv_file' in select_parts else None
-                cv_filename = result[1] if len(result) > 1 and 'cv_filename' in select_parts else None
-                resume_link = result[2] if len(result) > 2 and 'resume_link' in select_parts else None
+                cv_file, cv_filename, resume_link = result
 
                 if cv_file:
                     return bytes(cv_file), cv_filename or f"{candidate_id}.pdf", "ok"
@@ -1129,120 +1227,87 @@ def _render_personal_details_organized(candidate: Dict[str, Any]):
 # =============================================================================
 
 def _get_interview_history_comprehensive(candidate_id: str) -> List[Dict[str, Any]]:
-    """Get comprehensive interview history with proper formatting."""
+    """Get comprehensive interview history with proper formatting (one read of candidate_events)."""
     history = []
 
     try:
-        conn = get_conn()
-        with conn.cursor() as cur:
-            # Check what tables exist
-            cur.execute("""
-                        SELECT table_name
-                        FROM information_schema.tables
-                        WHERE table_schema = 'public'
-                          AND table_name IN ('candidate_history', 'interviews', 'receptionist_assessments')
-                        """)
-            existing_tables = {row[0] for row in cur.fetchall()}
-
-            # Get from interviews table
-            if 'interviews' in existing_tables:
-                try:
-                    cur.execute("""
-                                SELECT id, interviewer, created_at, scheduled_at, result, notes
-                                FROM interviews
-                                WHERE candidate_id = %s
-                                ORDER BY COALESCE(scheduled_at, created_at) DESC
-                                """, (candidate_id,))
-
-                    for row in cur.fetchall():
-                        interview_id, interviewer, created_at, scheduled_at, result, notes = row
-
-                        # Build detailed interview information
-                        details = []
-                        if result:
-                            details.append(f"**Result:** {result}")
-                        if interviewer:
-                            details.append(f"**Interviewer:** {interviewer}")
-                        if scheduled_at:
-                            details.append(f"**Scheduled:** {_format_datetime(scheduled_at)}")
-                        if notes and notes.strip():
-                            details.append(f"**Notes:** {notes}")
-
-                        event_time = scheduled_at if scheduled_at else created_at
-
-                        history.append({
-                            'id': f"interview_{interview_id}",
-                            'type': 'interview',
-                            'title': '🎤 Interview',
-                            'actor': interviewer or 'Interviewer',
-                            'created_at': event_time,
-                            'details': details,
-                            'raw_details': {
-                                'result': result,
-                                'interviewer': interviewer,
-                                'scheduled_at': scheduled_at,
-                                'notes': notes
-                            }
-                        })
-                except Exception as e:
-                    st.warning(f"Could not load interviews: {e}")
-
-            # Get from receptionist_assessments table
-            if 'receptionist_assessments' in existing_tables:
+        events = get_candidate_history(candidate_id, limit=200,
+                                       event_types=["interview_recorded", "assessment_recorded"])
+    except Exception as e:
+        st.error(f"Error loading history: {e}")
+        return history
+
+    for ev in events:
+        data = ev.get("data") or {}
+        if ev["event"] == "interview_recorded":
+            result, interviewer, notes = data.get("result"), data.get("interviewer"), data.get("notes")
+            scheduled_at = data.get("scheduled_at")
+            if scheduled_at:
                 try:
-                    cur.execute("""
-                                SELECT id,
-                                       created_at,
-                                       speed_test,
-                                       accuracy_test,
-                                       work_commitment,
-                                       english_understanding,
-                                       comments
-                                FROM receptionist_assessments
-                                WHERE candidate_id = %s
-                                ORDER BY created_at DESC
-                                """, (candidate_id,))
-
-                    for row in cur.fetchall():
-                        assess_id, created_at, speed_test, accuracy_test, work_commitment, english_understanding, comments = row
-
-                        # Build detailed assessment information
-                        details = []
-                        if speed_test is not None:
-                            details.append(f"**Speed Test:** {speed_test}/100")
-                        if accuracy_test is not None:
-                            details.append(f"**Accuracy Test:** {accuracy_test}/100")
-                        if work_commitment:
-                            details.append(f"**Work Commitment:** {work_commitment}")
-                        if english_understanding:
-                            details.append(f"**English Understanding:** {english_understanding}")
-                        if comments and comments.strip():
-                            details.append(f"**Comments:** {comments}")
-
-                        history.append({
-                            'id': f"assessment_{assess_id}",
-                            'type': 'assessment',
-                            'title': '📊 Receptionist Assessment',
-                            'actor': 'Receptionist',
-                            'created_at': created_at,
-                            'details': details,
-                            'raw_details': {
-                                'speed_test': speed_test,
-                                'accuracy_test': accuracy_test,
-                                'work_commitment': work_commitment,
-                                'english_understanding': english_understanding,
-                                'comments': comments
-                            }
-                        })
-                except Exception as e:
-                    st.warning(f"Could not load assessments: {e}")
-
-            conn.close()
+                    scheduled_at = datetime.fromisoformat(scheduled_at)
+                except (TypeError, ValueError):
+                    pass
 
-    except Exception as e:
-        st.error(f"Error connecting to database for history: {e}")
+            # Build detailed interview information
+            details = []
+            if result:
+                details.append(f"**Result:** {result}")
+            if interviewer:
+                details.append(f"**Interviewer:** {interviewer}")
+            if scheduled_at:
+                details.append(f"**Scheduled:** {_format_datetime(scheduled_at)}")
+            if notes and str(notes).strip():
+                details.append(f"**Notes:** {notes}")
+
+            history.append({
+                'id': f"interview_{data.get('interview_id', ev['id'])}",
+                'type': 'interview',
+                'title': '🎤 Interview',
+                'actor': interviewer or ev.get('actor') or 'Interviewer',
+                'created_at': scheduled_at if isinstance(scheduled_at, datetime) else ev.get('created_at'),
+                'details': details,
+                'raw_details': {
+                    'result': result,
+                    'interviewer': interviewer,
+                    'scheduled_at': scheduled_at,
+                    'notes': notes
+                }
+            })
+        else:
+            speed_test, accuracy_test = data.get("speed_test"), data.get("accuracy_test")
+            work_commitment, english_understanding = data.get("work_commitment"), data.get("english_understanding")
+            comments = data.get("comments")
+
+            # Build detailed assessment information
+            details = []
+            if speed_test is not None:
+                details.append(f"**Speed Test:** {speed_test}/100")
+            if accuracy_test is not None:
+                details.append(f"**Accuracy Test:** {accuracy_test}/100")
+            if work_commitment:
+                details.append(f"**Work Commitment:** {work_commitment}")
+            if english_understanding:
+                details.append(f"**English Understanding:** {english_understanding}")
+            if comments and str(comments).strip():
+                details.append(f"**Comments:** {comments}")
+
+            history.append({
+                'id': f"assessment_{data.get('assessment_id', ev['id'])}",
+                'type': 'assessment',
+                'title': '📊 Receptionist Assessment',
+                'actor': 'Receptionist',
+                'created_at': ev.get('created_at'),
+                'details': details,
+                'raw_details': {
+                    'speed_test': speed_test,
+                    'accuracy_test': accuracy_test,
+                    'work_commitment': work_commitment,
+                    'english_understanding': english_understanding,
+                    'comments': comments
+                }
+            })
 
-    # Sort by created_at desc
+    # Interviews are placed at their scheduled time, so re-sort the merged list
     history.sort(key=lambda x: x.get('created_at') or datetime.min, reverse=True)
     return history
 
@@ -1770,10 +1835,15 @@ def show_ceo_panel():
     _render_zero_refresh_selection_manager()
 
     # Quick stats
-    with st.spinner("Loading dashboard..."):
-        stats = _get_stats_fast()
+    with st.spinner("Loading dashboard..."), page_profiler.section("dashboard data"):
+        try:
+            dashboard = _get_dashboard_data()
+        except Exception as e:
+            st.error(f"Failed to load dashboard data: {e}")
+            dashboard = {"stats": {}, "users": []}
+    stats = dashboard["stats"]
 
-    col1, col2, col3, col4 = st.columns(4)
+    col1, col2, col3, col4, col5 = st.columns(5)
     with col1:
         st.metric("📊 Total Candidates", stats.get("total_candidates", 0))
     with col2:
@@ -1782,6 +1852,11 @@ def show_ceo_panel():
         st.metric("🎤 Interviews", stats.get("total_interviews", 0))
     with col4:
         st.metric("📋 Assessments", stats.get("total_assessments", 0))
+    with col5:
+        st.metric("👤 Users", len(dashboard["users"]))
+
+    with st.expander("📈 Hiring Funnel", expanded=False):
+        _render_hiring_analytics()
 
     st.markdown("---")
 
@@ -1809,10 +1884,12 @@ def show_ceo_panel():
     with ctrl_col4:
         if st.button("🔄 Refresh"):
             _clear_candidate_cache()
+            _resync_candidates()
             st.rerun()
 
-    # Load candidates
-    candidates = _get_candidates_fast()
+    # Load candidates (patched from the change feed, not reloaded)
+    with page_profiler.section("candidates"):
+        candidates = _get_candidates_synced()
 
     if not candidates:
         st.warning("No candidates found.")
@@ -1932,19 +2009,22 @@ def show_ceo_panel():
 
                     with main_col:
                         # Personal details - comprehensive and well-organized
-                        _render_personal_details_organized(candidate)
+                        with page_profiler.section("card.details"):
+                            _render_personal_details_organized(candidate)
 
                         # CV Section - with proper access control
-                        _render_cv_section_fixed(
-                            candidate_id,
-                            user_id,
-                            candidate.get('has_cv_file', False),
-                            candidate.get('has_resume_link', False)
-                        )
+                        with page_profiler.section("card.cv"):
+                            _render_cv_section_fixed(
+                                candidate_id,
+                                user_id,
+                                candidate.get('has_cv_file', False),
+                                candidate.get('has_resume_link', False)
+                            )
 
                         # Interview History - comprehensive with proper formatting
-                        history = _get_interview_history_comprehensive(candidate_id)
-                        _render_interview_history_comprehensive(history)
+                        with page_profiler.section("card.history"):
+                            history = _get_interview_history_comprehensive(candidate_id)
+                            _render_interview_history_comprehensive(history)
 
                     with action_col:
                         st.markdown("### ⚙️ Actions")
@@ -1963,7 +2043,8 @@ def show_ceo_panel():
 
                         if st.button(toggle_label, key=f"toggle_{candidate_id}"):
                             try:
-                                success = set_candidate_permission(candidate_id, not current_can_edit)
+                                success = set_candidate_permission(candidate_id, not current_can_edit,
+                                                                   actor=user.get("email"))
                                 if success:
                                     st.success("✅ Updated edit permission")
                                     _clear_candidate_cache()
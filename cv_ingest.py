@@ -0,0 +1,443 @@
+# cv_ingest.py
+"""
+Bulk CV ingest: attach a ZIP (or directory) of CVs to existing candidates.
+
+Files are read and matched in a worker pool. Each file name is parsed for an
+email, a phone number and name tokens; candidates are looked up through the
+LOWER(email) / phone / name trigram indexes and scored as described in
+documentation/TIME_BASED_CV_MATCHING.md:
+
+    contact    email (or phone) found in the file name
+    name       share of the candidate's name tokens present in the file name
+    time       how close the file time is to the candidate's registration
+
+High-confidence (>= 0.7), unambiguous matches are attached through
+db_postgres.save_candidate_cv; everything else goes to the cv_ingest_review
+queue with its suggestions, for someone to attach or discard.
+
+    python -m cv_ingest cvs.zip
+    python -m cv_ingest /path/to/cv/folder --dry-run
+"""
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import logging
+import zipfile
+import argparse
+import threading
+from datetime import datetime
+from difflib import SequenceMatcher
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import psycopg2
+from psycopg2.extras import Json, RealDictCursor
+
+from db_postgres import get_conn, normalize_phone, save_candidate_cv
+
+logger = logging.getLogger(__name__)
+
+CV_INGEST_WORKERS = int(os.getenv("CV_INGEST_WORKERS", "4"))
+CV_MAX_BYTES = int(os.getenv("CV_MAX_BYTES", str(10 * 1024 * 1024)))
+CV_EXTENSIONS = (".pdf", ".doc", ".docx", ".odt", ".rtf")
+
+# Confidence bands (TIME_BASED_CV_MATCHING.md)
+HIGH_CONFIDENCE = 0.7
+MEDIUM_CONFIDENCE = 0.5
+LOW_CONFIDENCE = 0.3
+# A high match is only attached automatically if the runner-up is at least this far behind
+AMBIGUITY_MARGIN = 0.15
+# Full time credit within an hour of registration, none after this many hours
+TIME_WINDOW_HOURS = 48.0
+
+_WEIGHTS = {"time": 0.3, "name": 0.4, "email": 0.6, "phone": 0.5}
+_MAX_SUGGESTIONS = 5
+_MAX_NAME_TOKENS = 4
+
+_EMAIL_IN_NAME = re.compile(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}", re.I)
+_PHONE_IN_NAME = re.compile(r"\+?\d[\d\s-]{8,}\d")
+_NOISE_TOKENS = {
+    "cv", "resume", "resum", "curriculum", "vitae", "biodata", "bio", "data", "profile", "updated", "latest",
+    "final", "new", "copy", "my", "of", "the", "and", "doc", "pdf", "brv", "cid",
+}
+
+
+class CvFile(NamedTuple):
+    filename: str
+    file_time: Optional[datetime]
+    data: bytes
+
+
+class Match(NamedTuple):
+    candidate_id: str
+    name: str
+    score: float
+    has_cv: bool
+
+
+class IngestReport(NamedTuple):
+    batch_id: str
+    files: int
+    attached: int
+    queued: int
+    skipped: int
+    seconds: float
+
+
+# -----------------------------
+# Sources: list (filename, file time, ref) up front, read(ref) bytes from worker threads
+# -----------------------------
+def _is_cv_name(name: str) -> bool:
+    base = os.path.basename(name)
+    return bool(base) and not base.startswith((".", "~$")) and base.lower().endswith(CV_EXTENSIONS)
+
+
+class _ZipSource:
+    """ZipFile handles are not safe to share between threads, so each reader thread opens its own."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._handles: List[zipfile.ZipFile] = []
+        self._lock = threading.Lock()
+
+    def entries(self) -> List[Tuple[str, Optional[datetime], str]]:
+        with zipfile.ZipFile(self.path) as zf:
+            infos = zf.infolist()
+        found = []
+        for info in infos:
+            if info.is_dir() or "__MACOSX/" in info.filename or not _is_cv_name(info.filename):
+                continue
+            if info.file_size > CV_MAX_BYTES:  # declared size; also guards against zip bombs
+                logger.warning("Skipping %s: %d bytes exceeds CV_MAX_BYTES", info.filename, info.file_size)
+                continue
+            found.append((os.path.basename(info.filename), datetime(*info.date_time), info.filename))
+        return found
+
+    def read(self, member: str) -> bytes:
+        if not hasattr(self._local, "zf"):
+            self._local.zf = zipfile.ZipFile(self.path)
+            with self._lock:
+                self._handles.append(self._local.zf)
+        return self._local.zf.read(member)
+
+    def close(self):
+        for zf in self._handles:
+            zf.close()
+
+
+class _DirSource:
+    def __init__(self, path: str):
+        self.path = path
+
+    def entries(self) -> List[Tuple[str, Optional[datetime], str]]:
+        found = []
+        for root, _dirs, files in os.walk(self.path):
+            for name in sorted(files):
+                full = os.path.join(root, name)
+                if _is_cv_name(name) and os.path.getsize(full) <= CV_MAX_BYTES:
+                    found.append((name, datetime.fromtimestamp(os.path.getmtime(full)), full))
+        return found
+
+    def read(self, full: str) -> bytes:
+        with open(full, "rb") as f:
+            return f.read()
+
+    def close(self):
+        pass
+
+
+def _open_source(path: str):
+    if os.path.isdir(path):
+        return _DirSource(path)
+    if zipfile.is_zipfile(path):
+        return _ZipSource(path)
+    raise ValueError(f"Not a ZIP file or directory: {path}")
+
+
+# -----------------------------
+# Matching
+# -----------------------------
+def _tokens(text: str) -> List[str]:
+    return [t for t in re.split(r"[^a-z]+", text.lower()) if len(t) >= 2]
+
+
+def parse_filename(filename: str) -> Dict[str, Any]:
+    """Email, phone and name tokens guessed from a CV file name ('Asha_Shah_9876543210_CV.pdf')."""
+    stem = os.path.splitext(filename)[0]
+    emails = [e.lower() for e in _EMAIL_IN_NAME.findall(stem)]
+    rest = _EMAIL_IN_NAME.sub(" ", stem)
+    phones = [p for p in (normalize_phone(m) for m in _PHONE_IN_NAME.findall(rest)) if len(p) == 10]
+    tokens = [t for t in _tokens(rest) if t not in _NOISE_TOKENS]
+    return {"emails": emails, "phones": phones, "tokens": tokens}
+
+
+def _lookup(cur, parsed: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Candidates sharing the file's email/phone or one of its name tokens (each clause index-backed).
+    Exact contact matches sort first, so a common name token cannot push them past the LIMIT.
+    """
+    contact, contact_params = [], []
+    if parsed["emails"]:
+        contact.append("LOWER(email) = ANY(%s)")
+        contact_params.append(parsed["emails"])
+    if parsed["phones"]:
+        contact.append("phone = ANY(%s)")
+        contact_params.append(parsed["phones"])
+    name_tokens = sorted({t for t in parsed["tokens"] if len(t) >= 3}, key=len, reverse=True)[:_MAX_NAME_TOKENS]
+    name_params = [f"%{token}%" for token in name_tokens]
+    clauses = contact + ["LOWER(name) LIKE %s"] * len(name_tokens)
+    if not clauses:
+        return []
+    order = [f"({' OR '.join(contact)}) DESC"] if contact else []
+    if name_tokens:
+        order.append(" + ".join(["(LOWER(name) LIKE %s)::int"] * len(name_tokens)) + " DESC")
+    cur.execute(f"""
+                SELECT candidate_id, name, email, phone, created_at, cv_file IS NOT NULL AS has_cv
+                FROM candidates
+                WHERE {" OR ".join(clauses)}
+                ORDER BY {", ".join(order + ["created_at DESC"])}
+                LIMIT 50
+                """, tuple(contact_params + name_params + contact_params + name_params))
+    return cur.fetchall()
+
+
+def _name_score(candidate_name: str, tokens: List[str]) -> float:
+    wanted = _tokens(candidate_name or "")
+    if not wanted or not tokens:
+        return 0.0
+    found = sum(1 for w in wanted
+                if any(w == t or SequenceMatcher(None, w, t).ratio() >= 0.85 for t in tokens))
+    return found / len(wanted)
+
+
+def _time_score(file_time: Optional[datetime], created_at: Optional[datetime]) -> float:
+    if file_time is None or created_at is None:
+        return 0.0
+    if created_at.tzinfo is not None:
+        created_at = created_at.replace(tzinfo=None)
+    hours = abs((file_time - created_at).total_seconds()) / 3600
+    if hours <= 1:
+        return 1.0
+    return max(0.0, 1 - hours / TIME_WINDOW_HOURS)
+
+
+def score_match(parsed: Dict[str, Any], file_time: Optional[datetime], candidate: Dict[str, Any]) -> float:
+    score = _WEIGHTS["time"] * _time_score(file_time, candidate.get("created_at"))
+    score += _WEIGHTS["name"] * _name_score(candidate.get("name"), parsed["tokens"])
+    if (candidate.get("email") or "").lower() in parsed["emails"]:
+        score += _WEIGHTS["email"]
+    elif candidate.get("phone") and candidate["phone"] in parsed["phones"]:
+        score += _WEIGHTS["phone"]
+    return round(min(1.0, score), 3)
+
+
+def confidence_band(score: float) -> str:
+    if score >= HIGH_CONFIDENCE:
+        return "high"
+    if score >= MEDIUM_CONFIDENCE:
+        return "medium"
+    if score >= LOW_CONFIDENCE:
+        return "low"
+    return "none"
+
+
+class _Matcher:
+    """One DB connection per worker thread, closed together at the end."""
+
+    def __init__(self, source):
+        self._source = source
+        self._local = threading.local()
+        self._conns = []
+        self._lock = threading.Lock()
+
+    def _cursor(self):
+        if not hasattr(self._local, "conn"):
+            conn = get_conn()
+            conn.autocommit = True
+            self._local.conn = conn
+            with self._lock:
+                self._conns.append(conn)
+        return self._local.conn.cursor(cursor_factory=RealDictCursor)
+
+    def match(self, entry) -> Tuple[CvFile, List[Match]]:
+        filename, file_time, ref = entry
+        cv = CvFile(filename, file_time, self._source.read(ref))
+        parsed = parse_filename(filename)
+        with self._cursor() as cur:
+            candidates = _lookup(cur, parsed)
+        matches = [Match(c["candidate_id"], c["name"], score_match(parsed, file_time, c), c["has_cv"])
+                   for c in candidates]
+        matches = sorted((m for m in matches if m.score >= LOW_CONFIDENCE), key=lambda m: m.score, reverse=True)
+        return cv, matches[:_MAX_SUGGESTIONS]
+
+    def close(self):
+        for conn in self._conns:
+            conn.close()
+
+
+def _decide(matches: List[Match], taken: set) -> Tuple[Optional[Match], Optional[str]]:
+    """(match to attach, None) or (None, review reason)."""
+    if not matches:
+        return None, "no_match"
+    best = matches[0]
+    if best.score < HIGH_CONFIDENCE:
+        return None, f"{confidence_band(best.score)}_confidence"
+    if len(matches) > 1 and best.score - matches[1].score < AMBIGUITY_MARGIN:
+        return None, "ambiguous"
+    if best.has_cv:
+        return None, "has_cv"
+    if best.candidate_id in taken:
+        return None, "duplicate_in_batch"
+    return best, None
+
+
+# -----------------------------
+# Ingest
+# -----------------------------
+def _queue_review(cur, batch_id: str, cv: CvFile, reason: str, matches: List[Match]):
+    cur.execute("""
+                INSERT INTO cv_ingest_review (batch_id, filename, file_bytes, file_time, reason, best_score,
+                                              suggestions)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, (batch_id, cv.filename[:255], psycopg2.Binary(cv.data), cv.file_time, reason,
+                      matches[0].score if matches else None,
+                      Json([{"candidate_id": m.candidate_id, "name": m.name, "score": m.score} for m in matches])))
+
+
+def ingest(path: str, actor: Optional[str] = None, workers: int = CV_INGEST_WORKERS, dry_run: bool = False,
+           progress: Optional[Callable[[int], None]] = None) -> IngestReport:
+    """
+    Match every CV under `path` (ZIP or directory), attach the confident ones and queue the rest.
+    With dry_run nothing is written; the report counts what would have happened.
+    """
+    batch_id = f"{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:6]}"
+    started = time.perf_counter()
+    files = attached = queued = skipped = 0
+    taken: set = set()
+    source = _open_source(path)
+    entries = source.entries()
+    matcher = _Matcher(source)
+    conn = None if dry_run else get_conn()
+    chunk = max(1, workers) * 4  # bounds how many files sit in memory at once
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for i in range(0, len(entries), chunk):
+                # map() keeps file order, so two files wanting one candidate resolve deterministically
+                for cv, matches in pool.map(matcher.match, entries[i:i + chunk]):
+                    files += 1
+                    if progress:
+                        progress(files)
+                    if not cv.data:
+                        skipped += 1
+                        continue
+                    match, reason = _decide(matches, taken)
+                    if match is not None:
+                        taken.add(match.candidate_id)
+                        if dry_run or save_candidate_cv(match.candidate_id, cv.data, cv.filename, actor=actor):
+                            attached += 1
+                            logger.info("Attached %s to %s (%.2f)", cv.filename, match.candidate_id, match.score)
+                            continue
+                        reason = "attach_failed"
+                    queued += 1
+                    if not dry_run:
+                        with conn, conn.cursor() as cur:
+                            _queue_review(cur, batch_id, cv, reason, matches)
+    finally:
+        matcher.close()
+        source.close()
+        if conn is not None:
+            conn.close()
+
+    seconds = time.perf_counter() - started
+    logger.info("CV ingest %s: %d files, %d attached, %d queued for review, %d skipped in %.1fs",
+                batch_id, files, attached, queued, skipped, seconds)
+    return IngestReport(batch_id, files, attached, queued, skipped, seconds)
+
+
+# -----------------------------
+# Review queue
+# -----------------------------
+def get_pending_reviews(limit: int = 50) -> List[Dict[str, Any]]:
+    """Oldest pending review items first, without the file bytes."""
+    conn = get_conn()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("""
+                        SELECT id, batch_id, filename, file_time, reason, best_score, suggestions,
+                               octet_length(file_bytes) AS size, created_at
+                        FROM cv_ingest_review
+                        WHERE status = 'pending'
+                        ORDER BY created_at
+                        LIMIT %s
+                        """, (limit,))
+            return cur.fetchall()
+    finally:
+        conn.close()
+
+
+def get_review_file(review_id: int) -> Optional[Tuple[bytes, str]]:
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT file_bytes, filename FROM cv_ingest_review WHERE id = %s", (review_id,))
+            row = cur.fetchone()
+            return (bytes(row[0]), row[1]) if row else None
+    finally:
+        conn.close()
+
+
+def resolve_review(review_id: int, candidate_id: Optional[str], actor: Optional[str] = None) -> Tuple[bool, str]:
+    """
+    Attach the file to candidate_id, or discard it when candidate_id is None.
+    The row is claimed first so two reviewers cannot both act on it.
+    """
+    status = "attached" if candidate_id else "discarded"
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                        UPDATE cv_ingest_review
+                        SET status = %s, attached_to = %s, resolved_by = %s, resolved_at = CURRENT_TIMESTAMP
+                        WHERE id = %s AND status = 'pending'
+                        RETURNING file_bytes, filename
+                        """, (status, candidate_id, actor, review_id))
+            row = cur.fetchone()
+        if row is None:
+            return False, "already_resolved"
+        if candidate_id is None:
+            return True, "discarded"
+        if save_candidate_cv(candidate_id, bytes(row[0]), row[1], actor=actor):
+            return True, "attached"
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                        UPDATE cv_ingest_review
+                        SET status = 'pending', attached_to = NULL, resolved_by = NULL, resolved_at = NULL
+                        WHERE id = %s
+                        """, (review_id,))
+        return False, "candidate_not_found"
+    except psycopg2.IntegrityError:  # attached_to references an unknown candidate
+        return False, "candidate_not_found"
+    finally:
+        conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="ZIP file or directory of CVs")
+    parser.add_argument("--workers", type=int, default=CV_INGEST_WORKERS)
+    parser.add_argument("--actor", default="cv_ingest", help="recorded on cv_uploaded events")
+    parser.add_argument("--dry-run", action="store_true", help="match and report only; write nothing")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    report = ingest(args.path, actor=args.actor, workers=args.workers, dry_run=args.dry_run)
+    print(json.dumps(report._asdict(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
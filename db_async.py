@@ -0,0 +1,302 @@
+# db_async.py
+"""
+Async read layer for concurrent page data fetches.
+
+Uses a psycopg 3 AsyncConnectionPool on a single background event loop per
+process. Streamlit scripts are synchronous, so they call gather() which
+submits coroutines to that loop and blocks until all of them finish:
+
+    stats, candidates, users = db_async.gather(
+        db_async.get_candidate_statistics(),
+        db_async.get_candidates_page(limit=1000),
+        db_async.get_all_users_with_permissions(),
+    )
+
+If psycopg 3 is not installed, every helper falls back to running the
+matching db_postgres function in a worker thread, so gather() still
+overlaps the round trips.
+"""
+import os
+import asyncio
+import logging
+import time
+import threading
+from typing import Any, Awaitable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+import db_instrumentation
+import db_postgres
+
+try:
+    from psycopg.rows import dict_row
+    from psycopg_pool import AsyncConnectionPool
+except ImportError:  # optional dependency
+    AsyncConnectionPool = None
+    dict_row = None
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+ASYNC_POOL_MIN = int(os.getenv("DB_ASYNC_POOL_MIN", "1"))
+ASYNC_POOL_MAX = int(os.getenv("DB_ASYNC_POOL_MAX", "8"))
+GATHER_TIMEOUT = float(os.getenv("DB_ASYNC_TIMEOUT", "30"))
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_pool = None
+_init_lock = threading.Lock()
+
+
+# -----------------------------
+# Event loop + pool
+# -----------------------------
+def _ensure_loop() -> asyncio.AbstractEventLoop:
+    """Start the background event loop thread once per process."""
+    global _loop
+    if _loop is None:
+        with _init_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="db-async-loop", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+async def _get_pool():
+    global _pool
+    if _pool is None:
+        database_url = os.getenv("DATABASE_URL")
+        if not database_url:
+            raise RuntimeError("DATABASE_URL environment variable not set")
+        pool = AsyncConnectionPool(
+            database_url,
+            min_size=ASYNC_POOL_MIN,
+            max_size=ASYNC_POOL_MAX,
+            kwargs={"sslmode": os.getenv("PGSSLMODE", "require"), "row_factory": dict_row},
+            open=False,
+        )
+        await pool.open()
+        _pool = pool
+    return _pool
+
+
+def pool_stats() -> Dict[str, int]:
+    """Async pool counters for the metrics exporter; empty until the pool is opened."""
+    if _pool is None:
+        return {}
+    s = _pool.get_stats()
+    size, available = s.get("pool_size", 0), s.get("pool_available", 0)
+    return {"size": size, "in_use": size - available, "max": ASYNC_POOL_MAX,
+            "waiting": s.get("requests_waiting", 0)}
+
+
+def is_native() -> bool:
+    """True when queries go through psycopg 3's async driver rather than the thread fallback."""
+    return AsyncConnectionPool is not None
+
+
+def gather(*aws: Awaitable, timeout: Optional[float] = None) -> List[Any]:
+    """Run awaitables concurrently on the background loop and return their results in order.
+    Safe to call from Streamlit script threads."""
+    loop = _ensure_loop()
+
+    async def _run():
+        return await asyncio.gather(*aws)
+
+    future = asyncio.run_coroutine_threadsafe(_run(), loop)
+    return future.result(timeout or GATHER_TIMEOUT)
+
+
+async def fetch_all(sql: str, params: Any = None) -> List[Dict[str, Any]]:
+    pool = await _get_pool()
+    async with pool.connection() as conn:
+        started = time.perf_counter()
+        cur = await conn.execute(sql, params)
+        rows = await cur.fetchall()
+        db_instrumentation.record(sql, time.perf_counter() - started, len(rows),
+                                  db_instrumentation.row_bytes(rows), caller="db_async")
+        return rows
+
+
+async def fetch_one(sql: str, params: Any = None) -> Optional[Dict[str, Any]]:
+    rows = await fetch_all(sql, params)
+    return rows[0] if rows else None
+
+
+async def _in_thread(fn, *args):
+    return await asyncio.to_thread(fn, *args)
+
+
+# -----------------------------
+# Users
+# -----------------------------
+async def get_user_by_id(user_id: int) -> Optional[Dict[str, Any]]:
+    if not is_native():
+        return await _in_thread(db_postgres.get_user_by_id, user_id)
+    return await fetch_one("SELECT * FROM users WHERE id=%s", (user_id,))
+
+
+async def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
+    if not is_native():
+        return await _in_thread(db_postgres.get_user_by_email, email)
+    return await fetch_one("SELECT * FROM users WHERE email=%s", (email,))
+
+
+async def get_all_users() -> List[Dict[str, Any]]:
+    if not is_native():
+        return await _in_thread(db_postgres.get_all_users)
+    return await fetch_all("SELECT * FROM users ORDER BY id")
+
+
+async def get_all_users_with_permissions() -> List[Dict[str, Any]]:
+    if not is_native():
+        return await _in_thread(db_postgres.get_all_users_with_permissions)
+    return await fetch_all("""
+                           SELECT id,
+                                  email,
+                                  role,
+                                  can_view_cvs,
+                                  can_delete_records,
+                                  can_grant_delete,
+                                  created_at,
+                                  updated_at,
+                                  force_password_reset
+                           FROM users
+                           ORDER BY id
+                           """)
+
+
+async def get_user_permissions(user_id: int) -> Dict[str, Any]:
+    if not is_native():
+        return await _in_thread(db_postgres.get_user_permissions, user_id)
+    return await fetch_one("""
+                           SELECT role, can_view_cvs, can_delete_records, can_grant_delete
+                           FROM users
+                           WHERE id = %s
+                           """, (user_id,)) or {}
+
+
+# -----------------------------
+# Candidates
+# -----------------------------
+async def get_candidate_by_id(candidate_id: str) -> Optional[Dict[str, Any]]:
+    if not is_native():
+        return await _in_thread(db_postgres.get_candidate_by_id, candidate_id)
+    return await fetch_one("SELECT * FROM candidates WHERE candidate_id=%s", (candidate_id,))
+
+
+async def get_all_candidates() -> List[Dict[str, Any]]:
+    if not is_native():
+        return await _in_thread(db_postgres.get_all_candidates)
+    return await fetch_all("SELECT * FROM candidates ORDER BY created_at DESC")
+
+
+# Dashboard list columns (no CV bytes); also what ceo patches from db_postgres.get_candidate_changes
+CANDIDATE_LIST_COLUMNS = """
+                            candidate_id,
+                            name,
+                            email,
+                            phone,
+                            created_at,
+                            updated_at,
+                            can_edit,
+                            cv_file IS NOT NULL AS has_cv_file,
+                            resume_link IS NOT NULL AND resume_link != '' AS has_resume_link,
+                            form_data
+"""
+
+CANDIDATE_PAGE_SQL = f"""
+                     SELECT {CANDIDATE_LIST_COLUMNS}
+                     FROM candidates
+                     ORDER BY created_at DESC
+                     LIMIT %s OFFSET %s
+                     """
+
+
+async def get_candidates_page(limit: int = 1000, offset: int = 0) -> List[Dict[str, Any]]:
+    """List-view columns only (no CV bytes), newest first."""
+    if not is_native():
+        return await _in_thread(fetch_all_sync, CANDIDATE_PAGE_SQL, (limit, offset))
+    return await fetch_all(CANDIDATE_PAGE_SQL, (limit, offset))
+
+
+async def search_candidates_by_name_or_email(query: str) -> List[Dict[str, Any]]:
+    if not is_native():
+        return await _in_thread(db_postgres.search_candidates_by_name_or_email, query)
+    if query.strip():
+        like = f"%{query.lower()}%"
+        return await fetch_all("""
+                               SELECT *
+                               FROM candidates
+                               WHERE LOWER(name) LIKE %s
+                                  OR LOWER(email) LIKE %s
+                               ORDER BY updated_at DESC LIMIT 50
+                               """, (like, like))
+    return await fetch_all("SELECT * FROM candidates ORDER BY updated_at DESC LIMIT 50")
+
+
+# -----------------------------
+# Assessments / interviews
+# -----------------------------
+async def get_receptionist_assessments(candidate_id: str) -> List[Dict[str, Any]]:
+    if not is_native():
+        return await _in_thread(db_postgres.get_receptionist_assessments, candidate_id)
+    return await fetch_all("""
+                           SELECT *
+                           FROM receptionist_assessments
+                           WHERE candidate_id = %s
+                           ORDER BY created_at DESC
+                           """, (candidate_id,))
+
+
+async def get_interviews_for_candidate(candidate_id: str) -> List[Dict[str, Any]]:
+    if not is_native():
+        return await _in_thread(db_postgres.get_interviews_for_candidate, candidate_id)
+    return await fetch_all("""
+                           SELECT *
+                           FROM interviews
+                           WHERE candidate_id = %s
+                           ORDER BY created_at DESC
+                           """, (candidate_id,))
+
+
+async def get_all_interviews() -> List[Dict[str, Any]]:
+    if not is_native():
+        return await _in_thread(db_postgres.get_all_interviews)
+    return await fetch_all("""
+                           SELECT i.*, c.name AS candidate_name, c.email AS candidate_email
+                           FROM interviews i
+                                    JOIN candidates c ON c.candidate_id = i.candidate_id
+                           ORDER BY i.scheduled_at DESC NULLS LAST, i.created_at DESC
+                           """)
+
+
+# -----------------------------
+# Statistics
+# -----------------------------
+async def get_candidate_statistics() -> Dict[str, Any]:
+    """Same result as db_postgres.get_candidate_statistics, with the statements run concurrently."""
+    if not is_native():
+        return await _in_thread(db_postgres.get_candidate_statistics)
+    queries = db_postgres.CANDIDATE_STAT_QUERIES
+    results = await asyncio.gather(*(fetch_all(sql) for _, sql, _ in queries))
+    stats = {key: reduce_rows(rows) for (key, _, reduce_rows), rows in zip(queries, results)}
+    return db_postgres.finish_candidate_statistics(stats)
+
+
+async def get_total_cv_storage_usage() -> int:
+    if not is_native():
+        return await _in_thread(db_postgres.get_total_cv_storage_usage)
+    row = await fetch_one("SELECT COALESCE(SUM(OCTET_LENGTH(cv_file)),0) AS total FROM candidates")
+    return (row or {}).get("total") or 0
+
+
+def fetch_all_sync(sql: str, params: Any = None) -> List[Dict[str, Any]]:
+    """Blocking fetch over a psycopg2 connection, for the thread fallback and callers outside the loop."""
+    conn = db_postgres.get_conn()
+    try:
+        with conn, conn.cursor(cursor_factory=db_postgres.RealDictCursor) as cur:
+            cur.execute(sql, params)
+            return cur.fetchall()
+    finally:
+        conn.close()
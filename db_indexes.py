@@ -0,0 +1,252 @@
+# db_indexes.py
+"""
+Secondary indexes and the queries that need them.
+
+Migrations create indexes with their own literal DDL (0003_indexes and
+the ones after it); a new index goes into a new migration and is mirrored
+here so --concurrently and --verify know about it. On a large live
+database, build them first without blocking writes:
+
+    python -m db_indexes --concurrently
+
+and prove the hot queries actually use them:
+
+    python -m db_indexes --verify            # planner's real choice (run at scale,
+                                             # e.g. after python -m benchmarks.generator)
+    python -m db_indexes --verify --force    # enable_seqscan=off, for small dev DBs
+
+--verify exits non-zero if any hot query plans without its expected index.
+"""
+import sys
+import json
+import logging
+import argparse
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (index name, table, definition after "ON <table>", required extension or None)
+INDEXES: List[Tuple[str, str, str, Optional[str]]] = [
+    # candidate lists: dashboard page / get_all_candidates, and the search default list
+    ("idx_candidates_created_at", "candidates", "(created_at DESC)", None),
+    ("idx_candidates_updated_at", "candidates", "(updated_at DESC)", None),
+    ("idx_candidates_name", "candidates", "(name)", None),
+    ("idx_candidates_email", "candidates", "(email)", None),
+    # dedup / matching on normalized contact details (candidate_import, cv_ingest)
+    ("idx_candidates_email_lower", "candidates", "(LOWER(email))", None),
+    ("idx_candidates_phone", "candidates", "(phone)", None),
+    # receptionist queue / "not yet assessed" counts (small: shrinks as candidates get assessed)
+    ("idx_candidates_unassessed", "candidates", "(created_at DESC) WHERE assessment_count = 0", None),
+    # per-stage work queues (get_stage_queue) and stage counts
+    ("idx_candidates_stage_updated", "candidates", "(stage, updated_at)", None),
+    # substring search: LOWER(name|email) LIKE '%q%'
+    ("idx_candidates_name_trgm", "candidates", "USING gin (LOWER(name) gin_trgm_ops)", "pg_trgm"),
+    ("idx_candidates_email_trgm", "candidates", "USING gin (LOWER(email) gin_trgm_ops)", "pg_trgm"),
+    # per-candidate readers ordered newest first
+    ("idx_assessments_candidate_created", "receptionist_assessments", "(candidate_id, created_at DESC)", None),
+    ("idx_interviews_candidate_created", "interviews", "(candidate_id, created_at DESC)", None),
+    # per-interviewer stats and GROUP BY interviewer: index-only scans, result rides along
+    ("idx_interviews_interviewer_result", "interviews", "(interviewer, result)", None),
+    ("idx_interviews_interviewer_user", "interviews", "(interviewer_user_id, result)", None),
+    # result counters compare LOWER(result)
+    ("idx_interviews_result_lower", "interviews", "(LOWER(result))", None),
+    # "this week" uses the scheduled time when there is one
+    ("idx_interviews_event_time", "interviews", "(COALESCE(scheduled_at, created_at))", None),
+    # structured notes: containment filters (notes_json @> '{"profile_fit": "Good"}')
+    ("idx_interviews_notes_json", "interviews", "USING gin (notes_json jsonb_path_ops)", None),
+    # change feed (get_candidate_changes) pages on the writer's transaction id
+    ("idx_candidates_row_xid", "candidates", "(row_xid)", None),
+    ("idx_candidate_tombstones_row_xid", "candidate_tombstones", "(row_xid)", None),
+    # a desk's own live claims
+    ("idx_candidate_claims_user", "candidate_claims", "(user_id, queue, expires_at)", None),
+    # CV ingest review queue: only pending rows are ever listed
+    ("idx_cv_ingest_review_pending", "cv_ingest_review", "(created_at) WHERE status = 'pending'", None),
+    # purge of abandoned application drafts
+    ("idx_applications_draft_updated", "applications_draft", "(updated_at)", None),
+    ("idx_candidate_events_candidate_created", "candidate_events", "(candidate_id, created_at DESC, id DESC)", None),
+    ("idx_page_metrics_page_window", "page_metrics", "(page, window_start DESC)", None),
+]
+
+# Superseded by a composite index above (same leading column).
+RETIRED_INDEXES = [
+    "idx_interviews_candidate_id",
+]
+
+
+def _ddl(name: str, table: str, definition: str, concurrently: bool = False) -> str:
+    return (f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name} "
+            f"ON {table} {definition}")
+
+
+def _extension_available(cur, extension: str) -> bool:
+    """Create the extension if we may; a failure (no privilege / not installed) only skips its indexes."""
+    cur.execute("SELECT 1 FROM pg_extension WHERE extname = %s", (extension,))
+    if cur.fetchone():
+        return True
+    cur.execute("SAVEPOINT ensure_extension")
+    try:
+        cur.execute(f"CREATE EXTENSION IF NOT EXISTS {extension}")
+        cur.execute("RELEASE SAVEPOINT ensure_extension")
+        return True
+    except Exception as e:
+        cur.execute("ROLLBACK TO SAVEPOINT ensure_extension")
+        logger.warning("Extension %s unavailable, skipping its indexes: %s", extension, e)
+        return False
+
+
+def _wanted(cur) -> Iterable[Tuple[str, str, str]]:
+    extensions: Dict[str, bool] = {}
+    for name, table, definition, extension in INDEXES:
+        if extension is not None:
+            if extension not in extensions:
+                extensions[extension] = _extension_available(cur, extension)
+            if not extensions[extension]:
+                continue
+        yield name, table, definition
+
+
+def build_concurrently(conn):
+    """Build missing INDEXES with CREATE INDEX CONCURRENTLY (needs autocommit; one statement each)."""
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        for name, table, definition in list(_wanted(cur)):
+            cur.execute("SELECT 1 FROM pg_indexes WHERE indexname = %s", (name,))
+            if cur.fetchone():
+                continue
+            logger.info("Building %s on %s", name, table)
+            cur.execute(_ddl(name, table, definition, concurrently=True))
+        for name in RETIRED_INDEXES:
+            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+# -----------------------------
+# EXPLAIN verification
+# -----------------------------
+def _hot_queries() -> List[Tuple[str, str, Sequence[Any], Sequence[str]]]:
+    """(label, SQL with %s params, params, acceptable index names) for the app's hot read paths."""
+    import db_postgres
+    import db_async
+    import query_registry
+
+    stats = {key: sql for key, sql, _ in db_postgres.CANDIDATE_STAT_QUERIES}
+
+    def registry(name):
+        # $1..$n -> %s; the registry statements take their params in order
+        types, sql = query_registry.HOT_QUERIES[name]
+        for i in range(len(types), 0, -1):
+            sql = sql.replace(f"${i}", "%s")
+        return sql
+
+    cid = "CAND-0000"
+    return [
+        ("candidate page (dashboard)", db_async.CANDIDATE_PAGE_SQL, (50, 0), ["idx_candidates_created_at"]),
+        ("candidates_today", stats["candidates_today"], (), ["idx_candidates_created_at"]),
+        ("candidates_this_week", stats["candidates_this_week"], (), ["idx_candidates_created_at"]),
+        ("candidates_this_month", stats["candidates_this_month"], (), ["idx_candidates_created_at"]),
+        ("interviews_this_week", stats["interviews_this_week"], (), ["idx_interviews_event_time"]),
+        ("interviews_passed", stats["interviews_passed"], (), ["idx_interviews_result_lower"]),
+        ("per_interviewer", stats["per_interviewer"], (), ["idx_interviews_interviewer_result"]),
+        ("interviewer performance", db_postgres.INTERVIEWER_STATS_SQL.format(where="i.interviewer_user_id = %s"),
+         (1,), ["idx_interviews_interviewer_user"]),
+        ("assessments_by_candidate", registry("assessments_by_candidate"), (cid,),
+         ["idx_assessments_candidate_created"]),
+        ("interviews_by_candidate", registry("interviews_by_candidate"), (cid,),
+         ["idx_interviews_candidate_created"]),
+        ("interviews by note fields", """
+            SELECT id FROM interviews WHERE notes_json @> %s::jsonb
+        """, ('{"profile_fit": "Good"}',), ["idx_interviews_notes_json"]),
+        ("candidate history page", """
+            SELECT id, event_type, actor, data, created_at FROM candidate_events
+            WHERE candidate_id = %s ORDER BY created_at DESC, id DESC LIMIT 50
+        """, (cid,), ["idx_candidate_events_candidate_created"]),
+        ("unassessed candidates", """
+            SELECT candidate_id FROM candidates WHERE assessment_count = 0 ORDER BY created_at DESC LIMIT 50
+        """, (), ["idx_candidates_unassessed"]),
+        ("stage queue", db_postgres.STAGE_QUEUE_SQL, (["applied"], 50, 0), ["idx_candidates_stage_updated"]),
+        ("desk claims", """
+            SELECT candidate_id FROM candidate_claims
+            WHERE user_id = %s AND queue = %s AND expires_at > CURRENT_TIMESTAMP
+        """, (1, "receptionist"), ["idx_candidate_claims_user"]),
+        ("candidate changes", f"""
+            SELECT {db_postgres.QUEUE_COLUMNS}, row_version FROM candidates WHERE row_xid >= %s::text::xid8
+        """, (2 ** 40,), ["idx_candidates_row_xid"]),
+        ("duplicate check", """
+            SELECT candidate_id FROM candidates WHERE LOWER(email) = %s OR phone = %s
+        """, ("a.shah@bench.local", "9876543210"), ["idx_candidates_email_lower", "idx_candidates_phone"]),
+        ("cv review queue", """
+            SELECT id FROM cv_ingest_review WHERE status = 'pending' ORDER BY created_at LIMIT 50
+        """, (), ["idx_cv_ingest_review_pending"]),
+        ("stale drafts", """
+            SELECT token FROM applications_draft WHERE updated_at < CURRENT_TIMESTAMP - make_interval(days => %s)
+        """, (7,), ["idx_applications_draft_updated"]),
+        ("search default list", """
+            SELECT * FROM candidates ORDER BY updated_at DESC LIMIT 50
+        """, (), ["idx_candidates_updated_at"]),
+        ("search by name/email", """
+            SELECT * FROM candidates WHERE LOWER(name) LIKE %s OR LOWER(email) LIKE %s
+            ORDER BY updated_at DESC LIMIT 50
+        """, ("%shah%", "%shah%"),
+         ["idx_candidates_name_trgm", "idx_candidates_email_trgm", "idx_candidates_updated_at"]),
+    ]
+
+
+def _plan_indexes(node: Dict[str, Any]) -> List[str]:
+    found = [node["Index Name"]] if "Index Name" in node else []
+    for child in node.get("Plans", []):
+        found.extend(_plan_indexes(child))
+    return found
+
+
+def verify(conn, force: bool = False) -> List[Dict[str, Any]]:
+    """EXPLAIN every hot query; each result has label, ok, expected, used and the top plan node."""
+    results = []
+    with conn.cursor() as cur:
+        if force:
+            cur.execute("SET enable_seqscan = off")
+        cur.execute("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()")
+        present = {r[0] for r in cur.fetchall()}
+        for label, sql, params, expected in _hot_queries():
+            wanted = [name for name in expected if name in present]
+            if not wanted:
+                results.append({"label": label, "ok": None, "expected": expected, "used": [],
+                                "plan": "index not present (optional extension missing?)"})
+                continue
+            cur.execute("EXPLAIN (FORMAT JSON) " + sql, tuple(params))
+            raw = cur.fetchone()[0]
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+            used = _plan_indexes(plan)
+            results.append({"label": label, "ok": any(name in used for name in wanted), "expected": wanted,
+                            "used": used, "plan": plan.get("Node Type")})
+    conn.rollback()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrently", action="store_true", help="build missing indexes without locking writes")
+    parser.add_argument("--verify", action="store_true", help="EXPLAIN the hot queries and check index use")
+    parser.add_argument("--force", action="store_true", help="with --verify: disable seq scans first")
+    args = parser.parse_args(argv)
+
+    from db_postgres import get_conn
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    conn = get_conn()
+    try:
+        if args.concurrently:
+            build_concurrently(conn)
+            conn.autocommit = False
+        if not args.verify:
+            return 0
+        failed = 0
+        for r in verify(conn, force=args.force):
+            status = {True: "OK  ", False: "MISS", None: "SKIP"}[r["ok"]]
+            failed += r["ok"] is False
+            print(f"{status} {r['label']:<30} expected {'/'.join(r['expected'])}; "
+                  f"used {', '.join(r['used']) or 'none'} ({r['plan']})")
+        return 1 if failed else 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+# db_instrumentation.py
+"""
+Query instrumentation for psycopg2.
+
+Connections created with connection_factory=InstrumentedConnection hand out
+cursors that time every execute() and record, per statement fingerprint:
+duration, rows, approximate bytes fetched and the db-layer function that ran
+it. Statements slower than SLOW_QUERY_MS are written as JSON lines to the
+"db.slow" logger (logs/slow_queries.log via logging_setup).
+
+Readers:
+    get_query_stats()   per-fingerprint counters + latency histogram
+    add_listener(fn)    fn(record_dict) is called for every finished statement
+"""
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import psycopg2.extensions
+from psycopg2.extras import RealDictCursor
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger("db.slow")
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Upper bounds in milliseconds; the last bucket is everything slower
+HISTOGRAM_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_SKIP_MODULES = ("db_instrumentation", "psycopg2", "query_registry")
+
+
+# -----------------------------
+# Fingerprints
+# -----------------------------
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+_fingerprint_cache: Dict[str, tuple] = {}
+
+
+def fingerprint(sql: str) -> tuple:
+    """(short id, normalized text) for a statement with literals and parameters stripped."""
+    cached = _fingerprint_cache.get(sql)
+    if cached:
+        return cached
+    text = _STRING_RE.sub("?", sql)
+    text = _NUMBER_RE.sub("?", text.replace("%s", "?"))
+    text = _IN_LIST_RE.sub("(?)", text)
+    text = _SPACE_RE.sub(" ", text).strip().lower()
+    result = (hashlib.md5(text.encode("utf-8")).hexdigest()[:12], text)
+    if len(_fingerprint_cache) < 5000:
+        _fingerprint_cache[sql] = result
+    return result
+
+
+def _caller() -> str:
+    """module.function of the nearest frame outside the db plumbing."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not module.startswith(_SKIP_MODULES):
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+def row_bytes(rows) -> int:
+    total = 0
+    for row in rows:
+        values = row.values() if isinstance(row, dict) else row
+        for value in values:
+            if isinstance(value, (bytes, bytearray, memoryview, str)):
+                total += len(value)
+            elif value is not None:
+                total += 8
+    return total
+
+
+# -----------------------------
+# Aggregation
+# -----------------------------
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, Any]] = {}
+_listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+
+def add_listener(fn: Callable[[Dict[str, Any]], None]):
+    """Register fn(record) to be called for every finished statement (exporters, page profiler)."""
+    if fn not in _listeners:
+        _listeners.append(fn)
+
+
+def record(sql: str, seconds: float, rows: int = -1, nbytes: int = 0, caller: Optional[str] = None):
+    """Record one finished statement. Also used directly by db_async for psycopg 3 queries."""
+    fp, text = fingerprint(sql if isinstance(sql, str) else sql.decode("utf-8", "replace"))
+    caller = caller or _caller()
+    ms = seconds * 1000
+    with _stats_lock:
+        s = _stats.get(fp)
+        if s is None:
+            s = _stats[fp] = {"statement": text[:500], "calls": 0, "total_ms": 0.0, "max_ms": 0.0,
+                              "rows": 0, "bytes": 0, "slow": 0, "callers": {},
+                              "buckets": [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)}
+        s["calls"] += 1
+        s["total_ms"] += ms
+        s["max_ms"] = max(s["max_ms"], ms)
+        s["rows"] += max(rows, 0)
+        s["bytes"] += nbytes
+        s["callers"][caller] = s["callers"].get(caller, 0) + 1
+        idx = next((i for i, b in enumerate(HISTOGRAM_BUCKETS_MS) if ms <= b), len(HISTOGRAM_BUCKETS_MS))
+        s["buckets"][idx] += 1
+        if ms >= SLOW_QUERY_MS:
+            s["slow"] += 1
+
+    entry = {"fingerprint": fp, "duration_ms": round(ms, 3), "rows": rows, "bytes": nbytes, "caller": caller}
+    if ms >= SLOW_QUERY_MS:
+        slow_logger.warning(json.dumps({**entry, "statement": text[:2000]}))
+    for fn in list(_listeners):
+        try:
+            fn({**entry, "seconds": seconds})
+        except Exception:
+            logger.exception("Query listener failed")
+
+
+def get_query_stats() -> Dict[str, Dict[str, Any]]:
+    """Snapshot keyed by fingerprint; adds mean_ms and approximate p50/p95 from the histogram."""
+    with _stats_lock:
+        snapshot = {fp: {**s, "callers": dict(s["callers"]), "buckets": list(s["buckets"])}
+                    for fp, s in _stats.items()}
+    for s in snapshot.values():
+        s["mean_ms"] = s["total_ms"] / s["calls"] if s["calls"] else 0.0
+        s["p50_ms"] = _bucket_percentile(s["buckets"], 50, s["max_ms"])
+        s["p95_ms"] = _bucket_percentile(s["buckets"], 95, s["max_ms"])
+    return snapshot
+
+
+def _bucket_percentile(buckets: List[int], pct: float, max_ms: float) -> float:
+    """Upper bound of the bucket holding the pct-th sample (max_ms for the overflow bucket)."""
+    total = sum(buckets)
+    if not total:
+        return 0.0
+    target = pct / 100.0 * total
+    seen = 0
+    for i, count in enumerate(buckets):
+        seen += count
+        if seen >= target:
+            return float(HISTOGRAM_BUCKETS_MS[i]) if i < len(HISTOGRAM_BUCKETS_MS) else max_ms
+    return max_ms
+
+
+def reset_query_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+# -----------------------------
+# psycopg2 cursor / connection
+# -----------------------------
+class _InstrumentedMixin:
+    """Times execute(); counts fetched bytes; records when the next statement starts or the cursor closes."""
+    _pending = None
+
+    def _flush(self):
+        pending, self._pending = self._pending, None
+        if pending:
+            record(*pending)
+
+    def execute(self, query, vars=None):
+        self._flush()
+        caller = _caller()
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._pending = [query, time.perf_counter() - started, self.rowcount, 0, caller]
+
+    def executemany(self, query, vars_list):
+        self._flush()
+        caller = _caller()
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            self._pending = [query, time.perf_counter() - started, self.rowcount, 0, caller]
+
+    def _count(self, rows):
+        if self._pending and rows:
+            self._pending[3] += row_bytes(rows)
+        return rows
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            self._count([row])
+        return row
+
+    def fetchmany(self, size=None):
+        return self._count(super().fetchmany(size) if size is not None else super().fetchmany())
+
+    def fetchall(self):
+        return self._count(super().fetchall())
+
+    def close(self):
+        self._flush()
+        return super().close()
+
+
+class InstrumentedCursor(_InstrumentedMixin, psycopg2.extensions.cursor):
+    pass
+
+
+class InstrumentedDictCursor(_InstrumentedMixin, RealDictCursor):
+    pass
+
+
+_CURSOR_MAP = {
+    None: InstrumentedCursor,
+    psycopg2.extensions.cursor: InstrumentedCursor,
+    RealDictCursor: InstrumentedDictCursor,
+}
+
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    """Connection whose plain and RealDict cursors are instrumented; other factories pass through."""
+
+    def cursor(self, *args, **kwargs):
+        factory = kwargs.get("cursor_factory")
+        if factory in _CURSOR_MAP and not (args or kwargs.get("name")):
+            kwargs["cursor_factory"] = _CURSOR_MAP[factory]
+        return super().cursor(*args, **kwargs)
@@ -0,0 +1,183 @@
+# db_migrations.py
+"""
+Versioned schema migrations.
+
+Migrations live in migrations/ as NNNN_description.sql or NNNN_description.py
+(a module with upgrade(cur)). Each runs once, in version order, in its own
+transaction, and is recorded in schema_migrations. Never edit an applied
+migration; add a new one. If one is edited anyway, the next migrate() logs a
+warning and records the new checksum (the migration is not run again).
+
+    python -m db_migrations            # apply pending migrations
+    python -m db_migrations --status   # list applied / pending
+
+migrate() is called once per process at startup (main.py) and by init_db().
+When nothing is pending it costs a single query. Otherwise it takes a Postgres
+advisory lock first, so replicas starting together apply each migration
+exactly once; the others wait, re-read schema_migrations and find nothing to do.
+"""
+import os
+import re
+import sys
+import time
+import hashlib
+import logging
+import argparse
+import importlib.util
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_LOCK_KEY = 0x62727601  # arbitrary, app-wide constant for pg_advisory_lock
+
+_FILENAME = re.compile(r"^(\d{4})_([a-z0-9_]+)\.(sql|py)$")
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    path: str
+    checksum: str
+
+
+def discover(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Migration files in version order; duplicate version numbers are an error."""
+    found: Dict[int, Migration] = {}
+    for filename in sorted(os.listdir(directory)):
+        match = _FILENAME.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in found:
+            raise RuntimeError(f"Duplicate migration version {version}: {found[version].path} and {filename}")
+        path = os.path.join(directory, filename)
+        with open(path, "rb") as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        found[version] = Migration(version, match.group(2), path, checksum)
+    return [found[v] for v in sorted(found)]
+
+
+def _applied(cur) -> Dict[int, str]:
+    cur.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+    if not cur.fetchone()[0]:
+        return {}
+    cur.execute("SELECT version, checksum FROM schema_migrations")
+    return {version: checksum for version, checksum in cur.fetchall()}
+
+
+def _run(cur, migration: Migration):
+    if migration.path.endswith(".sql"):
+        with open(migration.path, encoding="utf-8") as f:
+            cur.execute(f.read())
+        return
+    spec = importlib.util.spec_from_file_location(f"migrations.m{migration.version:04d}", migration.path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.upgrade(cur)
+
+
+def _check(conn, migrations: List[Migration]) -> Tuple[List[Migration], List[Migration]]:
+    """(not yet applied, applied but edited since) in one read of schema_migrations."""
+    with conn.cursor() as cur:
+        applied = _applied(cur)
+    conn.rollback()
+    waiting = [m for m in migrations if m.version not in applied]
+    changed = [m for m in migrations if m.version in applied and applied[m.version] != m.checksum]
+    return waiting, changed
+
+
+def pending(conn, migrations: Optional[List[Migration]] = None) -> List[Migration]:
+    migrations = discover() if migrations is None else migrations
+    waiting, changed = _check(conn, migrations)
+    for m in changed:
+        logger.warning("Migration %04d_%s changed after it was applied", m.version, m.name)
+    return waiting
+
+
+def _accept_changed(conn, changed: List[Migration]):
+    """Warn about edited migrations and store their new checksums, so the warning is not repeated on every start."""
+    with conn, conn.cursor() as cur:
+        for m in changed:
+            logger.warning("Migration %04d_%s changed after it was applied; recording its new checksum",
+                           m.version, m.name)
+            cur.execute("UPDATE schema_migrations SET checksum = %s WHERE version = %s", (m.checksum, m.version))
+
+
+def migrate(conn=None) -> List[str]:
+    """Apply pending migrations under an advisory lock; returns the names applied by this process."""
+    from db_postgres import get_conn
+
+    own_conn = conn is None
+    conn = get_conn() if own_conn else conn
+    done: List[str] = []
+    try:
+        migrations = discover()
+        waiting, changed = _check(conn, migrations)
+        if changed:
+            _accept_changed(conn, changed)
+        if not waiting:
+            return done
+
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_KEY,))
+        conn.commit()
+        try:
+            with conn, conn.cursor() as cur:
+                cur.execute("""
+                            CREATE TABLE IF NOT EXISTS schema_migrations
+                            (
+                                version INTEGER PRIMARY KEY,
+                                name VARCHAR(255) NOT NULL,
+                                checksum VARCHAR(64) NOT NULL,
+                                duration_ms INTEGER NOT NULL,
+                                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                            );
+                            """)
+            # Re-read under the lock: another replica may have applied some meanwhile
+            for migration in pending(conn, migrations):
+                label = f"{migration.version:04d}_{migration.name}"
+                started = time.perf_counter()
+                with conn, conn.cursor() as cur:
+                    _run(cur, migration)
+                    elapsed_ms = int((time.perf_counter() - started) * 1000)
+                    cur.execute("""
+                                INSERT INTO schema_migrations (version, name, checksum, duration_ms)
+                                VALUES (%s, %s, %s, %s)
+                                """, (migration.version, migration.name, migration.checksum, elapsed_ms))
+                logger.info("Applied migration %s in %d ms", label, elapsed_ms)
+                done.append(label)
+        finally:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+            conn.commit()
+        return done
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--status", action="store_true", help="list applied and pending migrations, change nothing")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if not args.status:
+        applied = migrate()
+        print(f"Applied {len(applied)} migration(s)" + (": " + ", ".join(applied) if applied else ""))
+        return 0
+
+    from db_postgres import get_conn
+    conn = get_conn()
+    try:
+        waiting = {m.version for m in pending(conn)}
+        for m in discover():
+            print(f"{'pending' if m.version in waiting else 'applied'}  {m.version:04d}_{m.name}")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
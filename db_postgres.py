@@ -1,13 +1,19 @@
 # db_postgres.py
 import os
+import time
 import logging
 from datetime import datetime
 from typing import Optional, Tuple, List, Dict, Any
 import mimetypes
 import psycopg2
-from psycopg2.extras import RealDictCursor, Json
-import bcrypt
+from psycopg2.extras import RealDictCursor, Json, execute_values
 from dotenv import load_dotenv
+import candidate_codes
+import password_hasher
+import query_registry
+import db_migrations
+import metrics
+from db_instrumentation import InstrumentedConnection
 from typing import Tuple, Optional
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -23,238 +29,44 @@ def get_conn():
         raise RuntimeError("DATABASE_URL environment variable not set")
     return psycopg2.connect(
         database_url,
-        sslmode=os.getenv("PGSSLMODE", "require")
+        sslmode=os.getenv("PGSSLMODE", "require"),
+        connection_factory=InstrumentedConnection,
     )
 
 
 # -----------------------------
 # Initialization / migrations
 # -----------------------------
-def _ensure_column(cur, table: str, column: str, ddl: str):
-    """Safely add column if it doesn't exist."""
-    try:
-        cur.execute(f"""
-            DO $$
-            BEGIN
-                IF NOT EXISTS (
-                    SELECT 1
-                    FROM information_schema.columns
-                    WHERE table_name = %s AND column_name = %s
-                ) THEN
-                    EXECUTE %s;
-                END IF;
-            END$$;
-        """, (table, column, f"ALTER TABLE {table} ADD COLUMN {ddl}"))
-        logger.info(f"Column check/add for {table}.{column} completed")
-    except Exception as e:
-        logger.error(f"Failed to ensure column {table}.{column}: {e}")
-        raise
-
-
 def init_db():
-    """Initialize database tables and ensure schema consistency with built-in migration."""
-    conn = get_conn()
+    """Bring the schema up to date by applying pending migrations (see db_migrations.py)."""
     try:
-        with conn:
-            with conn.cursor() as cur:
-                logger.info("Starting database initialization...")
-
-                # USERS
-                cur.execute("""
-                            CREATE TABLE IF NOT EXISTS users
-                            (
-                                id
-                                SERIAL
-                                PRIMARY
-                                KEY,
-                                email
-                                VARCHAR
-                            (
-                                255
-                            ) UNIQUE NOT NULL,
-                                password_hash VARCHAR
-                            (
-                                255
-                            ) NOT NULL,
-                                role VARCHAR
-                            (
-                                50
-                            ) NOT NULL DEFAULT 'candidate',
-                                force_password_reset BOOLEAN DEFAULT FALSE,
-                                can_view_cvs BOOLEAN DEFAULT FALSE,
-                                can_delete_records BOOLEAN DEFAULT FALSE,
-                                can_grant_delete BOOLEAN DEFAULT FALSE,
-                                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                                );
-                            """)
-
-                # CANDIDATES - Create base table first
-                cur.execute("""
-                            CREATE TABLE IF NOT EXISTS candidates
-                            (
-                                id
-                                SERIAL
-                                PRIMARY
-                                KEY,
-                                candidate_id
-                                VARCHAR
-                            (
-                                50
-                            ) UNIQUE NOT NULL,
-                                name VARCHAR
-                            (
-                                255
-                            ),
-                                email VARCHAR
-                            (
-                                255
-                            ),
-                                phone VARCHAR
-                            (
-                                50
-                            ),
-                                address TEXT, -- keep for older data (unused by UI)
-                                form_data JSONB DEFAULT '{}'::jsonb,
-                                resume_link TEXT,
-                                can_edit BOOLEAN DEFAULT FALSE,
-                                created_by VARCHAR
-                            (
-                                100
-                            ),
-                                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                                );
-                            """)
-
-                # Add all missing columns for expanded pre-interview fields
-                logger.info("Running database migration to add missing columns...")
-
-                # List of columns to ensure exist
-                columns_to_ensure = [
-                    ("current_address", "TEXT"),
-                    ("permanent_address", "TEXT"),
-                    ("dob", "DATE"),
-                    ("caste", "VARCHAR(100)"),
-                    ("sub_caste", "VARCHAR(100)"),
-                    ("marital_status", "VARCHAR(50)"),
-                    ("highest_qualification", "VARCHAR(255)"),
-                    ("work_experience", "TEXT"),
-                    ("referral", "VARCHAR(255)"),
-                    ("ready_festivals", "BOOLEAN DEFAULT FALSE"),
-                    ("ready_late_nights", "BOOLEAN DEFAULT FALSE"),
-                    ("cv_file", "BYTEA"),
-                    ("cv_filename", "TEXT")
-                ]
-
-                for col_name, col_type in columns_to_ensure:
-                    _ensure_column(cur, "candidates", col_name, col_type)
-
-                # INTERVIEWS
-                cur.execute("""
-                            CREATE TABLE IF NOT EXISTS interviews
-                            (
-                                id
-                                SERIAL
-                                PRIMARY
-                                KEY,
-                                candidate_id
-                                VARCHAR
-                            (
-                                50
-                            ) NOT NULL REFERENCES candidates
-                            (
-                                candidate_id
-                            ) ON DELETE CASCADE,
-                                scheduled_at TIMESTAMP,
-                                interviewer VARCHAR
-                            (
-                                255
-                            ),
-                                result VARCHAR
-                            (
-                                50
-                            ),
-                                notes TEXT,
-                                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                                );
-                            """)
-
-                # RECEPTIONIST ASSESSMENTS
-                cur.execute("""
-                            CREATE TABLE IF NOT EXISTS receptionist_assessments
-                            (
-                                id
-                                SERIAL
-                                PRIMARY
-                                KEY,
-                                candidate_id
-                                VARCHAR
-                            (
-                                50
-                            ) NOT NULL REFERENCES candidates
-                            (
-                                candidate_id
-                            ) ON DELETE CASCADE,
-                                speed_test INTEGER,
-                                accuracy_test INTEGER,
-                                work_commitment TEXT,
-                                english_understanding TEXT,
-                                comments TEXT,
-                                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                                );
-                            """)
-
-                # Indexes
-                cur.execute("CREATE INDEX IF NOT EXISTS idx_candidates_name ON candidates(name);")
-                cur.execute("CREATE INDEX IF NOT EXISTS idx_candidates_email ON candidates(email);")
-                cur.execute("CREATE INDEX IF NOT EXISTS idx_interviews_candidate_id ON interviews(candidate_id);")
-
-        logger.info("Database initialized / migrated successfully.")
+        applied = db_migrations.migrate()
+        logger.info("Database initialized / migrated successfully (%d applied).", len(applied))
     except Exception as e:
         logger.error(f"Database initialization failed: {e}")
         raise
-    finally:
-        conn.close()
 
 
 # -----------------------------
 # Password helpers
 # -----------------------------
 def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+    return password_hasher.hash_one(password)
 
 
 def verify_password(password: str, password_hash: str) -> bool:
-    try:
-        return bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("utf-8"))
-    except Exception:
-        return False
+    return password_hasher.verify_one(password, password_hash)
 
 
 # -----------------------------
 # Users
 # -----------------------------
 def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
-    conn = get_conn()
-    try:
-        with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("SELECT * FROM users WHERE email=%s", (email,))
-            return cur.fetchone()
-    finally:
-        conn.close()
+    return query_registry.fetch_one("user_by_email", (email,))
 
 
 def get_user_by_id(user_id: int) -> Optional[Dict[str, Any]]:
-    conn = get_conn()
-    try:
-        with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("SELECT * FROM users WHERE id=%s", (user_id,))
-            return cur.fetchone()
-    finally:
-        conn.close()
+    return query_registry.fetch_one("user_by_id", (user_id,))
 
 
 def create_user_in_db(email: str, password: str, role: str = "candidate") -> bool:
@@ -289,14 +101,41 @@ def update_user_password(email: str, new_password: str) -> bool:
         conn.close()
 
 
+def update_user_password_hashes(hashes_by_id: List[Tuple[int, str]]) -> int:
+    """
+    Store pre-computed password hashes for many users in one statement.
+    hashes_by_id: [(user_id, password_hash), ...] — hash them with password_hasher.hash_many first.
+    Returns the number of rows updated.
+    """
+    if not hashes_by_id:
+        return 0
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            execute_values(cur, """
+                        UPDATE users AS u
+                        SET password_hash=v.password_hash,
+                            force_password_reset= FALSE,
+                            updated_at=CURRENT_TIMESTAMP
+                        FROM (VALUES %s) AS v(id, password_hash)
+                        WHERE u.id = v.id
+                        """, hashes_by_id, page_size=len(hashes_by_id))  # one page, so rowcount covers every row
+            return cur.rowcount
+    finally:
+        conn.close()
+
+
 def delete_user(user_id: int) -> bool:
     conn = get_conn()
     try:
         with conn, conn.cursor() as cur:
             cur.execute("DELETE FROM users WHERE id=%s", (user_id,))
-            return cur.rowcount > 0
+            deleted = cur.rowcount > 0
     finally:
         conn.close()
+    if deleted:
+        _cache_permissions_version(user_id, None)
+    return deleted
 
 
 def get_all_users() -> List[Dict[str, Any]]:
@@ -326,12 +165,16 @@ def set_user_permission(user_id: int,
         sets.append("can_grant_delete=%s")
         params.append(can_grant_delete)
     params.append(user_id)
-    sql = f"UPDATE users SET {', '.join(sets)}, updated_at=CURRENT_TIMESTAMP WHERE id=%s"
+    sql = (f"UPDATE users SET {', '.join(sets)}, updated_at=CURRENT_TIMESTAMP, "
+           f"permissions_version=permissions_version + 1 WHERE id=%s RETURNING permissions_version")
     conn = get_conn()
     try:
         with conn, conn.cursor() as cur:
             cur.execute(sql, tuple(params))
-            return cur.rowcount > 0
+            row = cur.fetchone()
+            if row:
+                _cache_permissions_version(user_id, row[0])
+            return row is not None
     finally:
         conn.close()
 
@@ -359,17 +202,46 @@ def get_all_users_with_permissions() -> List[Dict[str, Any]]:
 
 
 def get_user_permissions(user_id: int) -> Dict[str, Any]:
+    return query_registry.fetch_one("user_permissions", (user_id,)) or {}
+
+
+# Process-wide cache of users.permissions_version so session checks don't hit the DB on every rerun.
+# Changes made through this process update it immediately; other replicas catch up within the TTL.
+PERMISSIONS_VERSION_TTL = float(os.getenv("PERMISSIONS_VERSION_TTL", "30"))
+_permissions_versions: Dict[int, Tuple[Optional[int], float]] = {}
+
+
+def _cache_permissions_version(user_id: int, version: Optional[int]):
+    _permissions_versions[user_id] = (version, time.monotonic())
+
+
+def get_permissions_version(user_id: int) -> Optional[int]:
+    """Current permissions_version for a user (None if the user no longer exists)."""
+    cached = _permissions_versions.get(user_id)
+    if cached and time.monotonic() - cached[1] < PERMISSIONS_VERSION_TTL:
+        return cached[0]
+    row = query_registry.fetch_one("user_permissions_version", (user_id,))
+    version = row["permissions_version"] if row else None
+    _cache_permissions_version(user_id, version)
+    return version
+
+
+def bump_permissions_version(user_id: int) -> Optional[int]:
+    """Invalidate outstanding session tokens for a user (e.g. after a role or email change)."""
     conn = get_conn()
     try:
-        with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with conn, conn.cursor() as cur:
             cur.execute("""
-                        SELECT role, can_view_cvs, can_delete_records, can_grant_delete
-                        FROM users
-                        WHERE id = %s
+                        UPDATE users
+                        SET permissions_version=permissions_version + 1
+                        WHERE id = %s RETURNING permissions_version
                         """, (user_id,))
-            return cur.fetchone() or {}
+            row = cur.fetchone()
     finally:
         conn.close()
+    version = row[0] if row else None
+    _cache_permissions_version(user_id, version)
+    return version
 
 
 def user_can_manage_delete(user_id: int) -> bool:
@@ -388,7 +260,51 @@ def user_can_delete(user_id: int) -> bool:
 # -----------------------------
 # Candidate CRUD + Search
 # -----------------------------
-def create_candidate_in_db(candidate_id: str,
+def normalize_phone(raw: Any) -> str:
+    """
+    The one phone form stored in candidates.phone (form, bulk import and CV matching all use it):
+    digits only, without an Indian country code or trunk prefix: '+91 98765-43210' -> '9876543210'.
+    """
+    if isinstance(raw, float) and raw.is_integer():  # spreadsheets hand phone numbers over as floats
+        raw = int(raw)
+    digits = "".join(ch for ch in str(raw or "") if ch.isdigit())
+    if len(digits) == 12 and digits.startswith("91"):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith("0"):
+        digits = digits[1:]
+    return digits
+
+
+def _insert_candidate(cur, candidate_id: Optional[str], name: str, email: str, phone: str,
+                      address: Optional[str], form_data: dict, created_by: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Insert a candidate under candidate_id, or under a freshly allocated code when it is None
+    (codes from the sequence never collide with each other, only with older random ones, so only
+    allocated codes are retried). Needs a RealDictCursor; returns the new row, or None when the
+    caller's candidate_id is already taken.
+    """
+    attempts = 1 if candidate_id else candidate_codes.CODE_ALLOCATION_ATTEMPTS
+    for _ in range(attempts):
+        code = candidate_id or candidate_codes.allocate_code(cur)
+        cur.execute("""
+                    INSERT INTO candidates (candidate_id, name, email, phone, current_address, form_data,
+                                            created_by, can_edit)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, FALSE)
+                    ON CONFLICT (candidate_id) DO NOTHING
+                    RETURNING *
+                    """, (code, name, email, phone, address, Json(form_data or {}), created_by))
+        row = cur.fetchone()
+        if row:
+            _log_event(cur, row["candidate_id"], "candidate_created", {"name": name}, actor=created_by)
+            return row
+        if candidate_id:
+            logger.warning("Candidate code %s already exists", code)
+            return None
+        logger.warning("Allocated candidate code %s already taken; allocating another", code)
+    raise RuntimeError("Could not allocate a free candidate code")
+
+
+def create_candidate_in_db(candidate_id: Optional[str],
                            name: str,
                            address: str,
                            dob: Optional[str],
@@ -400,57 +316,19 @@ def create_candidate_in_db(candidate_id: str,
     """
     A simplified candidate create helper (matching candidate_view.py's caller).
     Stores current_address into current_address column for compatibility.
+    Pass candidate_id=None to get a code from candidate_codes; the row returned carries the code used.
+    Returns None when a given candidate_id already exists.
     """
     conn = get_conn()
     try:
         with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
-            # Check which address columns exist
-            cur.execute("""
-                        SELECT column_name
-                        FROM information_schema.columns
-                        WHERE table_name = 'candidates'
-                          AND column_name IN ('current_address', 'address')
-                        """)
-            existing_address_columns = {row[0] for row in cur.fetchall()}
-
-            # Build the insert query based on available columns
-            if 'current_address' in existing_address_columns:
-                # Use current_address column (preferred)
-                cur.execute("""
-                            INSERT INTO candidates (candidate_id, name, email, phone, current_address, form_data,
-                                                    created_by, can_edit)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, FALSE) RETURNING *
-                            """, (candidate_id, name, email, phone, address, Json(form_data or {}), created_by))
-            elif 'address' in existing_address_columns:
-                # Fallback to address column if current_address doesn't exist
-                cur.execute("""
-                            INSERT INTO candidates (candidate_id, name, email, phone, address, form_data, created_by,
-                                                    can_edit)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, FALSE) RETURNING *
-                            """, (candidate_id, name, email, phone, address, Json(form_data or {}), created_by))
-            else:
-                # No address column exists, insert without address
-                # Store address in form_data instead
-                updated_form_data = form_data or {}
-                updated_form_data['current_address'] = address
-                cur.execute("""
-                            INSERT INTO candidates (candidate_id, name, email, phone, form_data, created_by, can_edit)
-                            VALUES (%s, %s, %s, %s, %s, %s, FALSE) RETURNING *
-                            """, (candidate_id, name, email, phone, Json(updated_form_data), created_by))
-
-            return cur.fetchone()
+            return _insert_candidate(cur, candidate_id, name, email, phone, address, form_data, created_by)
     finally:
         conn.close()
 
 
 def get_candidate_by_id(candidate_id: str) -> Optional[Dict[str, Any]]:
-    conn = get_conn()
-    try:
-        with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("SELECT * FROM candidates WHERE candidate_id=%s", (candidate_id,))
-            return cur.fetchone()
-    finally:
-        conn.close()
+    return query_registry.fetch_one("candidate_by_id", (candidate_id,))
 
 
 def get_all_candidates() -> List[Dict[str, Any]]:
@@ -478,52 +356,46 @@ def find_candidates_by_name(q: str) -> List[Dict[str, Any]]:
         conn.close()
 
 
-def update_candidate_form_data(candidate_id: str, updates: dict) -> bool:
+def update_candidate_form_data(candidate_id: str, updates: dict, actor: Optional[str] = None) -> bool:
     allowed_cols = {
         "name", "email", "phone", "current_address", "permanent_address", "dob", "caste",
         "sub_caste", "marital_status", "highest_qualification", "work_experience",
         "referral", "ready_festivals", "ready_late_nights"
     }
     sets, params = [], []
+    for k, v in (updates or {}).items():
+        if k in allowed_cols:
+            sets.append(f"{k}=%s")
+            params.append(v)
+
+    form_patch = (updates or {}).get("form_patch")
+    if form_patch:
+        sets.append("form_data = COALESCE(form_data,'{}'::jsonb) || %s::jsonb")
+        params.append(Json(form_patch))
+
+    if not sets:
+        return False
+    params.append(candidate_id)
 
     conn = get_conn()
     try:
         with conn, conn.cursor() as cur:
-            # Check which columns actually exist in the table
-            cur.execute("""
-                        SELECT column_name
-                        FROM information_schema.columns
-                        WHERE table_name = 'candidates'
-                        """)
-            existing_columns = {row[0] for row in cur.fetchall()}
-
-            # Only update columns that exist and are allowed
-            for k, v in (updates or {}).items():
-                if k in allowed_cols and k in existing_columns:
-                    sets.append(f"{k}=%s")
-                    params.append(v)
-
-            form_patch = updates.get("form_patch")
-            if form_patch and "form_data" in existing_columns:
-                sets.append("form_data = COALESCE(form_data,'{}'::jsonb) || %s::jsonb")
-                params.append(Json(form_patch))
-
-            if not sets:
-                return False
-
-            params.append(candidate_id)
 
             cur.execute(f"""
                 UPDATE candidates
                 SET {', '.join(sets)}, updated_at=CURRENT_TIMESTAMP
                 WHERE candidate_id=%s
             """, tuple(params))
-            return cur.rowcount > 0
+            if cur.rowcount == 0:
+                return False
+            fields = sorted({k for k in updates if k in allowed_cols} | set(form_patch or {}))
+            _log_event(cur, candidate_id, "candidate_updated", {"fields": fields}, actor=actor)
+            return True
     finally:
         conn.close()
 
 
-def update_candidate_resume_link(candidate_id: str, resume_link: str) -> bool:
+def update_candidate_resume_link(candidate_id: str, resume_link: str, actor: Optional[str] = None) -> bool:
     conn = get_conn()
     try:
         with conn, conn.cursor() as cur:
@@ -533,12 +405,15 @@ def update_candidate_resume_link(candidate_id: str, resume_link: str) -> bool:
                             updated_at=CURRENT_TIMESTAMP
                         WHERE candidate_id = %s
                         """, (resume_link, candidate_id))
-            return cur.rowcount > 0
+            if cur.rowcount == 0:
+                return False
+            _log_event(cur, candidate_id, "resume_link_updated", {"resume_link": resume_link}, actor=actor)
+            return True
     finally:
         conn.close()
 
 
-def set_candidate_permission(candidate_id: str, can_edit: bool) -> bool:
+def set_candidate_permission(candidate_id: str, can_edit: bool, actor: Optional[str] = None) -> bool:
     conn = get_conn()
     try:
         with conn, conn.cursor() as cur:
@@ -548,7 +423,10 @@ def set_candidate_permission(candidate_id: str, can_edit: bool) -> bool:
                             updated_at=CURRENT_TIMESTAMP
                         WHERE candidate_id = %s
                         """, (can_edit, candidate_id))
-            return cur.rowcount > 0
+            if cur.rowcount == 0:
+                return False
+            _log_event(cur, candidate_id, "edit_permission_changed", {"can_edit": bool(can_edit)}, actor=actor)
+            return True
     finally:
         conn.close()
 
@@ -582,9 +460,14 @@ def delete_candidate(candidate_ids, actor_user_id: int) -> (bool, str):
     conn = get_conn()
     try:
         with conn, conn.cursor() as cur:
-            cur.execute(f"DELETE FROM candidates WHERE candidate_id IN ({placeholders})", tuple(candidate_ids))
-            if cur.rowcount == 0:
+            cur.execute(f"DELETE FROM candidates WHERE candidate_id IN ({placeholders}) RETURNING candidate_id, name",
+                        tuple(candidate_ids))
+            deleted = cur.fetchall()
+            if not deleted:
                 return False, "not_found"
+            execute_values(cur, """
+                INSERT INTO candidate_events (candidate_id, event_type, actor, data) VALUES %s
+            """, [(cid, "candidate_deleted", f"user:{actor_user_id}", Json({"name": name})) for cid, name in deleted])
             return True, "ok"
     except Exception:
         logger.exception("Error deleting candidate(s) %s", candidate_ids)
@@ -593,10 +476,119 @@ def delete_candidate(candidate_ids, actor_user_id: int) -> (bool, str):
         conn.close()
 
 
+# -----------------------------
+# Application drafts (candidate form autosave)
+# -----------------------------
+DRAFT_MAX_AGE_DAYS = int(os.getenv("DRAFT_MAX_AGE_DAYS", "7"))
+
+
+def save_application_draft(token: str, patch: dict) -> bool:
+    """Merge changed fields into a draft (created on first save). False once the draft has been submitted."""
+    if not patch:
+        return True
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                        INSERT INTO applications_draft (token, form_data)
+                        VALUES (%s, %s)
+                        ON CONFLICT (token) DO UPDATE
+                            SET form_data = applications_draft.form_data || EXCLUDED.form_data,
+                                version = applications_draft.version + 1,
+                                updated_at = CURRENT_TIMESTAMP
+                            WHERE applications_draft.candidate_id IS NULL
+                        """, (token, Json(patch)))
+            return cur.rowcount > 0
+    finally:
+        conn.close()
+
+
+def get_application_draft(token: str) -> Optional[Dict[str, Any]]:
+    conn = get_conn()
+    try:
+        with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("""
+                        SELECT token, form_data, version, candidate_id, updated_at
+                        FROM applications_draft
+                        WHERE token = %s
+                        """, (token,))
+            return cur.fetchone()
+    finally:
+        conn.close()
+
+
+def promote_application_draft(token: str, form_data: dict, created_by: Optional[str] = "candidate",
+                              candidate_id: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Turn a draft into a candidate in one transaction: final fields are merged over the draft,
+    duplicates are checked on LOWER(email) / phone, then the candidate row (code from candidate_codes
+    unless given) and its event are written.
+    Returns (candidate row, "created"), (existing row, "already_submitted") for a repeated submit,
+    (None, "email" | "phone") when another application already uses that contact, or
+    (None, "candidate_id") when the given candidate_id already exists.
+    """
+    conn = get_conn()
+    try:
+        with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("""
+                        INSERT INTO applications_draft (token, form_data)
+                        VALUES (%s, %s)
+                        ON CONFLICT (token) DO UPDATE
+                            SET form_data = applications_draft.form_data || EXCLUDED.form_data,
+                                updated_at = CURRENT_TIMESTAMP
+                        RETURNING form_data, candidate_id
+                        """, (token, Json(form_data or {})))
+            draft = cur.fetchone()  # the row stays locked until commit, so concurrent submits serialize here
+            if draft["candidate_id"]:
+                cur.execute("SELECT * FROM candidates WHERE candidate_id = %s", (draft["candidate_id"],))
+                return cur.fetchone(), "already_submitted"
+
+            merged = draft["form_data"]
+            email = (merged.get("email") or "").strip()
+            phone = normalize_phone(merged.get("phone"))
+            cur.execute("""
+                        SELECT CASE WHEN LOWER(email) = LOWER(%s) THEN 'email' ELSE 'phone' END AS reason
+                        FROM candidates
+                        WHERE LOWER(email) = LOWER(%s) OR phone = %s
+                        LIMIT 1
+                        """, (email, email, phone))
+            dup = cur.fetchone()
+            if dup:
+                return None, dup["reason"]
+
+            row = _insert_candidate(cur, candidate_id, merged.get("name"), email, phone,
+                                    merged.get("current_address"), merged, created_by)
+            if row is None:
+                return None, "candidate_id"
+            cur.execute("""
+                        UPDATE applications_draft
+                        SET candidate_id = %s, updated_at = CURRENT_TIMESTAMP
+                        WHERE token = %s
+                        """, (row["candidate_id"], token))
+            return row, "created"
+    finally:
+        conn.close()
+
+
+def purge_stale_drafts(max_age_days: int = DRAFT_MAX_AGE_DAYS) -> int:
+    """Delete drafts (submitted or abandoned) untouched for max_age_days; returns the number removed."""
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                        DELETE FROM applications_draft
+                        WHERE updated_at < CURRENT_TIMESTAMP - make_interval(days => %s)
+                        """, (max_age_days,))
+            return cur.rowcount
+    finally:
+        conn.close()
+
+
 # -----------------------------
 # CV storage helpers
 # -----------------------------
-def save_candidate_cv(candidate_id: str, file_bytes: bytes, filename: Optional[str] = None) -> bool:
+def save_candidate_cv(candidate_id: str, file_bytes: bytes, filename: Optional[str] = None,
+                      actor: Optional[str] = None) -> bool:
     conn = get_conn()
     try:
         with conn, conn.cursor() as cur:
@@ -607,12 +599,15 @@ def save_candidate_cv(candidate_id: str, file_bytes: bytes, filename: Optional[s
                             updated_at=CURRENT_TIMESTAMP
                         WHERE candidate_id = %s
                         """, (psycopg2.Binary(file_bytes), filename, candidate_id))
-            return cur.rowcount > 0
+            if cur.rowcount == 0:
+                return False
+            _log_event(cur, candidate_id, "cv_uploaded", {"filename": filename, "bytes": len(file_bytes)}, actor=actor)
+            return True
     finally:
         conn.close()
 
 
-def clear_candidate_cv(candidate_id: str) -> bool:
+def clear_candidate_cv(candidate_id: str, actor: Optional[str] = None) -> bool:
     """Remove stored CV file and filename for a candidate without deleting the record."""
     conn = get_conn()
     try:
@@ -627,7 +622,10 @@ def clear_candidate_cv(candidate_id: str) -> bool:
                 """,
                 (candidate_id,)
             )
-            return cur.rowcount > 0
+            if cur.rowcount == 0:
+                return False
+            _log_event(cur, candidate_id, "cv_removed", actor=actor)
+            return True
     finally:
         conn.close()
 
@@ -638,6 +636,14 @@ def get_candidate_cv_secure(candidate_id: str, actor_user_id: int) -> Tuple[Opti
     Returns: (file_bytes, filename, mime_type, reason)
     reason ∈ {"ok", "no_permission", "not_found", "error"}
     """
+    file_bytes, name, mime, reason = _fetch_candidate_cv(candidate_id, actor_user_id)
+    metrics.CV_REQUESTS.inc(outcome=reason)
+    if file_bytes:
+        metrics.CV_BYTES_SERVED.inc(len(file_bytes))
+    return file_bytes, name, mime, reason
+
+
+def _fetch_candidate_cv(candidate_id: str, actor_user_id: int) -> Tuple[Optional[bytes], Optional[str], Optional[str], str]:
     try:
         # Permission check
         perms = get_user_permissions(actor_user_id)
@@ -649,37 +655,14 @@ def get_candidate_cv_secure(candidate_id: str, actor_user_id: int) -> Tuple[Opti
         conn = get_conn()
         try:
             with conn.cursor() as cursor:
-                # Check what CV columns exist
-                cursor.execute("""
-                    SELECT column_name
-                    FROM information_schema.columns
-                    WHERE table_name = 'candidates'
-                      AND column_name IN ('cv_file', 'cv_filename', 'resume_link')
-                """)
-                existing_cols = {row[0] for row in cursor.fetchall()}
-
-                # Build query based on available columns
-                select_parts = []
-                if 'cv_file' in existing_cols:
-                    select_parts.append('cv_file')
-                if 'cv_filename' in existing_cols:
-                    select_parts.append('cv_filename')
-                if 'resume_link' in existing_cols:
-                    select_parts.append('resume_link')
-
-                if not select_parts:
-                    return None, None, None, "not_found"
-
-                query = f"SELECT {', '.join(select_parts)} FROM candidates WHERE candidate_id = %s"
-                cursor.execute(query, (candidate_id,))
+                cursor.execute("SELECT cv_file, cv_filename, resume_link FROM candidates WHERE candidate_id = %s",
+                               (candidate_id,))
                 result = cursor.fetchone()
 
                 if not result:
                     return None, None, None, "not_found"
 
-                cv_file = result[0] if len(result) > 0 and 'cv_file' in select_parts else None
-                cv_filename = result[1] if len(result) > 1 and 'cv_filename' in select_parts else None
-                resume_link = result[2] if len(result) > 2 and 'resume_link' in select_parts else None
+                cv_file, cv_filename, resume_link = result
 
                 if cv_file:
                     return bytes(cv_file), cv_filename or f"{candidate_id}.pdf", "application/pdf", "ok"
@@ -712,7 +695,8 @@ def save_receptionist_assessment(candidate_id: str,
                                  accuracy_test: Optional[int],
                                  work_commitment: Optional[str],
                                  english_understanding: Optional[str],
-                                 comments: Optional[str]) -> bool:
+                                 comments: Optional[str],
+                                 actor: Optional[str] = None) -> bool:
     conn = get_conn()
     try:
         with conn, conn.cursor() as cur:
@@ -720,27 +704,25 @@ def save_receptionist_assessment(candidate_id: str,
                         INSERT INTO receptionist_assessments
                         (candidate_id, speed_test, accuracy_test, work_commitment,
                          english_understanding, comments)
-                        VALUES (%s, %s, %s, %s, %s, %s)
+                        VALUES (%s, %s, %s, %s, %s, %s) RETURNING id
                         """, (candidate_id, speed_test, accuracy_test, work_commitment,
                               english_understanding, comments))
+            _log_event(cur, candidate_id, "assessment_recorded", {
+                "assessment_id": cur.fetchone()[0],
+                "speed_test": speed_test,
+                "accuracy_test": accuracy_test,
+                "work_commitment": work_commitment,
+                "english_understanding": english_understanding,
+                "comments": comments,
+            }, actor=actor or "receptionist")
+            _move_stage(cur, candidate_id, "assessed", actor=actor or "receptionist")
             return True
     finally:
         conn.close()
 
 
 def get_receptionist_assessments(candidate_id: str) -> List[Dict[str, Any]]:
-    conn = get_conn()
-    try:
-        with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                        SELECT *
-                        FROM receptionist_assessments
-                        WHERE candidate_id = %s
-                        ORDER BY created_at DESC
-                        """, (candidate_id,))
-            return cur.fetchall()
-    finally:
-        conn.close()
+    return query_registry.fetch_all("assessments_by_candidate", (candidate_id,))
 
 
 # -----------------------------
@@ -750,35 +732,63 @@ def create_interview(candidate_id: str,
                      scheduled_at: Optional[datetime],
                      interviewer: Optional[str],
                      result: Optional[str] = None,
-                     notes: Optional[str] = None) -> Optional[int]:
+                     notes: Optional[str] = None,
+                     notes_data: Optional[Dict[str, Any]] = None,
+                     interviewer_user_id: Optional[int] = None) -> Optional[int]:
+    """
+    notes is the human-readable text; notes_data the structured fields (see INTERVIEW_NOTE_FIELDS),
+    stored as JSONB so they can be filtered and aggregated in SQL. interviewer is the display name;
+    interviewer_user_id the logged-in user who recorded it (what interviewer stats group by).
+    """
     conn = get_conn()
     try:
         with conn, conn.cursor() as cur:
             cur.execute("""
-                        INSERT INTO interviews (candidate_id, scheduled_at, interviewer, result, notes)
-                        VALUES (%s, %s, %s, %s, %s) RETURNING id
-                        """, (candidate_id, scheduled_at, interviewer, result, notes))
+                        INSERT INTO interviews (candidate_id, scheduled_at, interviewer, result, notes, notes_json,
+                                                interviewer_user_id)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id
+                        """, (candidate_id, scheduled_at, interviewer, result, notes,
+                              Json(notes_data) if notes_data else None, interviewer_user_id))
             row = cur.fetchone()
+            if row:
+                _log_event(cur, candidate_id, "interview_recorded", {
+                    "interview_id": row[0],
+                    "result": result,
+                    "interviewer": interviewer,
+                    "interviewer_user_id": interviewer_user_id,
+                    "scheduled_at": scheduled_at.isoformat() if scheduled_at else None,
+                    "notes": notes,
+                    "notes_data": notes_data,
+                }, actor=interviewer)
+                # forward-only: a later/older result that isn't a valid move leaves the stage alone
+                _move_stage(cur, candidate_id, stage_for_interview_result(result), actor=interviewer)
             return row[0] if row else None
     finally:
         conn.close()
 
 
-def get_interviews_for_candidate(candidate_id: str) -> List[Dict[str, Any]]:
+def get_latest_assessments(candidate_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Most recent assessment per candidate for a whole list, in one query: {candidate_id: row}."""
+    if not candidate_ids:
+        return {}
     conn = get_conn()
     try:
         with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute("""
-                        SELECT *
-                        FROM interviews
-                        WHERE candidate_id = %s
-                        ORDER BY created_at DESC
-                        """, (candidate_id,))
-            return cur.fetchall()
+                        SELECT DISTINCT ON (candidate_id) *
+                        FROM receptionist_assessments
+                        WHERE candidate_id = ANY(%s)
+                        ORDER BY candidate_id, created_at DESC
+                        """, (list(candidate_ids),))
+            return {r["candidate_id"]: r for r in cur.fetchall()}
     finally:
         conn.close()
 
 
+def get_interviews_for_candidate(candidate_id: str) -> List[Dict[str, Any]]:
+    return query_registry.fetch_all("interviews_by_candidate", (candidate_id,))
+
+
 def get_all_interviews() -> List[Dict[str, Any]]:
     conn = get_conn()
     try:
@@ -795,127 +805,511 @@ def get_all_interviews() -> List[Dict[str, Any]]:
 
 
 # -----------------------------
-# New helpers: HISTORY + INTERVIEWER STATS + PERMISSIONS UPDATE
+# Candidate pipeline stage
+# -----------------------------
+CANDIDATE_STAGES = ("applied", "assessed", "scheduled", "interviewed", "offered", "rejected")
+
+# stage -> stages it may move to; anything else is refused
+STAGE_TRANSITIONS: Dict[str, Tuple[str, ...]] = {
+    "applied": ("assessed", "rejected"),
+    "assessed": ("scheduled", "interviewed", "offered", "rejected"),
+    "scheduled": ("interviewed", "offered", "rejected"),
+    "interviewed": ("scheduled", "offered", "rejected"),  # another round
+    "offered": ("rejected",),  # offer declined / withdrawn
+    "rejected": ("applied",),  # reopened
+}
+
+# Columns a queue card needs; never cv_file (SELECT * would drag every CV along)
+QUEUE_COLUMNS = """
+    id, candidate_id, name, email, phone, form_data, can_edit, created_at, updated_at,
+    stage, stage_changed_at, assessment_count, last_assessed_at, interview_count, last_interview_at, last_result
+"""
+
+STAGE_QUEUE_SQL = f"""
+    SELECT {QUEUE_COLUMNS}
+    FROM candidates
+    WHERE stage = ANY(%s)
+    ORDER BY updated_at
+    LIMIT %s OFFSET %s
+"""
+
+
+def stage_for_interview_result(result: Optional[str]) -> str:
+    """Stage a candidate reaches when an interview is recorded with this result."""
+    result_norm = (result or "").strip().lower().replace("_", " ")
+    if result_norm in ("pass", "passed"):
+        return "offered"
+    if result_norm in ("fail", "failed"):
+        return "rejected"
+    if result_norm in ("completed", "on hold"):
+        return "interviewed"
+    return "scheduled"
+
+
+def _move_stage(cur, candidate_id: str, stage: str, actor: Optional[str] = None) -> Tuple[bool, str]:
+    """
+    Move a candidate to `stage` on the caller's cursor if the transition is allowed.
+    The current stage is re-checked in the UPDATE itself, so two concurrent moves cannot both apply.
+    Returns (moved, reason) with reason in {"ok", "unchanged", "invalid_transition", "not_found"}.
+    """
+    if stage not in CANDIDATE_STAGES:
+        return False, "invalid_transition"
+    allowed_from = [s for s, targets in STAGE_TRANSITIONS.items() if stage in targets]
+    cur.execute("""
+                UPDATE candidates c
+                SET stage = %s,
+                    stage_changed_at = CURRENT_TIMESTAMP,
+                    updated_at = CURRENT_TIMESTAMP
+                FROM (SELECT candidate_id, stage FROM candidates WHERE candidate_id = %s FOR UPDATE) prev
+                WHERE c.candidate_id = prev.candidate_id
+                  AND c.stage = ANY(%s)
+                RETURNING prev.stage
+                """, (stage, candidate_id, allowed_from))
+    row = cur.fetchone()
+    if row:
+        _log_event(cur, candidate_id, "stage_changed", {"from": row[0], "to": stage}, actor=actor)
+        # the desk's work is done once the candidate leaves its queue
+        cur.execute("DELETE FROM candidate_claims WHERE candidate_id = %s AND queue <> ALL(%s)",
+                    (candidate_id, [q for q, stages in WORK_QUEUES.items() if stage in stages]))
+        return True, "ok"
+    cur.execute("SELECT stage FROM candidates WHERE candidate_id = %s", (candidate_id,))
+    current = cur.fetchone()
+    if not current:
+        return False, "not_found"
+    return False, "unchanged" if current[0] == stage else "invalid_transition"
+
+
+def set_candidate_stage(candidate_id: str, stage: str, actor: Optional[str] = None) -> Tuple[bool, str]:
+    """
+    Explicitly move a candidate along the pipeline (offer, reject, reopen, ...).
+    Returns (success, reason) where reason is one of "ok", "unchanged", "invalid_transition", "not_found".
+    """
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            return _move_stage(cur, candidate_id, stage, actor=actor)
+    finally:
+        conn.close()
+
+
+def get_stage_queue(stages, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+    """
+    Candidates waiting in one or more stages, longest-untouched first (index on stage, updated_at).
+    Accepts a single stage or a list of stages.
+    """
+    if isinstance(stages, str):
+        stages = [stages]
+    unknown = set(stages) - set(CANDIDATE_STAGES)
+    if unknown:
+        raise ValueError(f"Unknown candidate stage(s): {', '.join(sorted(unknown))}")
+    conn = get_conn()
+    try:
+        with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(STAGE_QUEUE_SQL, (list(stages), limit, offset))
+            return cur.fetchall()
+    finally:
+        conn.close()
+
+
+def get_stage_counts() -> Dict[str, int]:
+    """Number of candidates in every stage (zero-filled), from an index-only scan."""
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("SELECT stage, COUNT(*) FROM candidates GROUP BY stage")
+            counts = dict(cur.fetchall())
+        return {stage: int(counts.get(stage, 0)) for stage in CANDIDATE_STAGES}
+    finally:
+        conn.close()
+
+
 # -----------------------------
-def get_candidate_history(candidate_id: str) -> List[Dict[str, Any]]:
+# Candidate change feed
+# -----------------------------
+def get_candidate_changes(since: Optional[int], columns: str = QUEUE_COLUMNS,
+                          limit: int = 1000) -> Dict[str, Any]:
     """
-    Return a merged chronological timeline for a candidate.
-    Each item is a dict: { event: str, details: str, created_at: datetime, actor: Optional[str] }
+    Patch a cached candidate list instead of reloading it.
+    Returns {"token", "full", "changed", "deleted"}:
+      - since=None: a full snapshot, the newest `limit` candidates by created_at ("full": True)
+      - since=<token from the previous call>: rows inserted/updated and candidate_ids deleted since then
+    Each changed row carries row_version; a higher one is a later write of the same candidate.
+    The token is the oldest transaction still running when the read began (pg_snapshot_xmin),
+    so a write that commits after we looked is picked up next time, never skipped. Rows around
+    that horizon can come back twice; applying them is idempotent.
     """
     conn = get_conn()
     try:
         with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
-            # ensure candidate exists
-            cur.execute(
-                "SELECT candidate_id, name, created_at, updated_at, created_by FROM candidates WHERE candidate_id=%s",
-                (candidate_id,))
-            cand = cur.fetchone()
-            if not cand:
+            cur.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint AS token")
+            token = cur.fetchone()["token"]
+            if since is None:
+                cur.execute(f"""
+                            SELECT {columns}, row_version
+                            FROM candidates
+                            ORDER BY created_at DESC
+                            LIMIT %s
+                            """, (limit,))
+                return {"token": token, "full": True, "changed": cur.fetchall(), "deleted": []}
+            cur.execute(f"""
+                        SELECT {columns}, row_version
+                        FROM candidates
+                        WHERE row_xid >= %s::text::xid8
+                        ORDER BY row_version
+                        """, (since,))
+            changed = cur.fetchall()
+            cur.execute("SELECT candidate_id FROM candidate_tombstones WHERE row_xid >= %s::text::xid8", (since,))
+            deleted = [r["candidate_id"] for r in cur.fetchall()]
+            return {"token": token, "full": False, "changed": changed, "deleted": deleted}
+    finally:
+        conn.close()
+
+
+# -----------------------------
+# Work-queue claims
+# -----------------------------
+# queue (desk role) -> stages it works on
+WORK_QUEUES: Dict[str, Tuple[str, ...]] = {
+    "receptionist": ("applied",),
+    "interviewer": ("assessed", "scheduled"),
+}
+CLAIM_TTL_MINUTES = int(os.getenv("CLAIM_TTL_MINUTES", "20"))
+
+
+def claim_next_candidates(queue: str, user_id: int, n: int = 5,
+                          ttl_minutes: int = CLAIM_TTL_MINUTES) -> List[Dict[str, Any]]:
+    """
+    The candidates user_id is working in `queue`, topped up to n from the front of the queue
+    (longest waiting first). Live claims are extended by ttl_minutes; new ones are taken with
+    FOR UPDATE SKIP LOCKED, so desks claiming at the same moment never get the same candidate,
+    and candidates with another desk's unexpired claim are skipped. A desk does not re-take a
+    candidate it released (or let lapse) within the last ttl_minutes. Cost depends on n, not on
+    how many candidates exist.
+    """
+    if queue not in WORK_QUEUES:
+        raise ValueError(f"Unknown work queue: {queue}")
+    stages = list(WORK_QUEUES[queue])
+    conn = get_conn()
+    try:
+        with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("""
+                        UPDATE candidate_claims cl
+                        SET expires_at = CURRENT_TIMESTAMP + make_interval(mins => %s)
+                        FROM candidates c
+                        WHERE cl.user_id = %s
+                          AND cl.queue = %s
+                          AND cl.expires_at > CURRENT_TIMESTAMP
+                          AND c.candidate_id = cl.candidate_id
+                          AND c.stage = ANY(%s)
+                        RETURNING cl.candidate_id
+                        """, (ttl_minutes, user_id, queue, stages))
+            held = [r["candidate_id"] for r in cur.fetchall()]
+
+            if len(held) < n:
+                # ON CONFLICT only takes over expired claims; a claim committed by another desk
+                # after this statement's snapshot makes the DO UPDATE a no-op instead of a steal.
+                cur.execute("""
+                            WITH next AS (
+                                SELECT c.candidate_id
+                                FROM candidates c
+                                WHERE c.stage = ANY(%(stages)s)
+                                  AND NOT EXISTS (SELECT 1
+                                                  FROM candidate_claims cl
+                                                  WHERE cl.candidate_id = c.candidate_id
+                                                    AND (cl.expires_at > CURRENT_TIMESTAMP
+                                                        OR (cl.user_id = %(user_id)s
+                                                            AND cl.expires_at > CURRENT_TIMESTAMP
+                                                                - make_interval(mins => %(ttl)s))))
+                                ORDER BY c.updated_at
+                                LIMIT %(wanted)s
+                                FOR UPDATE OF c SKIP LOCKED
+                            )
+                            INSERT INTO candidate_claims (candidate_id, queue, user_id, expires_at)
+                            SELECT candidate_id, %(queue)s, %(user_id)s, CURRENT_TIMESTAMP + make_interval(mins => %(ttl)s)
+                            FROM next
+                            ON CONFLICT (candidate_id) DO UPDATE
+                                SET queue = EXCLUDED.queue,
+                                    user_id = EXCLUDED.user_id,
+                                    claimed_at = CURRENT_TIMESTAMP,
+                                    expires_at = EXCLUDED.expires_at
+                                WHERE candidate_claims.expires_at <= CURRENT_TIMESTAMP
+                            RETURNING candidate_id
+                            """, {"stages": stages, "wanted": n - len(held), "queue": queue,
+                                  "user_id": user_id, "ttl": ttl_minutes})
+                held += [r["candidate_id"] for r in cur.fetchall()]
+
+            if not held:
                 return []
+            cur.execute(f"""
+                        SELECT {QUEUE_COLUMNS}, cl.expires_at AS claim_expires_at
+                        FROM candidates
+                                 JOIN candidate_claims cl USING (candidate_id)
+                        WHERE candidate_id = ANY(%s)
+                        ORDER BY updated_at
+                        """, (held,))
+            return cur.fetchall()
+    finally:
+        conn.close()
+
 
-            timeline: List[Dict[str, Any]] = []
-
-            # candidate created/updated events
-            if cand.get("created_at"):
-                timeline.append({
-                    "event": "candidate_created",
-                    "details": f"Candidate record created ({cand.get('name')})",
-                    "created_at": cand.get("created_at"),
-                    "actor": cand.get("created_by") if cand.get("created_by") else None
-                })
-            if cand.get("updated_at") and cand.get("updated_at") != cand.get("created_at"):
-                timeline.append({
-                    "event": "candidate_updated",
-                    "details": f"Candidate record updated",
-                    "created_at": cand.get("updated_at"),
-                    "actor": None
-                })
-
-            # receptionist assessments
+def release_claim(candidate_id: str, user_id: int) -> bool:
+    """
+    Hand a claimed candidate back to the queue for other desks (only the claiming user can).
+    The claim is expired rather than deleted so this desk's next top-up skips it for a while.
+    """
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
             cur.execute("""
-                        SELECT id,
-                               speed_test,
-                               accuracy_test,
-                               work_commitment,
-                               english_understanding,
-                               comments,
-                               created_at
-                        FROM receptionist_assessments
+                        UPDATE candidate_claims
+                        SET expires_at = CURRENT_TIMESTAMP
                         WHERE candidate_id = %s
-                        ORDER BY created_at DESC
-                        """, (candidate_id,))
-            for r in cur.fetchall():
-                details = f"Speed: {r.get('speed_test')}, Accuracy: {r.get('accuracy_test')}"
-                if r.get("work_commitment"):
-                    details += f", Commitment: {r.get('work_commitment')}"
-                if r.get("english_understanding"):
-                    details += f", English: {r.get('english_understanding')}"
-                if r.get("comments"):
-                    details += f", Notes: {r.get('comments')}"
-                timeline.append({
-                    "event": "receptionist_assessment",
-                    "details": details,
-                    "created_at": r.get("created_at"),
-                    "actor": "receptionist"
-                })
-
-            # interviews (include scheduled_at as the event time if present; fallback to created_at)
+                          AND user_id = %s
+                          AND expires_at > CURRENT_TIMESTAMP
+                        """, (candidate_id, user_id))
+            return cur.rowcount > 0
+    finally:
+        conn.close()
+
+
+def get_active_claims(candidate_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Unexpired claims for a list of candidates: {candidate_id: {user_id, email, queue, expires_at}}."""
+    if not candidate_ids:
+        return {}
+    conn = get_conn()
+    try:
+        with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute("""
-                        SELECT id, scheduled_at, created_at, result, interviewer, notes
-                        FROM interviews
-                        WHERE candidate_id = %s
-                        """, (candidate_id,))
-            for iv in cur.fetchall():
-                ev_time = iv.get("scheduled_at") or iv.get("created_at")
-                details = f"Result: {iv.get('result') or 'unspecified'}"
-                if iv.get("notes"):
-                    details += f", Notes: {iv.get('notes')}"
-                timeline.append({
-                    "event": "interview",
-                    "details": details,
-                    "created_at": ev_time,
-                    "actor": iv.get("interviewer")
-                })
-
-            # sort timeline newest first
-            timeline_sorted = sorted(
-                timeline,
-                key=lambda x: x.get("created_at") or datetime(1970, 1, 1),
-                reverse=True
-            )
-            return timeline_sorted
+                        SELECT cl.candidate_id, cl.user_id, u.email, cl.queue, cl.expires_at
+                        FROM candidate_claims cl
+                                 JOIN users u ON u.id = cl.user_id
+                        WHERE cl.candidate_id = ANY(%s)
+                          AND cl.expires_at > CURRENT_TIMESTAMP
+                        """, (list(candidate_ids),))
+            return {r["candidate_id"]: r for r in cur.fetchall()}
     finally:
         conn.close()
 
 
-def get_interviewer_performance_stats(interviewer_id: str) -> Dict[str, Any]:
+# -----------------------------
+# Interview notes (structured fields in interviews.notes_json)
+# -----------------------------
+INTERVIEW_NOTE_FIELDS = (
+    "summary", "rich_notes_md", "age", "education", "family_background", "english", "experience_salary",
+    "attitude", "commitment", "no_festival_leave", "own_pc", "continuous_night", "rotational_night",
+    "profile_fit", "project_fit", "grasping", "other_notes",
+)
+
+
+def _check_note_fields(fields):
+    unknown = [f for f in fields if f not in INTERVIEW_NOTE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown interview note field(s): {', '.join(unknown)}")
+
+
+def find_interviews_by_notes(filters: Dict[str, str], limit: int = 200) -> List[Dict[str, Any]]:
+    """Interviews whose notes match every field=value in filters exactly (served by the notes_json GIN index)."""
+    _check_note_fields(filters)
+    conn = get_conn()
+    try:
+        with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("""
+                        SELECT i.*, c.name AS candidate_name
+                        FROM interviews i
+                                 JOIN candidates c ON c.candidate_id = i.candidate_id
+                        WHERE i.notes_json @> %s
+                        ORDER BY i.created_at DESC
+                        LIMIT %s
+                        """, (Json(filters), limit))
+            return cur.fetchall()
+    finally:
+        conn.close()
+
+
+def aggregate_interviews_by_note(field: str, filters: Optional[Dict[str, str]] = None,
+                                 interviewer: Optional[str] = None) -> List[Dict[str, Any]]:
     """
-    Return simple interviewer performance stats for a given interviewer identifier (string).
+    Interview counts per value of one notes field, most common first.
+    Each item: { value, interviews, passed, failed }. Interviews without the field are grouped under None.
     """
+    _check_note_fields([field] + list(filters or {}))
+    clauses, params = ["i.notes_json IS NOT NULL"], [field]
+    if filters:
+        clauses.append("i.notes_json @> %s")
+        params.append(Json(filters))
+    if interviewer:
+        clauses.append("i.interviewer = %s")
+        params.append(interviewer)
     conn = get_conn()
     try:
         with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                        SELECT COUNT(*)::int AS total_interviews, SUM(CASE WHEN LOWER(result) = 'scheduled' THEN 1 ELSE 0 END)::int AS scheduled, SUM(CASE
-                                                                                                                                                          WHEN LOWER(result) IN ('completed', 'pass', 'fail')
-                                                                                                                                                              THEN 1
-                                                                                                                                                          ELSE 0 END)::int AS completed, SUM(CASE WHEN LOWER(result) = 'pass' THEN 1 ELSE 0 END) ::int AS passed
-                        FROM interviews
-                        WHERE interviewer = %s
-                        """, (interviewer_id,))
-            row = cur.fetchone() or {}
-            total = int(row.get("total_interviews") or 0)
-            scheduled = int(row.get("scheduled") or 0)
-            completed = int(row.get("completed") or 0)
-            passed = int(row.get("passed") or 0)
-            success_rate = int((passed / completed) * 100) if completed > 0 else 0
-            return {
-                "total_interviews": total,
-                "scheduled": scheduled,
-                "completed": completed,
-                "passed": passed,
-                "success_rate": success_rate,
-            }
+            cur.execute(f"""
+                        SELECT NULLIF(i.notes_json ->> %s, '') AS value,
+                               COUNT(*)::int AS interviews,
+                               COUNT(*) FILTER (WHERE LOWER(i.result) = 'pass')::int AS passed,
+                               COUNT(*) FILTER (WHERE LOWER(i.result) = 'fail')::int AS failed
+                        FROM interviews i
+                        WHERE {' AND '.join(clauses)}
+                        GROUP BY 1
+                        ORDER BY interviews DESC
+                        """, tuple(params))
+            return cur.fetchall()
+    finally:
+        conn.close()
+
+
+# -----------------------------
+# New helpers: HISTORY + INTERVIEWER STATS + PERMISSIONS UPDATE
+# -----------------------------
+# -----------------------------
+# Candidate event log
+# -----------------------------
+def _log_event(cur, candidate_id: str, event_type: str, data: Optional[Dict[str, Any]] = None,
+               actor: Optional[str] = None):
+    """Append a history event on the caller's cursor so it commits (or rolls back) with the change itself."""
+    cur.execute("""
+                INSERT INTO candidate_events (candidate_id, event_type, actor, data)
+                VALUES (%s, %s, %s, %s)
+                """, (candidate_id, event_type, actor, Json(data or {})))
+
+
+def _describe_event(event_type: str, data: Dict[str, Any]) -> str:
+    """One-line human summary of an event's payload for timelines."""
+    if event_type == "candidate_created":
+        return f"Candidate record created ({data.get('name')})"
+    if event_type == "candidate_updated":
+        fields = data.get("fields") or []
+        return f"Candidate record updated ({', '.join(fields)})" if fields else "Candidate record updated"
+    if event_type == "assessment_recorded":
+        details = f"Speed: {data.get('speed_test')}, Accuracy: {data.get('accuracy_test')}"
+        if data.get("work_commitment"):
+            details += f", Commitment: {data.get('work_commitment')}"
+        if data.get("english_understanding"):
+            details += f", English: {data.get('english_understanding')}"
+        if data.get("comments"):
+            details += f", Notes: {data.get('comments')}"
+        return details
+    if event_type == "interview_recorded":
+        details = f"Result: {data.get('result') or 'unspecified'}"
+        if data.get("notes"):
+            details += f", Notes: {data.get('notes')}"
+        return details
+    if event_type == "cv_uploaded":
+        return f"CV uploaded ({data.get('filename') or 'unnamed'}, {(data.get('bytes') or 0) / 1024:.0f} KB)"
+    if event_type == "cv_removed":
+        return "CV removed"
+    if event_type == "resume_link_updated":
+        return f"Resume link set to {data.get('resume_link')}"
+    if event_type == "edit_permission_changed":
+        return "Editing allowed" if data.get("can_edit") else "Editing revoked"
+    if event_type == "stage_changed":
+        return f"Stage: {data.get('from')} → {data.get('to')}"
+    if event_type == "candidate_deleted":
+        return f"Candidate record deleted ({data.get('name')})"
+    return ", ".join(f"{k}: {v}" for k, v in data.items())
+
+
+def get_candidate_history(candidate_id: str, limit: int = 50, before: Optional[int] = None,
+                          event_types: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Return a candidate's timeline from candidate_events, newest first.
+    Each item is a dict: { id, event, details: str, data: dict, created_at: datetime, actor: Optional[str] }
+    Pass the last item's id as `before` to fetch the next (older) page.
+    """
+    clauses = ["candidate_id = %s"]
+    params: List[Any] = [candidate_id]
+    if before is not None:
+        # keyset on (created_at, id): rows strictly older than the event with id `before`
+        clauses.append("(created_at, id) < (SELECT created_at, id FROM candidate_events WHERE id = %s)")
+        params.append(before)
+    if event_types:
+        clauses.append("event_type = ANY(%s)")
+        params.append(list(event_types))
+    params.append(limit)
+    conn = get_conn()
+    try:
+        with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(f"""
+                        SELECT id, event_type, actor, data, created_at
+                        FROM candidate_events
+                        WHERE {' AND '.join(clauses)}
+                        ORDER BY created_at DESC, id DESC
+                        LIMIT %s
+                        """, tuple(params))
+            return [{
+                "id": r["id"],
+                "event": r["event_type"],
+                "details": _describe_event(r["event_type"], r["data"] or {}),
+                "data": r["data"] or {},
+                "created_at": r["created_at"],
+                "actor": r["actor"],
+            } for r in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+# Per-interviewer totals, keyed by interviewer_user_id (set at save time, backfilled by migration 0005).
+# The time-to-interview subquery walks idx_assessments_candidate_created once per interview.
+INTERVIEWER_STATS_SQL = """
+    SELECT i.interviewer_user_id,
+           u.email AS interviewer_email,
+           COUNT(*)::int AS total_interviews,
+           COUNT(*) FILTER (WHERE i.result IS NULL OR LOWER(i.result) = 'scheduled')::int AS scheduled,
+           COUNT(*) FILTER (WHERE LOWER(i.result) IN ('completed', 'pass', 'fail'))::int AS completed,
+           COUNT(*) FILTER (WHERE LOWER(i.result) = 'pass')::int AS passed,
+           AVG(EXTRACT(EPOCH FROM COALESCE(i.scheduled_at, i.created_at) - fa.assessed_at)) / 3600.0
+               AS avg_hours_assessment_to_interview
+    FROM interviews i
+             JOIN users u ON u.id = i.interviewer_user_id
+             LEFT JOIN LATERAL (
+        SELECT MIN(a.created_at) AS assessed_at
+        FROM receptionist_assessments a
+        WHERE a.candidate_id = i.candidate_id
+        ) fa ON TRUE
+    WHERE {where}
+    GROUP BY i.interviewer_user_id, u.email
+"""
+
+
+def _shape_interviewer_stats(row: Dict[str, Any]) -> Dict[str, Any]:
+    completed = int(row.get("completed") or 0)
+    passed = int(row.get("passed") or 0)
+    avg_hours = row.get("avg_hours_assessment_to_interview")
+    return {
+        "interviewer_user_id": row.get("interviewer_user_id"),
+        "interviewer_email": row.get("interviewer_email"),
+        "total_interviews": int(row.get("total_interviews") or 0),
+        "scheduled": int(row.get("scheduled") or 0),
+        "completed": completed,
+        "passed": passed,
+        "success_rate": int((passed / completed) * 100) if completed > 0 else 0,
+        "avg_hours_assessment_to_interview": round(float(avg_hours), 1) if avg_hours is not None else None,
+    }
+
+
+def get_interviewer_performance_stats(interviewer_user_id: int) -> Dict[str, Any]:
+    """
+    Performance stats for one interviewer (a users.id): totals, success rate (passed / completed)
+    and average hours from the candidate's first assessment to the interview.
+    """
+    conn = get_conn()
+    try:
+        with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(INTERVIEWER_STATS_SQL.format(where="i.interviewer_user_id = %s"), (interviewer_user_id,))
+            row = cur.fetchone()
+            return _shape_interviewer_stats(row or {"interviewer_user_id": interviewer_user_id})
+    finally:
+        conn.close()
+
+
+def get_interviewer_leaderboard(limit: int = 50) -> List[Dict[str, Any]]:
+    """Stats for every interviewer in one grouped query, most passes first."""
+    conn = get_conn()
+    try:
+        with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(INTERVIEWER_STATS_SQL.format(where="i.interviewer_user_id IS NOT NULL")
+                        + " ORDER BY passed DESC, total_interviews DESC LIMIT %s", (limit,))
+            return [_shape_interviewer_stats(r) for r in cur.fetchall()]
     finally:
         conn.close()
 
@@ -943,10 +1337,14 @@ def update_user_permissions(user_id: int, perms: Dict[str, Any]) -> bool:
     try:
         with conn, conn.cursor() as cur:
             cur.execute(
-                f"UPDATE users SET {', '.join(sets)}, updated_at=CURRENT_TIMESTAMP WHERE id=%s",
+                f"UPDATE users SET {', '.join(sets)}, updated_at=CURRENT_TIMESTAMP, "
+                f"permissions_version=permissions_version + 1 WHERE id=%s RETURNING permissions_version",
                 tuple(params),
             )
-            return cur.rowcount > 0
+            row = cur.fetchone()
+            if row:
+                _cache_permissions_version(int(user_id), row[0])
+            return row is not None
     finally:
         conn.close()
 
@@ -981,82 +1379,84 @@ def search_candidates_by_name_or_email(query: str) -> List[Dict[str, Any]]:
 # -----------------------------
 # Statistics for CEO
 # -----------------------------
-def get_candidate_statistics() -> Dict[str, Any]:
-    stats: Dict[str, Any] = {}
-    conn = get_conn()
-    try:
-        with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("SELECT COUNT(*) AS c FROM candidates")
-            stats["total_candidates"] = cur.fetchone()["c"]
+def _count(rows) -> int:
+    return rows[0]["c"] if rows else 0
 
-            cur.execute("SELECT COUNT(*) AS c FROM candidates WHERE DATE(created_at)=CURRENT_DATE")
-            stats["candidates_today"] = cur.fetchone()["c"]
 
-            cur.execute("""
+def _count_map(default_key: str):
+    return lambda rows: {(r["k"] or default_key): r["c"] for r in rows}
+
+
+# (stat key, SQL, reducer over the fetched dict rows). Shared by the sync helper below and db_async,
+# which runs the same statements concurrently.
+CANDIDATE_STAT_QUERIES = [
+    ("total_candidates", "SELECT COUNT(*) AS c FROM candidates", _count),
+    # Date filters are written as ranges on the bare column so they can use idx_candidates_created_at
+    ("candidates_today", """
                         SELECT COUNT(*) AS c
                         FROM candidates
-                        WHERE DATE_TRUNC('week', created_at) = DATE_TRUNC('week', CURRENT_DATE)
-                        """)
-            stats["candidates_this_week"] = cur.fetchone()["c"]
-
-            cur.execute("""
+                        WHERE created_at >= CURRENT_DATE
+                          AND created_at < CURRENT_DATE + 1
+                        """, _count),
+    ("candidates_this_week", """
                         SELECT COUNT(*) AS c
                         FROM candidates
-                        WHERE DATE_TRUNC('month', created_at) = DATE_TRUNC('month', CURRENT_DATE)
-                        """)
-            stats["candidates_this_month"] = cur.fetchone()["c"]
-
-            cur.execute("SELECT COUNT(*) AS c FROM candidates WHERE cv_file IS NOT NULL OR resume_link IS NOT NULL")
-            stats["candidates_with_resume"] = cur.fetchone()["c"]
-            stats["candidates_without_resume"] = stats["total_candidates"] - stats["candidates_with_resume"]
-
-            cur.execute("SELECT COUNT(*) AS c FROM interviews")
-            stats["total_interviews"] = cur.fetchone()["c"]
-
-            cur.execute("SELECT result, COUNT(*) AS c FROM interviews GROUP BY result")
-            stats["interview_results"] = {(r["result"] or "unspecified"): r["c"] for r in cur.fetchall()}
-
-            cur.execute("SELECT COUNT(*) AS c FROM interviews WHERE result IS NULL OR result ILIKE 'scheduled'")
-            stats["interviews_scheduled"] = cur.fetchone()["c"]
-
-            cur.execute(
-                "SELECT COUNT(*) AS c FROM interviews WHERE result IS NOT NULL AND result NOT ILIKE 'scheduled'")
-            stats["interviews_completed"] = cur.fetchone()["c"]
-
-            cur.execute("""
+                        WHERE created_at >= DATE_TRUNC('week', LOCALTIMESTAMP)
+                          AND created_at < DATE_TRUNC('week', LOCALTIMESTAMP) + INTERVAL '1 week'
+                        """, _count),
+    ("candidates_this_month", """
+                        SELECT COUNT(*) AS c
+                        FROM candidates
+                        WHERE created_at >= DATE_TRUNC('month', LOCALTIMESTAMP)
+                          AND created_at < DATE_TRUNC('month', LOCALTIMESTAMP) + INTERVAL '1 month'
+                        """, _count),
+    ("candidates_with_resume",
+     "SELECT COUNT(*) AS c FROM candidates WHERE cv_file IS NOT NULL OR resume_link IS NOT NULL", _count),
+    ("total_interviews", "SELECT COUNT(*) AS c FROM interviews", _count),
+    ("interview_results", "SELECT result AS k, COUNT(*) AS c FROM interviews GROUP BY result",
+     _count_map("unspecified")),
+    ("interviews_scheduled",
+     "SELECT COUNT(*) AS c FROM interviews WHERE result IS NULL OR LOWER(result) = 'scheduled'", _count),
+    ("interviews_completed",
+     "SELECT COUNT(*) AS c FROM interviews WHERE result IS NOT NULL AND LOWER(result) <> 'scheduled'", _count),
+    ("interviews_this_week", """
                         SELECT COUNT(*) AS c
                         FROM interviews
-                        WHERE DATE_TRUNC('week', COALESCE(scheduled_at, created_at)) = DATE_TRUNC('week', CURRENT_DATE)
-                        """)
-            stats["interviews_this_week"] = cur.fetchone()["c"]
-
-            cur.execute("SELECT COUNT(*) AS c FROM interviews WHERE result ILIKE 'pass'")
-            stats["interviews_passed"] = cur.fetchone()["c"] if cur.rowcount is not None else 0
-
-            cur.execute("SELECT COUNT(*) AS c FROM interviews WHERE result ILIKE 'fail'")
-            stats["interviews_failed"] = cur.fetchone()["c"] if cur.rowcount is not None else 0
-
-            cur.execute("SELECT COUNT(*) AS c FROM interviews WHERE result ILIKE 'on hold'")
-            stats["interviews_on_hold"] = cur.fetchone()["c"] if cur.rowcount is not None else 0
-
-            cur.execute("SELECT interviewer, COUNT(*) AS c FROM interviews GROUP BY interviewer")
-            stats["per_interviewer"] = {(r["interviewer"] or "unknown"): r["c"] for r in cur.fetchall()}
+                        WHERE COALESCE(scheduled_at, created_at) >= DATE_TRUNC('week', LOCALTIMESTAMP)
+                          AND COALESCE(scheduled_at, created_at) < DATE_TRUNC('week', LOCALTIMESTAMP) + INTERVAL '1 week'
+                        """, _count),
+    ("interviews_passed", "SELECT COUNT(*) AS c FROM interviews WHERE LOWER(result) = 'pass'", _count),
+    ("interviews_failed", "SELECT COUNT(*) AS c FROM interviews WHERE LOWER(result) = 'fail'", _count),
+    ("interviews_on_hold", "SELECT COUNT(*) AS c FROM interviews WHERE LOWER(result) = 'on hold'", _count),
+    ("per_interviewer", "SELECT interviewer AS k, COUNT(*) AS c FROM interviews GROUP BY interviewer",
+     _count_map("unknown")),
+    ("users_per_role", "SELECT role AS k, COUNT(*) AS c FROM users GROUP BY role", _count_map("unknown")),
+    ("total_assessments", "SELECT COUNT(*) AS c FROM receptionist_assessments", _count),
+    ("avg_tests", """
+                        SELECT AVG(speed_test) AS avg_speed, AVG(accuracy_test) AS avg_accuracy
+                        FROM receptionist_assessments
+                        """, lambda rows: rows[0] if rows else {}),
+]
 
-            cur.execute("SELECT role, COUNT(*) AS c FROM users GROUP BY role")
-            stats["users_per_role"] = {r["role"]: r["c"] for r in cur.fetchall()}
 
-            cur.execute("SELECT COUNT(*) AS c FROM receptionist_assessments")
-            stats["total_assessments"] = cur.fetchone()["c"]
+def finish_candidate_statistics(stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill in derived fields once all CANDIDATE_STAT_QUERIES results are in."""
+    stats["candidates_without_resume"] = stats["total_candidates"] - stats["candidates_with_resume"]
+    avg = stats.pop("avg_tests", None) or {}
+    stats["avg_speed_test"] = float(avg.get("avg_speed") or 0)
+    stats["avg_accuracy_test"] = float(avg.get("avg_accuracy") or 0)
+    return stats
 
-            cur.execute("""
-                        SELECT AVG(speed_test) AS avg_speed, AVG(accuracy_test) AS avg_accuracy
-                        FROM receptionist_assessments
-                        """)
-            row = cur.fetchone()
-            stats["avg_speed_test"] = float(row["avg_speed"] or 0)
-            stats["avg_accuracy_test"] = float(row["avg_accuracy"] or 0)
 
-        return stats
+def get_candidate_statistics() -> Dict[str, Any]:
+    stats: Dict[str, Any] = {}
+    conn = get_conn()
+    try:
+        with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            for key, sql, reduce_rows in CANDIDATE_STAT_QUERIES:
+                cur.execute(sql)
+                stats[key] = reduce_rows(cur.fetchall())
+        return finish_candidate_statistics(stats)
     finally:
         conn.close()
 
@@ -1070,6 +1470,52 @@ def get_total_cv_storage_usage() -> int:
     finally:
         conn.close()
 
+# -----------------------------
+# Page metrics
+# -----------------------------
+def save_page_metrics(rows: List[Dict[str, Any]], window_start: float, window_end: float) -> int:
+    """Insert one aggregated row per page for a flush window (epoch seconds)."""
+    if not rows:
+        return 0
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            execute_values(cur, """
+                INSERT INTO page_metrics (page, window_start, window_end, renders, p50_ms, p95_ms,
+                                          max_ms, avg_db_calls, avg_db_bytes)
+                VALUES %s
+            """, [(r["page"], window_start, window_end, r["renders"], r["p50_ms"], r["p95_ms"],
+                   r["max_ms"], r["avg_db_calls"], r["avg_db_bytes"]) for r in rows],
+                           template="(%s, to_timestamp(%s), to_timestamp(%s), %s, %s, %s, %s, %s, %s)")
+            return len(rows)
+    finally:
+        conn.close()
+
+
+def get_page_metrics(days: int = 7, page: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Daily per-page latency trend: render-weighted p50/p95, worst max, average DB calls."""
+    conn = get_conn()
+    try:
+        with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("""
+                        SELECT page,
+                               date_trunc('day', window_start)                      AS day,
+                               SUM(renders)                                         AS renders,
+                               SUM(p50_ms * renders) / NULLIF(SUM(renders), 0)      AS p50_ms,
+                               SUM(p95_ms * renders) / NULLIF(SUM(renders), 0)      AS p95_ms,
+                               MAX(max_ms)                                          AS max_ms,
+                               SUM(avg_db_calls * renders) / NULLIF(SUM(renders), 0) AS avg_db_calls
+                        FROM page_metrics
+                        WHERE window_start >= now() - make_interval(days => %s)
+                          AND (%s::text IS NULL OR page = %s)
+                        GROUP BY page, day
+                        ORDER BY page, day
+                        """, (days, page, page))
+            return cur.fetchall()
+    finally:
+        conn.close()
+
+
 # -----------------------------
 # Seeding (optional)
 # -----------------------------
@@ -1086,12 +1532,16 @@ def seed_sample_users():
     conn = get_conn()
     try:
         with conn, conn.cursor() as cur:
-            for email, pw, role in samples:
-                cur.execute("SELECT 1 FROM users WHERE email=%s", (email,))
-                if not cur.fetchone():
-                    cur.execute("""
-                                INSERT INTO users (email, password_hash, role)
-                                VALUES (%s, %s, %s)
-                                """, (email, hash_password(pw), role))
+            cur.execute("SELECT email FROM users WHERE email = ANY(%s)", ([email for email, _, _ in samples],))
+            existing = {row[0] for row in cur.fetchall()}
+            missing = [s for s in samples if s[0] not in existing]
+            if not missing:
+                return
+            hashes, _ = password_hasher.hash_many([pw for _, pw, _ in missing])
+            execute_values(cur, """
+                        INSERT INTO users (email, password_hash, role)
+                        VALUES %s
+                        ON CONFLICT (email) DO NOTHING
+                        """, [(email, h, role) for (email, _, role), h in zip(missing, hashes)])
     finally:
-        conn.close()
\ No newline at end of file
+        conn.close()
@@ -4,10 +4,14 @@ Use the small helpers (preview_cv_ui / upload_cv_ui / delete_cv_ui) inside your
 Or open the full manager via drive_and_cv_view().
 """
 
+import os
 import mimetypes
 import base64
+import tempfile
 import streamlit as st
 
+import cv_ingest
+
 from auth import get_current_user
 from db_postgres import (
     get_user_permissions,
@@ -57,6 +61,10 @@ def drive_and_cv_view():
 
     st.header("CV / Drive Management")
 
+    if _can_upload_cv(perms):
+        with st.expander("📦 Bulk CV ingest (ZIP)", expanded=False):
+            _bulk_ingest_ui(user)
+
     # Load candidates
     try:
         candidates = get_all_candidates() or []
@@ -96,7 +104,7 @@ def drive_and_cv_view():
         if _can_delete_cv(perms):
             if st.button("🗑️ Delete CV for candidate"):
                 try:
-                    ok = clear_candidate_cv(candidate_id)
+                    ok = clear_candidate_cv(candidate_id, actor=user.get("email"))
                     if ok:
                         st.success("CV deleted.")
                         st.rerun()
@@ -112,7 +120,7 @@ def drive_and_cv_view():
         up = st.file_uploader("Upload CV (pdf/doc/docx)", type=["pdf", "doc", "docx"])
         if up and st.button("Save CV"):
             try:
-                ok = save_candidate_cv(candidate_id, up.read(), up.name)
+                ok = save_candidate_cv(candidate_id, up.read(), up.name, actor=user.get("email"))
                 if ok:
                     st.success("CV saved.")
                     st.rerun()
@@ -124,6 +132,62 @@ def drive_and_cv_view():
         st.info("You do not have permission to upload/replace CVs.")
 
 
+# ---------- Bulk ingest + review queue
+
+def _bulk_ingest_ui(user: dict):
+    """Upload a ZIP of CVs, auto-attach confident matches, review the rest."""
+    up = st.file_uploader("ZIP of CVs", type=["zip"], key="cv_ingest_zip")
+    if up and st.button("Match & attach", key="cv_ingest_run"):
+        fd, path = tempfile.mkstemp(prefix="cv_ingest_", suffix=".zip")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(up.getbuffer())
+            with st.spinner("Matching CVs to candidates…"):
+                report = cv_ingest.ingest(path, actor=user.get("email"))
+            st.success(f"{report.files} files: {report.attached} attached, {report.queued} queued for review"
+                       + (f", {report.skipped} skipped" if report.skipped else "")
+                       + f" ({report.seconds:.1f}s)")
+        except Exception as e:
+            st.error(f"Ingest failed: {e}")
+        finally:
+            os.remove(path)
+
+    try:
+        pending = cv_ingest.get_pending_reviews()
+    except Exception as e:
+        st.error(f"Failed to load review queue: {e}")
+        return
+    st.subheader(f"Review queue ({len(pending)})")
+    if not pending:
+        st.caption("Nothing waiting for review.")
+        return
+    for item in pending:
+        rid = item["id"]
+        suggestions = item.get("suggestions") or []
+        score = item.get("best_score")
+        label = f"{item['filename']} — {item['reason'].replace('_', ' ')}"
+        if score is not None:
+            label += f" (best {score:.2f}, {cv_ingest.confidence_band(score)})"
+        st.markdown(f"**{label}**")
+        options = [f"{s['candidate_id']} — {s['name']} ({s['score']:.2f})" for s in suggestions]
+        c1, c2, c3, c4 = st.columns([3, 2, 1, 1])
+        with c1:
+            choice = st.selectbox("Suggested match", [""] + options, key=f"cvrev_sel_{rid}")
+        with c2:
+            manual = st.text_input("…or candidate ID", key=f"cvrev_id_{rid}").strip()
+        target = manual or (choice.split(" — ")[0] if choice else "")
+        with c3:
+            if st.button("Attach", key=f"cvrev_attach_{rid}", disabled=not target):
+                ok, reason = cv_ingest.resolve_review(rid, target, actor=user.get("email"))
+                if ok:
+                    st.rerun()
+                st.error(f"Could not attach: {reason.replace('_', ' ')}")
+        with c4:
+            if st.button("Discard", key=f"cvrev_discard_{rid}"):
+                cv_ingest.resolve_review(rid, None, actor=user.get("email"))
+                st.rerun()
+
+
 # ---------- Lightweight building blocks (reuse these in other pages)
 
 def preview_cv_ui(candidate_id: str):
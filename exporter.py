@@ -0,0 +1,273 @@
+# exporter.py
+"""
+Bulk exports of candidates, assessments and interviews to CSV, XLSX or Parquet.
+
+Rows are streamed from a named (server-side) cursor in batches and written to a
+temp file as they arrive, so memory stays flat however many rows there are.
+CV bytes are never selected; form_data and structured interview notes are
+flattened into one column per field by the query itself.
+
+    python -m exporter candidates --format csv --out candidates.csv
+    python -m exporter interviews --format parquet
+
+XLSX needs openpyxl and Parquet needs pyarrow; without them only CSV is offered.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import logging
+import argparse
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from db_postgres import get_conn, INTERVIEW_NOTE_FIELDS
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # optional dependency
+    Workbook = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+
+# (column names, column type OIDs from cursor.description, rows)
+Batch = Tuple[List[str], List[int], List[tuple]]
+
+DATASETS = ("candidates", "assessments", "interviews")
+
+FORMATS = {
+    # format -> (file extension, mime type)
+    "csv": ("csv", "text/csv"),
+    "xlsx": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+class ExportResult(NamedTuple):
+    path: str
+    filename: str
+    mime: str
+    rows: int
+    seconds: float
+
+
+def available_formats() -> List[str]:
+    return [fmt for fmt in FORMATS
+            if fmt == "csv" or (fmt == "xlsx" and Workbook is not None) or (fmt == "parquet" and pa is not None)]
+
+
+# -----------------------------
+# Queries
+# -----------------------------
+def _quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _form_keys(cur) -> List[str]:
+    """Every key used in candidates.form_data (one pass over the table, no rows shipped)."""
+    cur.execute("SELECT DISTINCT jsonb_object_keys(form_data) FROM candidates WHERE jsonb_typeof(form_data) = 'object'")
+    return sorted(r[0] for r in cur.fetchall())
+
+
+def _dataset_sql(cur, dataset: str) -> Tuple[str, Sequence[Any]]:
+    if dataset == "candidates":
+        keys = _form_keys(cur)
+        form_cols = "".join(f",\n       c.form_data ->> %s AS {_quote_ident('form_' + k)}" for k in keys)
+        return f"""
+            SELECT c.candidate_id, c.name, c.email, c.phone, c.current_address, c.stage,
+                   c.assessment_count, c.interview_count, c.last_result, c.can_edit,
+                   c.resume_link, c.cv_filename, c.cv_file IS NOT NULL AS has_cv,
+                   c.created_by, c.created_at, c.updated_at{form_cols}
+            FROM candidates c
+            ORDER BY c.id
+        """, keys
+    if dataset == "assessments":
+        return """
+            SELECT a.id, a.candidate_id, c.name AS candidate_name, c.email AS candidate_email,
+                   a.speed_test, a.accuracy_test, a.work_commitment, a.english_understanding,
+                   a.comments, a.created_at
+            FROM receptionist_assessments a
+                     JOIN candidates c ON c.candidate_id = a.candidate_id
+            ORDER BY a.id
+        """, ()
+    if dataset == "interviews":
+        note_cols = "".join(f",\n       i.notes_json ->> '{f}' AS {_quote_ident('note_' + f)}"
+                            for f in INTERVIEW_NOTE_FIELDS)
+        return f"""
+            SELECT i.id, i.candidate_id, c.name AS candidate_name, c.email AS candidate_email,
+                   i.scheduled_at, i.interviewer, i.interviewer_user_id, i.result, i.notes,
+                   i.created_at{note_cols}
+            FROM interviews i
+                     JOIN candidates c ON c.candidate_id = i.candidate_id
+            ORDER BY i.id
+        """, ()
+    raise ValueError(f"Unknown export dataset: {dataset}")
+
+
+def _cell(value: Any) -> Any:
+    """Values every writer accepts: JSON for containers, float for Decimal, naive datetimes."""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.replace(tzinfo=None)
+    return value
+
+
+def stream_rows(dataset: str, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Batch]:
+    """Yield (columns, type OIDs, batch of rows) from a server-side cursor; one batch in memory at a time."""
+    conn = get_conn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                sql, params = _dataset_sql(cur, dataset)
+            with conn.cursor(name=f"export_{dataset}") as cur:
+                cur.itersize = batch_size
+                cur.execute(sql, tuple(params))
+                batch = cur.fetchmany(batch_size)
+                columns = [d[0] for d in cur.description]
+                types = [d[1] for d in cur.description]
+                yield columns, types, [tuple(_cell(v) for v in row) for row in batch]  # header even when empty
+                while batch:
+                    batch = cur.fetchmany(batch_size)
+                    if batch:
+                        yield columns, types, [tuple(_cell(v) for v in row) for row in batch]
+    finally:
+        conn.close()
+
+
+# -----------------------------
+# Writers
+# -----------------------------
+def _write_csv(path: str, batches: Iterator[Batch]) -> int:
+    rows = 0
+    # utf-8-sig so Excel opens names with non-ASCII characters correctly
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        header = False
+        for columns, _, batch in batches:
+            if not header:
+                writer.writerow(columns)
+                header = True
+            writer.writerows(batch)
+            rows += len(batch)
+    return rows
+
+
+def _write_xlsx(path: str, batches: Iterator[Batch]) -> int:
+    workbook = Workbook(write_only=True)  # rows go straight to the temp XML, not kept in memory
+    sheet = workbook.create_sheet("export")
+    rows = 0
+    header = False
+    for columns, _, batch in batches:
+        if not header:
+            sheet.append(columns)
+            header = True
+        for row in batch:
+            sheet.append(row)
+        rows += len(batch)
+    workbook.save(path)
+    return rows
+
+
+# Postgres type OID -> Arrow type; anything not listed (text, varchar, json, ...) is written as string
+_ARROW_TYPES: Dict[int, Callable[[], Any]] = {
+    16: lambda: pa.bool_(),               # bool
+    17: lambda: pa.binary(),              # bytea
+    20: lambda: pa.int64(),               # int8
+    21: lambda: pa.int16(),               # int2
+    23: lambda: pa.int32(),               # int4
+    700: lambda: pa.float32(),            # float4
+    701: lambda: pa.float64(),            # float8
+    1700: lambda: pa.float64(),           # numeric (_cell turns Decimal into float)
+    1082: lambda: pa.date32(),            # date
+    1114: lambda: pa.timestamp("us"),     # timestamp
+    1184: lambda: pa.timestamp("us"),     # timestamptz (_cell drops the tzinfo)
+}
+
+
+def _parquet_schema(columns: List[str], types: List[int]) -> "pa.Schema":
+    """Schema from the cursor's column types, so it does not depend on what the first batch holds."""
+    return pa.schema([pa.field(name, _ARROW_TYPES.get(oid, pa.string)()) for name, oid in zip(columns, types)])
+
+
+def _write_parquet(path: str, batches: Iterator[Batch]) -> int:
+    writer = None
+    rows = 0
+    try:
+        for columns, types, batch in batches:
+            if writer is None:
+                writer = pq.ParquetWriter(path, _parquet_schema(columns, types))
+            data = {name: [row[i] for row in batch] for i, name in enumerate(columns)}
+            writer.write_table(pa.Table.from_pydict(data, schema=writer.schema))
+            rows += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+_WRITERS: Dict[str, Callable[[str, Iterator[Batch]], int]] = {
+    "csv": _write_csv,
+    "xlsx": _write_xlsx,
+    "parquet": _write_parquet,
+}
+
+
+def export(dataset: str, fmt: str = "csv", batch_size: int = EXPORT_BATCH_SIZE,
+           path: Optional[str] = None) -> ExportResult:
+    """
+    Write one dataset to `path` (default: a new temp file the caller should delete when done).
+    Raises ValueError for an unknown dataset or a format whose library is not installed.
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown export dataset: {dataset}")
+    if fmt not in available_formats():
+        raise ValueError(f"Export format not available: {fmt}")
+    extension, mime = FORMATS[fmt]
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix=f"export_{dataset}_", suffix=f".{extension}")
+        os.close(fd)
+
+    started = time.perf_counter()
+    try:
+        rows = _WRITERS[fmt](path, stream_rows(dataset, batch_size))
+    except Exception:
+        os.remove(path)
+        raise
+    seconds = time.perf_counter() - started
+    logger.info("Exported %d %s rows to %s in %.1fs", rows, dataset, path, seconds)
+    filename = f"{dataset}_{datetime.now():%Y%m%d_%H%M}.{extension}"
+    return ExportResult(path, filename, mime, rows, seconds)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset", choices=DATASETS)
+    parser.add_argument("--format", dest="fmt", choices=list(FORMATS), default="csv")
+    parser.add_argument("--out", help="output file (default: a temp file)")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    result = export(args.dataset, args.fmt, args.batch_size, args.out)
+    rate = result.rows / result.seconds if result.seconds else 0
+    print(f"Wrote {result.rows} rows to {result.path} in {result.seconds:.1f}s ({rate:.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,13 @@
 # interviewer.py
 import json
 from datetime import datetime, date, time
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Optional
 
 import streamlit as st
+import metrics
+import page_profiler
 from auth import get_current_user
 from db_postgres import (
-    get_all_candidates,
     search_candidates_by_name_or_email,
     get_interviews_for_candidate,
     create_interview,
@@ -17,35 +18,68 @@ from db_postgres import (
     get_candidate_history,
     get_interviewer_performance_stats,
     get_candidate_cv_secure,
-    get_conn
+    get_latest_assessments,
+    get_stage_queue,
+    get_stage_counts,
+    set_candidate_stage,
+    claim_next_candidates,
+    release_claim,
+    STAGE_TRANSITIONS,
+    WORK_QUEUES,
 )
 
+# Work queues (label -> candidate stages); searching looks across every stage instead.
+# "My desk" claims the next few candidates for this interviewer (see db_postgres.claim_next_candidates).
+MY_DESK = "🙋 My desk"
+DESK_SIZE = 5
+INTERVIEWER_QUEUES = {
+    MY_DESK: WORK_QUEUES["interviewer"],
+    "🗓️ Ready to schedule": ("assessed",),
+    "🎤 Scheduled": ("scheduled",),
+    "🔁 Interviewed": ("interviewed",),
+    "🎉 Offered": ("offered",),
+}
+QUEUE_PAGE_SIZE = 50
+
 
 # -------------------- Performance Optimizations --------------------
 
-@st.cache_data(ttl=30, show_spinner=False)
-def _get_candidates_cached(search_query=""):
-    """Cached candidate loading to avoid database reload after each action."""
+def _serializable(row: Dict[str, Any]) -> Dict[str, Any]:
+    serializable = {}
+    for key, value in row.items():
+        # Handle datetime objects
+        if hasattr(value, 'isoformat'):
+            serializable[key] = value.isoformat()
+        # Handle other non-serializable objects
+        elif value is None:
+            serializable[key] = None
+        else:
+            serializable[key] = str(value) if not isinstance(value, (str, int, float, bool, list, dict)) else value
+    return serializable
+
+
+@metrics.cache_data(ttl=30, show_spinner=False)
+def _get_candidates_cached(search_query="", stages=("assessed",), desk_user_id=None):
+    """
+    Cached candidate loading (a search, this user's claimed desk, else one stage queue;
+    each with its latest assessment) to avoid reloads after each action.
+    """
     try:
         if search_query and search_query.strip():
             candidates = search_candidates_by_name_or_email(search_query.strip())
+        elif desk_user_id is not None:
+            candidates = claim_next_candidates("interviewer", desk_user_id, DESK_SIZE)
         else:
-            candidates = search_candidates_by_name_or_email("")
+            candidates = get_stage_queue(list(stages), limit=QUEUE_PAGE_SIZE)
+
+        # Eligibility comes from the trigger-maintained assessment_count; details in one batched query
+        latest = get_latest_assessments([c["candidate_id"] for c in candidates if c.get("assessment_count")])
 
-        # Convert to serializable format
         serializable_candidates = []
         for candidate in candidates:
-            serializable_candidate = {}
-            for key, value in candidate.items():
-                # Handle datetime objects
-                if hasattr(value, 'isoformat'):
-                    serializable_candidate[key] = value.isoformat()
-                # Handle other non-serializable objects
-                elif value is None:
-                    serializable_candidate[key] = None
-                else:
-                    serializable_candidate[key] = str(value) if not isinstance(value, (str, int, float, bool, list,
-                                                                                       dict)) else value
+            serializable_candidate = _serializable(candidate)
+            assessment = latest.get(candidate["candidate_id"])
+            serializable_candidate["latest_assessment"] = _serializable(assessment) if assessment else None
             serializable_candidates.append(serializable_candidate)
 
         return serializable_candidates
@@ -54,7 +88,7 @@ def _get_candidates_cached(search_query=""):
         return []
 
 
-@st.cache_data(ttl=60, show_spinner=False)
+@metrics.cache_data(ttl=60, show_spinner=False)
 def _get_users_cached():
     """Cached users loading for permission management."""
     try:
@@ -81,9 +115,15 @@ def _get_users_cached():
         return []
 
 
+@metrics.cache_data(ttl=30, show_spinner=False)
+def _get_stage_counts_cached() -> Dict[str, int]:
+    return get_stage_counts()
+
+
 def _clear_candidates_cache():
     """Clear candidates cache for refresh."""
     _get_candidates_cached.clear()
+    _get_stage_counts_cached.clear()
 
 
 def _clear_users_cache():
@@ -96,7 +136,12 @@ def _clear_users_cache():
 def _check_user_permissions(user_id: int) -> Dict[str, Any]:
     """Check user permissions with strict enforcement."""
     try:
-        perms = get_user_permissions(user_id)
+        current = get_current_user()
+        if current and current.get("id") == user_id:
+            # Current user: flags from the verified session token, no DB round trip
+            perms = current
+        else:
+            perms = get_user_permissions(user_id)
         if not perms:
             return {"role": "user", "can_view_cvs": False, "can_delete_records": False, "can_manage_users": False}
 
@@ -129,62 +174,13 @@ def _get_cv_with_proper_access(candidate_id: str, user_id: int) -> tuple:
 
 # -------------------- Receptionist Assessment Functions --------------------
 
-def _get_receptionist_assessments(candidate_id: str) -> List[Dict[str, Any]]:
-    """Get receptionist assessments for a candidate."""
-    try:
-        conn = get_conn()
-        with conn.cursor() as cur:
-            # Check if receptionist_assessments table exists
-            cur.execute("""
-                        SELECT table_name
-                        FROM information_schema.tables
-                        WHERE table_schema = 'public'
-                          AND table_name = 'receptionist_assessments'
-                        """)
-            if not cur.fetchone():
-                return []
-
-            cur.execute("""
-                        SELECT id,
-                               created_at,
-                               speed_test,
-                               accuracy_test,
-                               work_commitment,
-                               english_understanding,
-                               comments
-                        FROM receptionist_assessments
-                        WHERE candidate_id = %s
-                        ORDER BY created_at DESC
-                        """, (candidate_id,))
-
-            assessments = []
-            for row in cur.fetchall():
-                assessments.append({
-                    'id': row[0],
-                    'created_at': row[1],
-                    'speed_test': row[2],
-                    'accuracy_test': row[3],
-                    'work_commitment': row[4],
-                    'english_understanding': row[5],
-                    'comments': row[6]
-                })
-
-        conn.close()
-        return assessments
-    except Exception as e:
-        st.warning(f"Could not load assessments: {e}")
-        return []
-
-
-def _render_assessment_summary(assessments: List[Dict[str, Any]]) -> bool:
+def _render_assessment_summary(latest: Optional[Dict[str, Any]], assessment_count: int) -> bool:
     """Render assessment summary and return eligibility status."""
-    if not assessments:
+    if not assessment_count or not latest:
         st.error("❌ **NOT ELIGIBLE FOR INTERVIEW** - No receptionist assessment completed")
         st.info("📋 Candidate must complete receptionist assessment before interview")
         return False
 
-    latest = assessments[0]  # Most recent assessment
-
     st.success("✅ **ELIGIBLE FOR INTERVIEW** - Receptionist assessment completed")
 
     with st.expander("📊 Latest Receptionist Assessment Results", expanded=True):
@@ -204,8 +200,8 @@ def _render_assessment_summary(assessments: List[Dict[str, Any]]) -> bool:
 
         st.caption(f"Assessed on: {latest['created_at']}")
 
-    if len(assessments) > 1:
-        st.caption(f"📈 Total assessments: {len(assessments)} (showing latest)")
+    if assessment_count > 1:
+        st.caption(f"📈 Total assessments: {assessment_count} (showing latest)")
 
     return True
 
@@ -377,15 +373,57 @@ def _structured_notes_ui(prefix: str) -> Dict[str, str]:
     return notes
 
 
-def _history_timeline(candidate_id: str):
-    """Render candidate history as a simple timeline."""
+NOTE_LABELS = {
+    "age": "Age",
+    "education": "Education",
+    "family_background": "Family Background",
+    "english": "English Understanding",
+    "experience_salary": "Experience & Salary",
+    "attitude": "Attitude",
+    "commitment": "Commitment",
+    "no_festival_leave": "No Festival Leave",
+    "own_pc": "Own PC/Laptop",
+    "continuous_night": "Continuous Night Shift",
+    "rotational_night": "Rotational Night Shift",
+    "profile_fit": "Profile Fit",
+    "project_fit": "Project Fit",
+    "grasping": "Grasping",
+    "other_notes": "Other Notes",
+}
+
+
+def _render_structured_notes(j: Dict[str, Any]):
+    """Render interviews.notes_json (already a dict; no parsing on rerun)."""
+    # Rich Markdown section
+    rich_md = j.get("rich_notes_md")
+    if rich_md:
+        st.markdown("#### Rich Notes")
+        st.markdown(str(rich_md))
+        st.markdown("---")
+
+    colL, colR = st.columns(2)
+    for idx, key in enumerate(NOTE_LABELS):
+        val = j.get(key, "")
+        if val:
+            with colL if idx % 2 == 0 else colR:
+                st.markdown(f"**{NOTE_LABELS[key]}:**  ")
+                st.markdown(str(val).replace("\n", "  \n"))
+
+
+def _history_timeline(candidate_id: str, page_size: int = 20):
+    """Render candidate history as a simple timeline, one page at a time (newest first)."""
     st.markdown("### 📜 Application History")
+    cursor_key = f"history_before_{candidate_id}"
+    before = st.session_state.get(cursor_key)
     try:
-        history_rows = get_candidate_history(candidate_id)
+        history_rows = get_candidate_history(candidate_id, limit=page_size + 1, before=before)
     except Exception as e:
         st.warning(f"Could not load history: {e}")
         history_rows = []
 
+    has_older = len(history_rows) > page_size
+    history_rows = history_rows[:page_size]
+
     if not history_rows:
         st.caption("No history available.")
         return
@@ -393,7 +431,7 @@ def _history_timeline(candidate_id: str):
     for row in history_rows:
         ts = row.get("created_at") or row.get("timestamp") or ""
         event = row.get("event") or "Updated"
-        detail = row.get("detail") or ""
+        detail = row.get("details") or ""
         icon = "🟢"
         ev_lower = event.lower()
         if "create" in ev_lower:
@@ -404,8 +442,20 @@ def _history_timeline(candidate_id: str):
             icon = "📎"
         elif "delete" in ev_lower:
             icon = "🗑️"
+        elif "interview" in ev_lower or "assessment" in ev_lower:
+            icon = "📝"
         st.write(f"{icon} {ts} — **{event}** {detail}")
 
+    col_newest, col_older = st.columns(2)
+    with col_newest:
+        if before is not None and st.button("⏮ Newest", key=f"history_newest_{candidate_id}"):
+            st.session_state.pop(cursor_key, None)
+            st.rerun()
+    with col_older:
+        if has_older and st.button("Older ▶", key=f"history_older_{candidate_id}"):
+            st.session_state[cursor_key] = history_rows[-1]["id"]
+            st.rerun()
+
 
 # -------------------- Permission Manager --------------------
 
@@ -477,6 +527,26 @@ def _permissions_manager_ui():
 
 # -------------------- Main Interviewer view --------------------
 
+def _stage_mover(candidate_id: str, stage: str, actor: Optional[str]):
+    """Offer / reject / reopen by hand; only the transitions db_postgres allows from this stage are listed."""
+    targets = STAGE_TRANSITIONS.get(stage, ())
+    if not targets:
+        return
+    c1, c2 = st.columns([2, 1])
+    with c1:
+        target = st.selectbox("Move to stage", targets, format_func=str.title, key=f"stage_{candidate_id}")
+    with c2:
+        st.write("")
+        if st.button("Move", key=f"move_{candidate_id}"):
+            ok, reason = set_candidate_stage(candidate_id, target, actor=actor)
+            if ok:
+                st.success(f"✅ Moved to {target.title()}.")
+                _clear_candidates_cache()
+                st.rerun()
+            else:
+                st.error(f"❌ Could not move candidate: {reason}")
+
+
 def interviewer_view():
     st.header("📝 Interviewer Dashboard")
 
@@ -528,13 +598,28 @@ def interviewer_view():
             _clear_candidates_cache()
             st.rerun()
 
+    stage_counts = _get_stage_counts_cached()
+    queue = st.radio(
+        "Queue",
+        list(INTERVIEWER_QUEUES),
+        format_func=lambda label: f"{label} ({sum(stage_counts.get(s, 0) for s in INTERVIEWER_QUEUES[label])})",
+        horizontal=True,
+        key="interviewer_queue",
+        disabled=bool(search_query and search_query.strip()),
+        help="Searching looks across all candidates regardless of queue",
+    )
+
     # Fetch candidates (cached for performance)
-    candidates = _get_candidates_cached(search_query)
+    with page_profiler.section("candidates"):
+        candidates = _get_candidates_cached(search_query, INTERVIEWER_QUEUES[queue],
+                                            user_id if queue == MY_DESK else None)
 
     if search_query and search_query.strip():
         st.info(f"Found {len(candidates)} candidate(s) for '{search_query}'.")
+    elif queue == MY_DESK:
+        st.info(f"{len(candidates)} candidate(s) claimed for you; finish or release them to get the next.")
     else:
-        st.info(f"Showing {len(candidates)} most recent candidate(s).")
+        st.info(f"Showing {len(candidates)} candidate(s) in this queue, longest waiting first.")
 
     if not candidates:
         st.warning("No candidates available.")
@@ -555,6 +640,13 @@ def interviewer_view():
                 st.write(f"**Email:** {cand.get('email', '—')}")
                 st.write(f"**Phone:** {cand.get('phone', '—')}")
                 st.write(f"**Created:** {cand.get('created_at', '—')}")
+                st.write(f"**Stage:** {(cand.get('stage') or 'applied').title()}")
+                _stage_mover(cid, cand.get("stage") or "applied", current_user.get("email"))
+                if queue == MY_DESK and not (search_query and search_query.strip()):
+                    if st.button("↩️ Release to queue", key=f"release_{cid}"):
+                        release_claim(cid, user_id)
+                        _clear_candidates_cache()
+                        st.rerun()
 
                 # Delete candidate (permission-based)
                 if perms.get("can_delete_records"):
@@ -586,23 +678,26 @@ def interviewer_view():
             # Receptionist Assessment Status (Critical for Interview Eligibility)
             st.markdown("---")
             st.subheader("📊 Assessment Status")
-            assessments = _get_receptionist_assessments(cid)
-            is_eligible = _render_assessment_summary(assessments)
+            is_eligible = _render_assessment_summary(cand.get("latest_assessment"),
+                                                     int(cand.get("assessment_count") or 0))
 
             # CV preview (full width; permission-aware)
             st.markdown("---")
-            _render_cv_section_with_access(cid, user_id, cand)
+            with page_profiler.section("card.cv"):
+                _render_cv_section_with_access(cid, user_id, cand)
 
             # History timeline
             st.markdown("---")
-            _history_timeline(cid)
+            with page_profiler.section("card.history"):
+                _history_timeline(cid)
 
             # Interviews list
             st.markdown("---")
             st.subheader("🎤 Interview History")
 
             try:
-                existing = get_interviews_for_candidate(cid)
+                with page_profiler.section("card.interviews"):
+                    existing = get_interviews_for_candidate(cid)
             except Exception as e:
                 existing = []
                 st.warning(f"Could not load interviews: {e}")
@@ -615,69 +710,19 @@ def interviewer_view():
                     with st.container():
                         st.write(f"**When:** {sch}  &nbsp;&nbsp; **Status:** {badge}")
                         st.write(f"**Interviewer:** {row.get('interviewer', '—')}")
+                        notes_data = row.get("notes_json")
                         notes = row.get("notes")
-                        if notes:
-                            try:
-                                j = json.loads(notes)
-                                LABELS = {
-                                    "age": "Age",
-                                    "education": "Education",
-                                    "family_background": "Family Background",
-                                    "english": "English Understanding",
-                                    "experience_salary": "Experience & Salary",
-                                    "attitude": "Attitude",
-                                    "commitment": "Commitment",
-                                    "no_festival_leave": "No Festival Leave",
-                                    "own_pc": "Own PC/Laptop",
-                                    "continuous_night": "Continuous Night Shift",
-                                    "rotational_night": "Rotational Night Shift",
-                                    "profile_fit": "Profile Fit",
-                                    "project_fit": "Project Fit",
-                                    "grasping": "Grasping",
-                                    "other_notes": "Other Notes",
-                                }
-                                ORDER = [
-                                    "age", "education", "family_background", "english", "experience_salary",
-                                    "attitude", "commitment", "no_festival_leave", "own_pc",
-                                    "continuous_night", "rotational_night", "profile_fit", "project_fit",
-                                    "grasping", "other_notes"
-                                ]
-
-                                created_at_val = row.get("created_at")
-                                ts_str = str(created_at_val or sch or "")
-                                interviewer_name = row.get("interviewer", "—")
-                                exp_label = f"Notes — {interviewer_name} • {ts_str}" if (
-                                            interviewer_name or ts_str) else "Notes"
-
-                                with st.expander(exp_label, expanded=False):
-                                    # Rich Markdown section
-                                    rich_md = j.get("rich_notes_md")
-                                    if rich_md:
-                                        st.markdown("#### Rich Notes")
-                                        st.markdown(str(rich_md))
-                                        st.markdown("---")
-
-                                    colL, colR = st.columns(2)
-                                    for idx, key in enumerate(ORDER):
-                                        val = j.get(key, "")
-                                        if val:
-                                            label = LABELS.get(key, key.replace('_', ' ').title())
-                                            if idx % 2 == 0:
-                                                with colL:
-                                                    st.markdown(f"**{label}:**  ")
-                                                    st.markdown(str(val).replace("\n", "  \n"))
-                                            else:
-                                                with colR:
-                                                    st.markdown(f"**{label}:**  ")
-                                                    st.markdown(str(val).replace("\n", "  \n"))
-                            except Exception:
-                                # Fallback for plain text notes
-                                created_at_val = row.get("created_at")
-                                ts_str = str(created_at_val or sch or "")
-                                interviewer_name = row.get("interviewer", "—")
-                                exp_label = f"Notes — {interviewer_name} • {ts_str}" if (
-                                            interviewer_name or ts_str) else "Notes"
-                                with st.expander(exp_label, expanded=False):
+                        if notes_data or notes:
+                            created_at_val = row.get("created_at")
+                            ts_str = str(created_at_val or sch or "")
+                            interviewer_name = row.get("interviewer", "—")
+                            exp_label = f"Notes — {interviewer_name} • {ts_str}" if (
+                                        interviewer_name or ts_str) else "Notes"
+                            with st.expander(exp_label, expanded=False):
+                                if isinstance(notes_data, dict):
+                                    _render_structured_notes(notes_data)
+                                else:
+                                    # Plain text notes
                                     st.markdown(str(notes).replace("\n", "  \n"))
                         st.divider()
             else:
@@ -701,18 +746,20 @@ def interviewer_view():
                 interviewer_name = st.text_input("Interviewer Name", key=f"iv_{cid}")
                 result = st.text_input("Result (scheduled/completed/pass/fail/on_hold)", key=f"res_{cid}")
 
-                structured = _structured_notes_ui(prefix=f"notes_{cid}")
+                with page_profiler.section("card.form"):
+                    structured = _structured_notes_ui(prefix=f"notes_{cid}")
 
                 if st.button("Save Interview", key=f"save_{cid}"):
                     try:
                         scheduled_dt = datetime.combine(d, t)
-                        notes_json = json.dumps(structured, ensure_ascii=False)
                         iid = create_interview(
                             cid,
                             scheduled_dt,
                             interviewer_name.strip(),
                             result.strip() if result else "scheduled",
-                            notes_json,
+                            notes=structured.get("summary") or None,
+                            notes_data=structured,
+                            interviewer_user_id=user_id,
                         )
                         if iid:
                             st.success(f"✅ Interview saved (ID: {iid}).")
@@ -733,18 +780,21 @@ def interviewer_view():
             st.rerun()
 
     with cols[1]:
-        total = len(_get_candidates_cached(""))
+        total = sum(stage_counts.values())
         st.metric("Total Candidates", total)
 
     with cols[2]:
         try:
-            stats = get_interviewer_performance_stats(current_user.get("id"))
+            with page_profiler.section("interviewer stats"):
+                stats = get_interviewer_performance_stats(current_user.get("id"))
             if stats:
                 success_rate = stats.get("success_rate")
                 scheduled = stats.get("scheduled", 0)
                 completed = stats.get("completed", 0)
                 st.metric("Success Rate", f"{success_rate}%")
                 st.caption(f"Scheduled: {scheduled}  •  Completed: {completed}")
+                if stats.get("avg_hours_assessment_to_interview") is not None:
+                    st.caption(f"Avg. assessment → interview: {stats['avg_hours_assessment_to_interview']} h")
             else:
                 st.caption("No interviewer stats available.")
         except Exception:
@@ -5,6 +5,7 @@ import os
 LOG_PATH = os.getenv("LOG_PATH", "./logs")
 os.makedirs(LOG_PATH, exist_ok=True)
 LOG_FILE = os.path.join(LOG_PATH, "app.log")
+SLOW_QUERY_LOG_FILE = os.path.join(LOG_PATH, "slow_queries.log")
 
 logging.basicConfig(
     level=logging.INFO,
@@ -14,3 +15,10 @@ logging.basicConfig(
         logging.StreamHandler()
     ]
 )
+
+# Slow statements from db_instrumentation: one JSON object per line, kept out of app.log
+_slow_handler = logging.FileHandler(SLOW_QUERY_LOG_FILE)
+_slow_handler.setFormatter(logging.Formatter("%(message)s"))
+_slow_logger = logging.getLogger("db.slow")
+_slow_logger.addHandler(_slow_handler)
+_slow_logger.propagate = False
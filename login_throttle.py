@@ -0,0 +1,182 @@
+# login_throttle.py
+"""
+Login throttling.
+
+Every login attempt takes a token from a per-email and a per-IP bucket before
+any bcrypt work happens. Buckets live in process memory by default, or in the
+login_throttle table (LOGIN_THROTTLE_BACKEND=postgres) so replicas share them.
+
+Unknown emails are checked against a dummy hash so they cost the same as a
+wrong password, and at most LOGIN_MAX_CONCURRENT_VERIFY bcrypt checks run at
+once per process; the rest wait briefly and are then rejected as "busy".
+"""
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+import metrics
+import password_hasher
+from db_postgres import get_conn, get_user_by_email
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_BACKEND = os.getenv("LOGIN_THROTTLE_BACKEND", "memory").lower()
+
+# capacity = burst size, refill = tokens per second
+EMAIL_BUCKET_CAPACITY = float(os.getenv("LOGIN_EMAIL_BURST", "5"))
+EMAIL_BUCKET_REFILL = float(os.getenv("LOGIN_EMAIL_PER_MIN", "1")) / 60.0
+IP_BUCKET_CAPACITY = float(os.getenv("LOGIN_IP_BURST", "20"))
+IP_BUCKET_REFILL = float(os.getenv("LOGIN_IP_PER_MIN", "10")) / 60.0
+
+MAX_CONCURRENT_VERIFY = int(os.getenv("LOGIN_MAX_CONCURRENT_VERIFY", "0")) or (os.cpu_count() or 2)
+VERIFY_WAIT_SECONDS = float(os.getenv("LOGIN_VERIFY_WAIT_SECONDS", "5"))
+
+_verify_slots = threading.BoundedSemaphore(MAX_CONCURRENT_VERIFY)
+
+
+# -----------------------------
+# Token buckets
+# -----------------------------
+class _MemoryBuckets:
+    """Process-local token buckets keyed by string."""
+
+    def __init__(self, max_keys: int = 50_000):
+        self._state: Dict[str, Tuple[float, float]] = {}  # key -> (tokens, last_refill)
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+
+    def take(self, key: str, capacity: float, refill_per_sec: float) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._state.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * refill_per_sec)
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            self._state[key] = (tokens, now)
+            if len(self._state) > self._max_keys:
+                self._prune(now, capacity, refill_per_sec)
+            return allowed
+
+    def _prune(self, now: float, capacity: float, refill_per_sec: float):
+        # Drop buckets that would have refilled completely by now
+        full_after = capacity / refill_per_sec if refill_per_sec > 0 else 0
+        for k in [k for k, (_, last) in self._state.items() if now - last > full_after]:
+            del self._state[k]
+
+
+class _PostgresBuckets:
+    """Token buckets in the login_throttle table; one atomic upsert per check."""
+
+    def take(self, key: str, capacity: float, refill_per_sec: float) -> bool:
+        refilled = ("LEAST(%(cap)s, login_throttle.tokens "
+                    "+ EXTRACT(EPOCH FROM (now() - login_throttle.updated_at)) * %(rate)s)")
+        conn = get_conn()
+        try:
+            with conn, conn.cursor() as cur:
+                cur.execute(f"""
+                    INSERT INTO login_throttle (bucket_key, tokens, allowed, updated_at)
+                    VALUES (%(key)s, %(cap)s - 1, TRUE, now())
+                    ON CONFLICT (bucket_key) DO UPDATE
+                        SET tokens = CASE WHEN {refilled} >= 1 THEN {refilled} - 1 ELSE {refilled} END,
+                            allowed = {refilled} >= 1,
+                            updated_at = now()
+                    RETURNING allowed
+                """, {"key": key, "cap": capacity, "rate": refill_per_sec})
+                return bool(cur.fetchone()[0])
+        finally:
+            conn.close()
+
+
+_buckets = _PostgresBuckets() if THROTTLE_BACKEND == "postgres" else _MemoryBuckets()
+
+
+# -----------------------------
+# Metrics
+# -----------------------------
+_metrics_lock = threading.Lock()
+_outcomes: Dict[str, int] = {"ok": 0, "invalid": 0, "throttled": 0, "busy": 0}
+_latencies = deque(maxlen=2000)  # seconds, most recent attempts
+
+
+def _record(outcome: str, started: float):
+    elapsed = time.perf_counter() - started
+    with _metrics_lock:
+        _outcomes[outcome] = _outcomes.get(outcome, 0) + 1
+        _latencies.append(elapsed)
+    metrics.LOGINS.inc(outcome=outcome)
+    metrics.LOGIN_SECONDS.observe(elapsed)
+
+
+def _percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def get_login_metrics() -> Dict[str, Any]:
+    """Snapshot of login outcomes and latency (p50/p95/max in seconds) for this process."""
+    with _metrics_lock:
+        lat = list(_latencies)
+        outcomes = dict(_outcomes)
+    return {
+        "outcomes": outcomes,
+        "rejections": outcomes.get("throttled", 0) + outcomes.get("busy", 0),
+        "latency_p50": _percentile(lat, 50),
+        "latency_p95": _percentile(lat, 95),
+        "latency_max": max(lat) if lat else 0.0,
+        "max_concurrent_verify": MAX_CONCURRENT_VERIFY,
+    }
+
+
+# -----------------------------
+# Login check
+# -----------------------------
+_dummy_hash: Optional[str] = None
+
+
+def _get_dummy_hash() -> str:
+    """Hash at the configured cost, so unknown users pay the same bcrypt price as real ones."""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = password_hasher.hash_one("dummy-password-for-timing")
+    return _dummy_hash
+
+
+def check_login(email: str, password: str, ip: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Throttled credential check.
+    Returns (user_row, reason) where reason ∈ {"ok", "invalid", "throttled", "busy"}.
+    user_row is only set when reason == "ok".
+    """
+    started = time.perf_counter()
+    email_key = (email or "").strip().lower()
+
+    allowed = _buckets.take(f"email:{email_key}", EMAIL_BUCKET_CAPACITY, EMAIL_BUCKET_REFILL)
+    if allowed and ip:
+        allowed = _buckets.take(f"ip:{ip}", IP_BUCKET_CAPACITY, IP_BUCKET_REFILL)
+    if not allowed:
+        logger.warning("Login throttled for %s (ip=%s)", email_key, ip)
+        _record("throttled", started)
+        return None, "throttled"
+
+    if not _verify_slots.acquire(timeout=VERIFY_WAIT_SECONDS):
+        logger.warning("Login rejected, all %d verify slots busy", MAX_CONCURRENT_VERIFY)
+        _record("busy", started)
+        return None, "busy"
+    try:
+        user = get_user_by_email(email)
+        password_hash = user["password_hash"] if user else _get_dummy_hash()
+        ok = password_hasher.verify_one(password, password_hash)
+    finally:
+        _verify_slots.release()
+
+    if user and ok:
+        _record("ok", started)
+        return user, "ok"
+    _record("invalid", started)
+    return None, "invalid"
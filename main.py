@@ -1,5 +1,6 @@
 # main.py
 import streamlit as st
+import logging_setup  # noqa: F401  (configures app + slow-query logs)
 from auth import (
     auth_router,
     is_logged_in,
@@ -14,11 +15,25 @@ import interviewer
 import receptionist
 import candidate_view
 import admin
+import metrics
+import page_profiler
+import db_migrations
 
 
 # === INIT ===
 st.set_page_config(page_title="BRV Recruitment", layout="wide")
+
+
+@st.cache_resource(show_spinner=False)
+def _migrate_schema():
+    """Apply pending schema migrations once per server process (advisory-locked across replicas)."""
+    return db_migrations.migrate()
+
+
+_migrate_schema()
 seed_users_if_needed()
+metrics.install_listeners()
+metrics.start_server()
 
 
 # === SIDEBAR NAVIGATION ===
@@ -40,6 +55,9 @@ def sidebar_navigation():
     if st.sidebar.button("Logout"):
         logout()
 
+    if role in page_profiler.OVERLAY_ROLES:
+        st.sidebar.checkbox("⏱️ Show timing overlay", key="show_timing_overlay")
+
     # Core nav items
     pages = {}
 
@@ -97,7 +115,12 @@ def router(page: str):
 # === ENTRY POINT ===
 def main():
     page = sidebar_navigation()
-    router(page)
+    user = get_current_user() if page != "auth" else None
+    role = (user or {}).get("role")
+    with page_profiler.profile_page(page, role) as profile:
+        router(page)
+        if page_profiler.overlay_enabled(role):
+            page_profiler.render_overlay(profile)
 
 
 if __name__ == "__main__":
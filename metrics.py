@@ -0,0 +1,333 @@
+# metrics.py
+"""
+In-process metrics in the Prometheus text exposition format.
+
+    REQUESTS = metrics.counter("app_things_total", "Things done", ["kind"])
+    REQUESTS.inc(kind="x")
+
+start_server() serves /metrics on METRICS_PORT from a daemon thread, once per
+process (main.py calls it on every rerun; only the first call binds). Set
+METRICS_PORT=0 to disable; start_server(port=0) binds an ephemeral port, which
+is what tests use. No client library needed.
+
+App-wide metrics defined here: page renders (via page_profiler), DB query
+latency (via db_instrumentation), connection pool gauges, st.cache_data hit
+counters (use metrics.cache_data in place of st.cache_data), CV bytes served,
+emails and login outcomes.
+"""
+import os
+import math
+import logging
+import functools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+METRICS_ADDRESS = os.getenv("METRICS_ADDRESS", "0.0.0.0")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# -----------------------------
+# Metric types
+# -----------------------------
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...], extra: Optional[Dict[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, key)) + list((extra or {}).items())
+        if not pairs:
+            return ""
+        body = ",".join(f'{n}="{_escape(v)}"' for n, v in pairs)
+        return "{" + body + "}"
+
+    def samples(self) -> Iterable[str]:
+        return []
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{self._labels(k)} {_num(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Set directly, or give a callback returning a number or {label tuple: number} at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, *args, callback: Optional[Callable] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        values = dict(self._values)
+        if self._callback is not None:
+            try:
+                result = self._callback()
+            except Exception as e:
+                logger.debug("Gauge %s callback failed: %s", self.name, e)
+                result = None
+            if isinstance(result, dict):
+                values.update(result)
+            elif result is not None:
+                values[()] = result
+        return [f"{self.name}{self._labels(k)} {_num(v)}" for k, v in values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], list] = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for key, state in items:
+            for bound, count in zip(self.buckets, state):
+                lines.append(f"{self.name}_bucket{self._labels(key, {'le': _num(bound)})} {count}")
+            lines.append(f"{self.name}_bucket{self._labels(key, {'le': '+Inf'})} {state[-1]}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_num(state[-2])}")
+            lines.append(f"{self.name}_count{self._labels(key)} {state[-1]}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(value: float) -> str:
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# -----------------------------
+# Registry
+# -----------------------------
+_registry: Dict[str, _Metric] = {}
+_registry_lock = threading.Lock()
+
+
+def _register(metric: _Metric) -> _Metric:
+    with _registry_lock:
+        existing = _registry.get(metric.name)
+        if existing is not None:
+            return existing
+        _registry[metric.name] = metric
+        return metric
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return _register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = (), callback: Optional[Callable] = None) -> Gauge:
+    return _register(Gauge(name, documentation, labelnames, callback=callback))
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return _register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+
+def render() -> str:
+    with _registry_lock:
+        metrics = list(_registry.values())
+    lines: List[str] = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------------
+# HTTP exporter
+# -----------------------------
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):  # keep scrapes out of the app log
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_server(port: Optional[int] = None, address: Optional[str] = None) -> Optional[int]:
+    """Start the /metrics endpoint once per process; returns the bound port (None if disabled/failed)."""
+    global _server
+    if port is None:
+        if METRICS_PORT <= 0:
+            return None
+        port = METRICS_PORT
+    with _server_lock:
+        if _server is not None:
+            return _server.server_address[1]
+        try:
+            _server = ThreadingHTTPServer((address or METRICS_ADDRESS, port), _Handler)
+        except OSError as e:
+            logger.warning("Metrics server not started on port %s: %s", port, e)
+            return None
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        logger.info("Metrics available on :%s/metrics", _server.server_address[1])
+        return _server.server_address[1]
+
+
+def stop_server():
+    global _server
+    with _server_lock:
+        if _server is not None:
+            _server.shutdown()
+            _server.server_close()
+            _server = None
+
+
+# -----------------------------
+# st.cache_data with hit/miss counters
+# -----------------------------
+CACHE_CALLS = counter("app_cache_calls_total", "Calls to st.cache_data functions", ["function"])
+CACHE_MISSES = counter("app_cache_misses_total", "st.cache_data calls that ran the function body", ["function"])
+
+
+def cache_data(func=None, **cache_kwargs):
+    """Drop-in for @st.cache_data(...) that also counts calls and misses per function."""
+    import streamlit as st
+
+    def decorate(fn):
+        name = f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def _miss(*args, **kwargs):
+            CACHE_MISSES.inc(function=name)
+            return fn(*args, **kwargs)
+
+        cached = st.cache_data(**cache_kwargs)(_miss)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            CACHE_CALLS.inc(function=name)
+            return cached(*args, **kwargs)
+
+        wrapper.clear = cached.clear
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
+
+
+# -----------------------------
+# App metrics
+# -----------------------------
+PAGE_RENDER_SECONDS = histogram("app_page_render_seconds", "Full page rerun time", ["page", "role"],
+                                buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0))
+PAGE_DB_CALLS = counter("app_page_db_calls_total", "DB round trips made during page reruns", ["page"])
+DB_QUERY_SECONDS = histogram("app_db_query_seconds", "DB statement latency", ["caller"])
+DB_QUERY_BYTES = counter("app_db_query_bytes_total", "Approximate bytes fetched from the DB", ["caller"])
+CV_BYTES_SERVED = counter("app_cv_bytes_served_total", "CV file bytes returned to users", [])
+CV_REQUESTS = counter("app_cv_requests_total", "CV access requests by outcome", ["outcome"])
+EMAILS = counter("app_emails_total", "Outgoing emails by kind and outcome", ["kind", "outcome"])
+LOGINS = counter("app_logins_total", "Login attempts by outcome", ["outcome"])
+LOGIN_SECONDS = histogram("app_login_seconds", "Login check latency", [],
+                          buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0))
+
+
+def record_email(kind: str, ok: bool):
+    EMAILS.inc(kind=kind, outcome="sent" if ok else "failed")
+
+
+def _pool_gauge() -> Dict[Tuple[str, ...], float]:
+    import query_registry
+    import db_async
+    values: Dict[Tuple[str, ...], float] = {}
+    for pool_name, stats in (("sync", query_registry.pool_stats()), ("async", db_async.pool_stats())):
+        for key, value in stats.items():
+            values[(pool_name, key)] = value
+    return values
+
+
+gauge("app_db_pool_connections", "Connection pool state (size / in_use / max / waiting)",
+      ["pool", "state"], callback=_pool_gauge)
+
+
+def _on_query(entry):
+    caller = entry.get("caller") or "unknown"
+    DB_QUERY_SECONDS.observe(entry["seconds"], caller=caller)
+    DB_QUERY_BYTES.inc(entry.get("bytes") or 0, caller=caller)
+
+
+def _on_page(profile):
+    PAGE_RENDER_SECONDS.observe(profile.total_seconds, page=profile.page, role=(profile.role or "anonymous"))
+    PAGE_DB_CALLS.inc(profile.db_calls, page=profile.page)
+
+
+def install_listeners():
+    """Hook DB and page profiler events into the metrics above (idempotent)."""
+    import db_instrumentation
+    import page_profiler
+    db_instrumentation.add_listener(_on_query)
+    page_profiler.add_listener(_on_page)
@@ -0,0 +1,109 @@
+-- 0001_baseline.sql
+-- Schema as previously built by init_db(). Written to be a no-op on databases
+-- that init_db() already created, so existing installs adopt it cleanly.
+
+CREATE TABLE IF NOT EXISTS users
+(
+    id SERIAL PRIMARY KEY,
+    email VARCHAR(255) UNIQUE NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    role VARCHAR(50) NOT NULL DEFAULT 'candidate',
+    force_password_reset BOOLEAN DEFAULT FALSE,
+    can_view_cvs BOOLEAN DEFAULT FALSE,
+    can_delete_records BOOLEAN DEFAULT FALSE,
+    can_grant_delete BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+-- Bumped on every permission/role change; session tokens carry it (see auth.py)
+ALTER TABLE users ADD COLUMN IF NOT EXISTS permissions_version INTEGER NOT NULL DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS candidates
+(
+    id SERIAL PRIMARY KEY,
+    candidate_id VARCHAR(50) UNIQUE NOT NULL,
+    name VARCHAR(255),
+    email VARCHAR(255),
+    phone VARCHAR(50),
+    address TEXT, -- keep for older data (unused by UI)
+    form_data JSONB DEFAULT '{}'::jsonb,
+    resume_link TEXT,
+    can_edit BOOLEAN DEFAULT FALSE,
+    created_by VARCHAR(100),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+-- Expanded pre-interview fields
+ALTER TABLE candidates
+    ADD COLUMN IF NOT EXISTS current_address TEXT,
+    ADD COLUMN IF NOT EXISTS permanent_address TEXT,
+    ADD COLUMN IF NOT EXISTS dob DATE,
+    ADD COLUMN IF NOT EXISTS caste VARCHAR(100),
+    ADD COLUMN IF NOT EXISTS sub_caste VARCHAR(100),
+    ADD COLUMN IF NOT EXISTS marital_status VARCHAR(50),
+    ADD COLUMN IF NOT EXISTS highest_qualification VARCHAR(255),
+    ADD COLUMN IF NOT EXISTS work_experience TEXT,
+    ADD COLUMN IF NOT EXISTS referral VARCHAR(255),
+    ADD COLUMN IF NOT EXISTS ready_festivals BOOLEAN DEFAULT FALSE,
+    ADD COLUMN IF NOT EXISTS ready_late_nights BOOLEAN DEFAULT FALSE,
+    ADD COLUMN IF NOT EXISTS cv_file BYTEA,
+    ADD COLUMN IF NOT EXISTS cv_filename TEXT;
+
+CREATE TABLE IF NOT EXISTS interviews
+(
+    id SERIAL PRIMARY KEY,
+    candidate_id VARCHAR(50) NOT NULL REFERENCES candidates (candidate_id) ON DELETE CASCADE,
+    scheduled_at TIMESTAMP,
+    interviewer VARCHAR(255),
+    result VARCHAR(50),
+    notes TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS receptionist_assessments
+(
+    id SERIAL PRIMARY KEY,
+    candidate_id VARCHAR(50) NOT NULL REFERENCES candidates (candidate_id) ON DELETE CASCADE,
+    speed_test INTEGER,
+    accuracy_test INTEGER,
+    work_commitment TEXT,
+    english_understanding TEXT,
+    comments TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Shared token buckets, see login_throttle.py
+CREATE TABLE IF NOT EXISTS login_throttle
+(
+    bucket_key VARCHAR(320) PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    allowed BOOLEAN NOT NULL DEFAULT TRUE,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Append-only candidate history; no FK so deletes stay on record
+CREATE TABLE IF NOT EXISTS candidate_events
+(
+    id BIGSERIAL PRIMARY KEY,
+    candidate_id VARCHAR(50) NOT NULL,
+    event_type VARCHAR(50) NOT NULL,
+    actor VARCHAR(255),
+    data JSONB NOT NULL DEFAULT '{}'::jsonb,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Per-page render latency windows, see page_profiler.py
+CREATE TABLE IF NOT EXISTS page_metrics
+(
+    id SERIAL PRIMARY KEY,
+    page VARCHAR(64) NOT NULL,
+    window_start TIMESTAMPTZ NOT NULL,
+    window_end TIMESTAMPTZ NOT NULL,
+    renders INTEGER NOT NULL,
+    p50_ms DOUBLE PRECISION NOT NULL,
+    p95_ms DOUBLE PRECISION NOT NULL,
+    max_ms DOUBLE PRECISION NOT NULL,
+    avg_db_calls DOUBLE PRECISION NOT NULL,
+    avg_db_bytes DOUBLE PRECISION NOT NULL
+);
@@ -0,0 +1,31 @@
+# migrations/0002_backfill_candidate_events.py
+"""Seed candidate_events from existing rows (only when the log is still empty)."""
+
+
+def upgrade(cur):
+    cur.execute("SELECT 1 FROM candidate_events LIMIT 1")
+    if cur.fetchone():
+        return
+    cur.execute("""
+                INSERT INTO candidate_events (candidate_id, event_type, actor, data, created_at)
+                SELECT candidate_id, 'candidate_created', created_by, jsonb_build_object('name', name),
+                       COALESCE(created_at, CURRENT_TIMESTAMP)
+                FROM candidates
+                """)
+    cur.execute("""
+                INSERT INTO candidate_events (candidate_id, event_type, actor, data, created_at)
+                SELECT candidate_id, 'assessment_recorded', 'receptionist',
+                       jsonb_build_object('assessment_id', id, 'speed_test', speed_test,
+                                          'accuracy_test', accuracy_test, 'work_commitment', work_commitment,
+                                          'english_understanding', english_understanding, 'comments', comments),
+                       COALESCE(created_at, CURRENT_TIMESTAMP)
+                FROM receptionist_assessments
+                """)
+    cur.execute("""
+                INSERT INTO candidate_events (candidate_id, event_type, actor, data, created_at)
+                SELECT candidate_id, 'interview_recorded', interviewer,
+                       jsonb_build_object('interview_id', id, 'result', result, 'interviewer', interviewer,
+                                          'scheduled_at', scheduled_at, 'notes', notes),
+                       COALESCE(created_at, CURRENT_TIMESTAMP)
+                FROM interviews
+                """)
@@ -0,0 +1,51 @@
+# migrations/0003_indexes.py
+"""
+Secondary indexes for the hot read paths (and retire the one they supersede).
+
+The DDL is spelled out here rather than read from db_indexes.INDEXES: a
+migration must do the same thing every time it runs, whatever later code
+adds to that list. Trigram indexes need pg_trgm; without the privilege to
+create it they are skipped and substring search falls back to a scan.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_candidates_created_at ON candidates (created_at DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_candidates_updated_at ON candidates (updated_at DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_candidates_name ON candidates (name)",
+    "CREATE INDEX IF NOT EXISTS idx_candidates_email ON candidates (email)",
+    "CREATE INDEX IF NOT EXISTS idx_assessments_candidate_created"
+    " ON receptionist_assessments (candidate_id, created_at DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_interviews_candidate_created ON interviews (candidate_id, created_at DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_interviews_interviewer_result ON interviews (interviewer, result)",
+    "CREATE INDEX IF NOT EXISTS idx_interviews_result_lower ON interviews (LOWER(result))",
+    "CREATE INDEX IF NOT EXISTS idx_interviews_event_time ON interviews (COALESCE(scheduled_at, created_at))",
+    "CREATE INDEX IF NOT EXISTS idx_candidate_events_candidate_created"
+    " ON candidate_events (candidate_id, created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_page_metrics_page_window ON page_metrics (page, window_start DESC)",
+]
+
+TRGM_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_candidates_name_trgm ON candidates USING gin (LOWER(name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_candidates_email_trgm ON candidates USING gin (LOWER(email) gin_trgm_ops)",
+]
+
+
+def upgrade(cur):
+    for ddl in INDEXES:
+        cur.execute(ddl)
+
+    cur.execute("SAVEPOINT pg_trgm")
+    try:
+        cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for ddl in TRGM_INDEXES:
+            cur.execute(ddl)
+        cur.execute("RELEASE SAVEPOINT pg_trgm")
+    except Exception as e:
+        cur.execute("ROLLBACK TO SAVEPOINT pg_trgm")
+        logger.warning("pg_trgm unavailable, skipping trigram indexes: %s", e)
+
+    # superseded by idx_interviews_candidate_created (same leading column)
+    cur.execute("DROP INDEX IF EXISTS idx_interviews_candidate_id")
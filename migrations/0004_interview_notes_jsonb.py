@@ -0,0 +1,31 @@
+# migrations/0004_interview_notes_jsonb.py
+"""Structured interview notes move from JSON-in-TEXT (interviews.notes) to interviews.notes_json JSONB."""
+import json
+
+from psycopg2.extras import Json, execute_values
+
+
+def upgrade(cur):
+    cur.execute("ALTER TABLE interviews ADD COLUMN IF NOT EXISTS notes_json JSONB")
+
+    # Parse once here instead of on every rerun; plain-text notes stay in notes with notes_json NULL
+    cur.execute("SELECT id, notes FROM interviews WHERE notes_json IS NULL AND LTRIM(notes) LIKE '{%'")
+    parsed = []
+    for interview_id, notes in cur.fetchall():
+        try:
+            data = json.loads(notes)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            parsed.append((interview_id, Json(data)))
+    if parsed:
+        execute_values(cur, """
+            UPDATE interviews SET notes_json = v.data::jsonb
+            FROM (VALUES %s) AS v(id, data)
+            WHERE interviews.id = v.id
+        """, parsed, page_size=500)
+
+    cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_interviews_notes_json
+                    ON interviews USING gin (notes_json jsonb_path_ops)
+                """)
@@ -0,0 +1,32 @@
+# migrations/0005_interviewer_user_id.py
+"""Link interviews to the interviewing user; backfill from the free-text interviewer name where unambiguous."""
+
+
+def upgrade(cur):
+    cur.execute("""
+                ALTER TABLE interviews
+                    ADD COLUMN IF NOT EXISTS interviewer_user_id INTEGER REFERENCES users (id) ON DELETE SET NULL
+                """)
+    # "neha.mehta@x.com" matches "neha.mehta@x.com", "Neha Mehta" and "neha_mehta"; skip names matching several users
+    cur.execute(r"""
+                WITH matches AS (
+                    SELECT i.id AS interview_id, MIN(u.id) AS user_id
+                    FROM interviews i
+                    JOIN users u
+                      ON LOWER(TRIM(i.interviewer)) = LOWER(u.email)
+                      OR REGEXP_REPLACE(LOWER(TRIM(i.interviewer)), '[\s_\-]+', '.', 'g')
+                         = REGEXP_REPLACE(LOWER(SPLIT_PART(u.email, '@', 1)), '[_\-]+', '.', 'g')
+                    WHERE i.interviewer_user_id IS NULL
+                      AND COALESCE(TRIM(i.interviewer), '') <> ''
+                    GROUP BY i.id
+                    HAVING COUNT(DISTINCT u.id) = 1
+                )
+                UPDATE interviews i
+                SET interviewer_user_id = m.user_id
+                FROM matches m
+                WHERE i.id = m.interview_id
+                """)
+    cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_interviews_interviewer_user
+                    ON interviews (interviewer_user_id, result)
+                """)
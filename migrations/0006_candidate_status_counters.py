@@ -0,0 +1,102 @@
+# migrations/0006_candidate_status_counters.py
+"""
+Denormalized per-candidate status on candidates, kept current by triggers on
+receptionist_assessments and interviews (so every writer, including bulk
+loads, stays consistent):
+
+    assessment_count, last_assessed_at       eligibility = assessment_count > 0
+    interview_count, last_interview_at, last_result
+"""
+
+
+def upgrade(cur):
+    cur.execute("""
+                ALTER TABLE candidates
+                    ADD COLUMN IF NOT EXISTS assessment_count INTEGER NOT NULL DEFAULT 0,
+                    ADD COLUMN IF NOT EXISTS last_assessed_at TIMESTAMP,
+                    ADD COLUMN IF NOT EXISTS interview_count INTEGER NOT NULL DEFAULT 0,
+                    ADD COLUMN IF NOT EXISTS last_interview_at TIMESTAMP,
+                    ADD COLUMN IF NOT EXISTS last_result VARCHAR(50)
+                """)
+
+    # Recompute from the child rows (one indexed read) rather than +1/-1, so updates and
+    # deletes can never drift the counters.
+    cur.execute("""
+                CREATE OR REPLACE FUNCTION refresh_candidate_assessment_status(cid VARCHAR) RETURNS void AS $$
+                    UPDATE candidates c
+                    SET assessment_count = s.n,
+                        last_assessed_at = s.last_at
+                    FROM (SELECT COUNT(*)::int AS n, MAX(created_at) AS last_at
+                          FROM receptionist_assessments
+                          WHERE candidate_id = cid) s
+                    WHERE c.candidate_id = cid;
+                $$ LANGUAGE sql;
+                """)
+    cur.execute("""
+                CREATE OR REPLACE FUNCTION refresh_candidate_interview_status(cid VARCHAR) RETURNS void AS $$
+                    UPDATE candidates c
+                    SET interview_count = s.n,
+                        last_interview_at = s.last_at,
+                        last_result = s.last_result
+                    FROM (SELECT COUNT(*)::int AS n,
+                                 MAX(COALESCE(scheduled_at, created_at)) AS last_at,
+                                 (ARRAY_AGG(result ORDER BY COALESCE(scheduled_at, created_at) DESC, id DESC))[1]
+                                     AS last_result
+                          FROM interviews
+                          WHERE candidate_id = cid) s
+                    WHERE c.candidate_id = cid;
+                $$ LANGUAGE sql;
+                """)
+    for table, kind in (("receptionist_assessments", "assessment"), ("interviews", "interview")):
+        cur.execute(f"""
+                    CREATE OR REPLACE FUNCTION trg_{table}_status() RETURNS trigger AS $$
+                    BEGIN
+                        IF TG_OP <> 'DELETE' THEN
+                            PERFORM refresh_candidate_{kind}_status(NEW.candidate_id);
+                        END IF;
+                        IF TG_OP = 'DELETE' THEN
+                            PERFORM refresh_candidate_{kind}_status(OLD.candidate_id);
+                        ELSIF TG_OP = 'UPDATE' THEN
+                            IF OLD.candidate_id IS DISTINCT FROM NEW.candidate_id THEN
+                                PERFORM refresh_candidate_{kind}_status(OLD.candidate_id);
+                            END IF;
+                        END IF;
+                        RETURN NULL;
+                    END;
+                    $$ LANGUAGE plpgsql;
+                    """)
+        cur.execute(f"DROP TRIGGER IF EXISTS {table}_status ON {table}")
+        cur.execute(f"""
+                    CREATE TRIGGER {table}_status
+                        AFTER INSERT OR UPDATE OR DELETE ON {table}
+                        FOR EACH ROW EXECUTE FUNCTION trg_{table}_status()
+                    """)
+
+    # Backfill existing candidates in two set-based passes
+    cur.execute("""
+                UPDATE candidates c
+                SET assessment_count = s.n,
+                    last_assessed_at = s.last_at
+                FROM (SELECT candidate_id, COUNT(*)::int AS n, MAX(created_at) AS last_at
+                      FROM receptionist_assessments
+                      GROUP BY candidate_id) s
+                WHERE c.candidate_id = s.candidate_id
+                """)
+    cur.execute("""
+                UPDATE candidates c
+                SET interview_count = s.n,
+                    last_interview_at = s.last_at,
+                    last_result = s.last_result
+                FROM (SELECT candidate_id,
+                             COUNT(*)::int AS n,
+                             MAX(COALESCE(scheduled_at, created_at)) AS last_at,
+                             (ARRAY_AGG(result ORDER BY COALESCE(scheduled_at, created_at) DESC, id DESC))[1]
+                                 AS last_result
+                      FROM interviews
+                      GROUP BY candidate_id) s
+                WHERE c.candidate_id = s.candidate_id
+                """)
+    cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_candidates_unassessed
+                    ON candidates (created_at DESC) WHERE assessment_count = 0
+                """)
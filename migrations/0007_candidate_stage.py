@@ -0,0 +1,46 @@
+# migrations/0007_candidate_stage.py
+"""
+Explicit pipeline stage on candidates (see db_postgres.CANDIDATE_STAGES and
+STAGE_TRANSITIONS), replacing the status each view re-derived from
+assessment rows and interview result strings:
+
+    applied -> assessed -> scheduled -> interviewed -> offered
+                                                    \\-> rejected
+
+Existing candidates are backfilled from the counters kept by 0006.
+"""
+
+
+def upgrade(cur):
+    cur.execute("""
+                ALTER TABLE candidates
+                    ADD COLUMN IF NOT EXISTS stage VARCHAR(20) NOT NULL DEFAULT 'applied',
+                    ADD COLUMN IF NOT EXISTS stage_changed_at TIMESTAMP
+                """)
+    cur.execute("ALTER TABLE candidates DROP CONSTRAINT IF EXISTS candidates_stage_check")
+    cur.execute("""
+                ALTER TABLE candidates
+                    ADD CONSTRAINT candidates_stage_check
+                        CHECK (stage IN ('applied', 'assessed', 'scheduled', 'interviewed', 'offered', 'rejected'))
+                """)
+
+    # Same mapping as db_postgres.stage_for_interview_result, applied to the latest interview
+    cur.execute("""
+                UPDATE candidates
+                SET stage = CASE
+                                WHEN interview_count > 0 THEN
+                                    CASE REPLACE(LOWER(TRIM(COALESCE(last_result, ''))), '_', ' ')
+                                        WHEN 'pass' THEN 'offered'
+                                        WHEN 'passed' THEN 'offered'
+                                        WHEN 'fail' THEN 'rejected'
+                                        WHEN 'failed' THEN 'rejected'
+                                        WHEN 'completed' THEN 'interviewed'
+                                        WHEN 'on hold' THEN 'interviewed'
+                                        ELSE 'scheduled'
+                                        END
+                                WHEN assessment_count > 0 THEN 'assessed'
+                                ELSE 'applied'
+                            END,
+                    stage_changed_at = COALESCE(last_interview_at, last_assessed_at, created_at)
+                """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_candidates_stage_updated ON candidates (stage, updated_at)")
@@ -0,0 +1,20 @@
+# migrations/0008_candidate_claims.py
+"""
+Work-queue claims: at most one desk works a candidate at a time. A claim is
+live until expires_at; expired rows are simply taken over by the next claimer
+(see db_postgres.claim_next_candidates).
+"""
+
+
+def upgrade(cur):
+    cur.execute("""
+                CREATE TABLE IF NOT EXISTS candidate_claims
+                (
+                    candidate_id VARCHAR(50) PRIMARY KEY REFERENCES candidates (candidate_id) ON DELETE CASCADE,
+                    queue VARCHAR(30) NOT NULL,
+                    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+                    claimed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    expires_at TIMESTAMP NOT NULL
+                )
+                """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_candidate_claims_user ON candidate_claims (user_id, queue, expires_at)")
@@ -0,0 +1,71 @@
+# migrations/0009_candidate_row_version.py
+"""
+Change feed for candidates (db_postgres.get_candidate_changes):
+
+    row_version  from candidate_row_version_seq, bumped on every insert/update;
+                 orders versions of the same row (a later write always has a higher one)
+    row_xid      writing transaction id; readers page on it, because sequence values
+                 are handed out before commit and can become visible out of order
+
+Deletes leave a row in candidate_tombstones so caches can drop them too.
+"""
+
+
+def upgrade(cur):
+    cur.execute("CREATE SEQUENCE IF NOT EXISTS candidate_row_version_seq")
+    cur.execute("""
+                ALTER TABLE candidates
+                    ADD COLUMN IF NOT EXISTS row_version BIGINT,
+                    ADD COLUMN IF NOT EXISTS row_xid xid8
+                """)
+    cur.execute("""
+                UPDATE candidates
+                SET row_version = nextval('candidate_row_version_seq'),
+                    row_xid = pg_current_xact_id()
+                WHERE row_version IS NULL
+                """)
+    cur.execute("""
+                ALTER TABLE candidates
+                    ALTER COLUMN row_version SET DEFAULT nextval('candidate_row_version_seq'),
+                    ALTER COLUMN row_version SET NOT NULL,
+                    ALTER COLUMN row_xid SET DEFAULT pg_current_xact_id(),
+                    ALTER COLUMN row_xid SET NOT NULL
+                """)
+    cur.execute("""
+                CREATE TABLE IF NOT EXISTS candidate_tombstones
+                (
+                    candidate_id VARCHAR(50) PRIMARY KEY,
+                    row_version BIGINT NOT NULL,
+                    row_xid xid8 NOT NULL DEFAULT pg_current_xact_id(),
+                    deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                )
+                """)
+    cur.execute("""
+                CREATE OR REPLACE FUNCTION trg_candidates_row_version() RETURNS trigger AS $$
+                BEGIN
+                    IF TG_OP = 'DELETE' THEN
+                        INSERT INTO candidate_tombstones (candidate_id, row_version)
+                        VALUES (OLD.candidate_id, nextval('candidate_row_version_seq'))
+                        ON CONFLICT (candidate_id) DO UPDATE
+                            SET row_version = EXCLUDED.row_version,
+                                row_xid = EXCLUDED.row_xid,
+                                deleted_at = EXCLUDED.deleted_at;
+                        RETURN OLD;
+                    END IF;
+                    IF TG_OP = 'INSERT' THEN
+                        DELETE FROM candidate_tombstones WHERE candidate_id = NEW.candidate_id;
+                    END IF;
+                    NEW.row_version := nextval('candidate_row_version_seq');
+                    NEW.row_xid := pg_current_xact_id();
+                    RETURN NEW;
+                END;
+                $$ LANGUAGE plpgsql;
+                """)
+    cur.execute("DROP TRIGGER IF EXISTS candidates_row_version ON candidates")
+    cur.execute("""
+                CREATE TRIGGER candidates_row_version
+                    BEFORE INSERT OR UPDATE OR DELETE ON candidates
+                    FOR EACH ROW EXECUTE FUNCTION trg_candidates_row_version()
+                """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_candidates_row_xid ON candidates (row_xid)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_candidate_tombstones_row_xid ON candidate_tombstones (row_xid)")
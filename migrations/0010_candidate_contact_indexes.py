@@ -0,0 +1,7 @@
+# migrations/0010_candidate_contact_indexes.py
+"""Exact-match lookups on normalized email and phone (import dedup, CV matching)."""
+
+
+def upgrade(cur):
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_candidates_email_lower ON candidates (LOWER(email))")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_candidates_phone ON candidates (phone)")
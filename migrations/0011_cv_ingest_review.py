@@ -0,0 +1,32 @@
+# migrations/0011_cv_ingest_review.py
+"""
+Review queue for bulk CV ingest (cv_ingest.py): files that did not match a
+candidate confidently enough to attach automatically. Suggestions are kept as
+JSON [{candidate_id, name, score}, ...], best first.
+"""
+
+
+def upgrade(cur):
+    cur.execute("""
+                CREATE TABLE IF NOT EXISTS cv_ingest_review
+                (
+                    id SERIAL PRIMARY KEY,
+                    batch_id VARCHAR(40) NOT NULL,
+                    filename VARCHAR(255) NOT NULL,
+                    file_bytes BYTEA NOT NULL,
+                    file_time TIMESTAMP,
+                    reason VARCHAR(30) NOT NULL,
+                    best_score REAL,
+                    suggestions JSONB NOT NULL DEFAULT '[]'::jsonb,
+                    status VARCHAR(20) NOT NULL DEFAULT 'pending'
+                        CHECK (status IN ('pending', 'attached', 'discarded')),
+                    attached_to VARCHAR(50) REFERENCES candidates (candidate_id) ON DELETE SET NULL,
+                    resolved_by VARCHAR(255),
+                    resolved_at TIMESTAMP,
+                    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                )
+                """)
+    cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_cv_ingest_review_pending
+                    ON cv_ingest_review (created_at) WHERE status = 'pending'
+                """)
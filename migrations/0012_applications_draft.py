@@ -0,0 +1,22 @@
+# migrations/0012_applications_draft.py
+"""
+In-progress candidate applications (db_postgres "Application drafts"). The
+form autosaves small JSONB patches under a random draft token kept in the page
+URL; submit promotes the draft into candidates and records candidate_id here,
+so a repeated submit returns the same candidate instead of a second one.
+"""
+
+
+def upgrade(cur):
+    cur.execute("""
+                CREATE TABLE IF NOT EXISTS applications_draft
+                (
+                    token VARCHAR(64) PRIMARY KEY,
+                    form_data JSONB NOT NULL DEFAULT '{}'::jsonb,
+                    version INTEGER NOT NULL DEFAULT 1,
+                    candidate_id VARCHAR(50) REFERENCES candidates (candidate_id) ON DELETE SET NULL,
+                    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                )
+                """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_applications_draft_updated ON applications_draft (updated_at)")
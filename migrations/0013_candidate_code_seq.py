@@ -0,0 +1,10 @@
+# migrations/0013_candidate_code_seq.py
+"""Sequence behind candidate codes (candidate_codes.allocate_codes); one value per code, never reused."""
+
+
+def upgrade(cur):
+    # MAXVALUE is the last value of the six-character base36 code space (36^6 - 1)
+    cur.execute("""
+                CREATE SEQUENCE IF NOT EXISTS candidate_code_seq
+                    START 1 MINVALUE 1 MAXVALUE 2176782335 NO CYCLE
+                """)
@@ -0,0 +1,33 @@
+# migrations/0014_normalize_candidate_phones.py
+"""
+Store every candidate phone in db_postgres.normalize_phone form: digits only,
+without a leading 91 (12 digits) or 0 (11 digits). The application form used
+to keep every digit while the bulk import dropped the prefix, so the two paths'
+duplicate checks and CV matching on phone missed each other.
+"""
+
+
+def upgrade(cur):
+    cur.execute("""
+                WITH normalized AS (
+                    SELECT id,
+                           CASE
+                               WHEN digits ~ '^91[0-9]{10}$' THEN substr(digits, 3)
+                               WHEN digits ~ '^0[0-9]{10}$' THEN substr(digits, 2)
+                               ELSE digits
+                               END AS phone
+                    FROM (SELECT id, regexp_replace(phone, '[^0-9]', '', 'g') AS digits
+                          FROM candidates
+                          WHERE phone IS NOT NULL) p
+                )
+                UPDATE candidates c
+                SET phone     = n.phone,
+                    form_data = CASE
+                                    WHEN jsonb_typeof(c.form_data) = 'object' AND c.form_data ? 'phone'
+                                        THEN jsonb_set(c.form_data, '{phone}', to_jsonb(n.phone))
+                                    ELSE c.form_data
+                                    END
+                FROM normalized n
+                WHERE c.id = n.id
+                  AND c.phone IS DISTINCT FROM n.phone
+                """)
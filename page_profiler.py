@@ -0,0 +1,185 @@
+# page_profiler.py
+"""
+Per-rerun page profiler.
+
+main.router wraps each rerun in profile_page(); pages mark their expensive
+parts with section():
+
+    with page_profiler.section("card.cv"):
+        _render_cv_section_fixed(...)
+
+Sections nest and are summed by name. DB round trips, time and bytes are
+picked up from db_instrumentation for whichever rerun is active in the
+current context (ContextVar, so db_async.gather work is attributed too).
+
+Finished reruns are kept in memory per page and flushed every
+PAGE_METRICS_FLUSH_SECONDS as one p50/p95 row per page into page_metrics.
+"""
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+import streamlit as st
+
+import db_instrumentation
+
+logger = logging.getLogger(__name__)
+
+PAGE_METRICS_FLUSH_SECONDS = float(os.getenv("PAGE_METRICS_FLUSH_SECONDS", "60"))
+OVERLAY_ROLES = ("ceo", "admin")
+
+
+class PageProfile:
+    def __init__(self, page: str, role: Optional[str] = None):
+        self.page = page
+        self.role = role
+        self.started = time.perf_counter()
+        self.total_seconds = 0.0
+        self.sections: Dict[str, List[float]] = {}  # name -> [count, seconds]
+        self.db_calls = 0
+        self.db_seconds = 0.0
+        self.db_bytes = 0
+        self._lock = threading.Lock()  # db_async records from the loop thread
+
+    def add_section(self, name: str, seconds: float):
+        entry = self.sections.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def add_query(self, seconds: float, nbytes: int):
+        with self._lock:
+            self.db_calls += 1
+            self.db_seconds += seconds
+            self.db_bytes += nbytes
+
+
+_current: ContextVar[Optional[PageProfile]] = ContextVar("page_profile", default=None)
+
+
+def current() -> Optional[PageProfile]:
+    return _current.get()
+
+
+def _on_query(entry: Dict[str, Any]):
+    profile = _current.get()
+    if profile is not None:
+        profile.add_query(entry["seconds"], entry.get("bytes") or 0)
+
+
+db_instrumentation.add_listener(_on_query)
+
+
+@contextmanager
+def profile_page(page: str, role: Optional[str] = None):
+    """Profile one rerun of a page. Reruns that end in st.rerun()/st.stop() or an error are not recorded."""
+    profile = PageProfile(page, role)
+    token = _current.set(profile)
+    completed = False
+    try:
+        yield profile
+        completed = True
+    finally:
+        profile.total_seconds = time.perf_counter() - profile.started
+        _current.reset(token)
+        if completed:
+            _remember(profile)
+
+
+@contextmanager
+def section(name: str):
+    """Time a block of the current rerun; a no-op outside profile_page()."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_section(name, time.perf_counter() - started)
+
+
+# -----------------------------
+# Aggregation + persistence
+# -----------------------------
+_samples_lock = threading.Lock()
+_samples: Dict[str, List[tuple]] = {}  # page -> [(total_ms, db_calls, db_bytes)]
+_window_start = time.time()
+_listeners: List = []
+
+
+def add_listener(fn):
+    """Register fn(profile) to be called for every recorded rerun (metrics exporter)."""
+    if fn not in _listeners:
+        _listeners.append(fn)
+
+
+def _remember(profile: PageProfile):
+    global _window_start
+    for fn in list(_listeners):
+        try:
+            fn(profile)
+        except Exception:
+            logger.exception("Page profile listener failed")
+
+    with _samples_lock:
+        _samples.setdefault(profile.page, []).append(
+            (profile.total_seconds * 1000, profile.db_calls, profile.db_bytes))
+        if time.time() - _window_start < PAGE_METRICS_FLUSH_SECONDS:
+            return
+        batch, window = dict(_samples), (_window_start, time.time())
+        _samples.clear()
+        _window_start = window[1]
+    threading.Thread(target=_flush, args=(batch, window), name="page-metrics-flush", daemon=True).start()
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))] if ordered else 0.0
+
+
+def summarize(samples: List[tuple]) -> Dict[str, float]:
+    totals = [s[0] for s in samples]
+    return {
+        "renders": len(samples),
+        "p50_ms": _percentile(totals, 50),
+        "p95_ms": _percentile(totals, 95),
+        "max_ms": max(totals) if totals else 0.0,
+        "avg_db_calls": sum(s[1] for s in samples) / len(samples) if samples else 0.0,
+        "avg_db_bytes": sum(s[2] for s in samples) / len(samples) if samples else 0.0,
+    }
+
+
+def _flush(batch: Dict[str, List[tuple]], window: tuple):
+    from db_postgres import save_page_metrics
+    rows = [{"page": page, **summarize(samples)} for page, samples in batch.items() if samples]
+    try:
+        save_page_metrics(rows, window[0], window[1])
+    except Exception as e:
+        logger.warning("Could not persist page metrics: %s", e)
+
+
+# -----------------------------
+# Overlay
+# -----------------------------
+def overlay_enabled(role: Optional[str]) -> bool:
+    return (role or "").lower() in OVERLAY_ROLES and st.session_state.get("show_timing_overlay", False)
+
+
+def render_overlay(profile: PageProfile):
+    """Sidebar breakdown of the rerun that just finished (admin/CEO only, opt-in)."""
+    total_ms = (time.perf_counter() - profile.started) * 1000
+    with st.sidebar.expander("⏱️ Rerun timing", expanded=True):
+        st.caption(f"**{profile.page}** · {total_ms:.0f} ms total")
+        st.caption(f"DB: {profile.db_calls} round trips · {profile.db_seconds * 1000:.0f} ms · "
+                   f"{profile.db_bytes / 1024:.1f} KB")
+        rows = sorted(profile.sections.items(), key=lambda kv: kv[1][1], reverse=True)
+        if rows:
+            st.dataframe([
+                {"section": name, "count": int(count), "ms": round(seconds * 1000, 1)}
+                for name, (count, seconds) in rows
+            ], use_container_width=True, hide_index=True)
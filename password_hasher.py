@@ -0,0 +1,96 @@
+# password_hasher.py
+"""
+bcrypt hashing service.
+
+bcrypt releases the GIL while it works, so a plain thread pool gives real
+parallelism for bulk operations (password resets, seeding) without the
+pickling/fork issues a process pool would bring into a Streamlit server.
+Single hashes/verifies still run inline on the caller's thread.
+"""
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import bcrypt
+
+logger = logging.getLogger(__name__)
+
+# Cost factor for new hashes. Existing hashes keep whatever cost they were created with.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "0")) or (os.cpu_count() or 2)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Shared pool, created once per process."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+    return _executor
+
+
+def _stats(count: int, started: float, rounds: Optional[int]) -> Dict[str, Any]:
+    seconds = time.perf_counter() - started
+    return {
+        "count": count,
+        "seconds": seconds,
+        "per_second": (count / seconds) if seconds > 0 else 0.0,
+        "workers": HASH_WORKERS,
+        "rounds": rounds,
+    }
+
+
+# -----------------------------
+# Single operations
+# -----------------------------
+def hash_one(password: str, rounds: Optional[int] = None) -> str:
+    salt = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+
+def verify_one(password: str, password_hash: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("utf-8"))
+    except Exception:
+        return False
+
+
+# -----------------------------
+# Batch operations
+# -----------------------------
+def hash_many(passwords: Sequence[str], rounds: Optional[int] = None) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Hash a batch of passwords in the shared pool.
+    Returns (hashes in input order, stats) where stats carries count/seconds/per_second/workers/rounds.
+    """
+    rounds = rounds or BCRYPT_ROUNDS
+    started = time.perf_counter()
+    if not passwords:
+        return [], _stats(0, started, rounds)
+    hashes = list(_get_executor().map(lambda pw: hash_one(pw, rounds), passwords))
+    stats = _stats(len(hashes), started, rounds)
+    logger.info("Hashed %d passwords in %.2fs (%.1f/s, cost %d, %d workers)",
+                stats["count"], stats["seconds"], stats["per_second"], rounds, HASH_WORKERS)
+    return hashes, stats
+
+
+def verify_many(pairs: Sequence[Tuple[str, str]]) -> Tuple[List[bool], Dict[str, Any]]:
+    """
+    Verify a batch of (password, password_hash) pairs in the shared pool.
+    Returns (results in input order, stats).
+    """
+    started = time.perf_counter()
+    if not pairs:
+        return [], _stats(0, started, None)
+    results = list(_get_executor().map(lambda p: verify_one(p[0], p[1]), pairs))
+    stats = _stats(len(results), started, None)
+    logger.info("Verified %d passwords in %.2fs (%.1f/s, %d workers)",
+                stats["count"], stats["seconds"], stats["per_second"], HASH_WORKERS)
+    return results, stats
@@ -0,0 +1,193 @@
+# query_registry.py
+"""
+Prepared statements for the hot read paths.
+
+Each statement in HOT_QUERIES is declared once, PREPAREd lazily on every pooled
+connection the first time that connection needs it, and afterwards run with
+EXECUTE <name>(...). That skips re-parsing and, once Postgres switches to a
+generic plan, re-planning for lookups that run thousands of times a day.
+
+    row = query_registry.fetch_one("user_by_id", (user_id,))
+    rows = query_registry.fetch_all("assessments_by_candidate", (candidate_id,))
+
+Per-statement counters (prepare cost vs execute cost) are available through
+get_statement_stats().
+"""
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import psycopg2
+import psycopg2.errors
+from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
+from dotenv import load_dotenv
+
+from db_instrumentation import InstrumentedConnection
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+
+# name -> (parameter types, SQL with $n placeholders)
+HOT_QUERIES: Dict[str, tuple] = {
+    "user_by_id": (("integer",), "SELECT * FROM users WHERE id = $1"),
+    "user_by_email": (("text",), "SELECT * FROM users WHERE email = $1"),
+    "user_permissions": (("integer",), """
+        SELECT role, can_view_cvs, can_delete_records, can_grant_delete
+        FROM users
+        WHERE id = $1
+    """),
+    "user_permissions_version": (("integer",), "SELECT permissions_version FROM users WHERE id = $1"),
+    "candidate_by_id": (("text",), "SELECT * FROM candidates WHERE candidate_id = $1"),
+    "assessments_by_candidate": (("text",), """
+        SELECT *
+        FROM receptionist_assessments
+        WHERE candidate_id = $1
+        ORDER BY created_at DESC
+    """),
+    "interviews_by_candidate": (("text",), """
+        SELECT *
+        FROM interviews
+        WHERE candidate_id = $1
+        ORDER BY created_at DESC
+    """),
+}
+
+
+# -----------------------------
+# Pool
+# -----------------------------
+class PreparedConnection(InstrumentedConnection):
+    """Connection that remembers which registry statements its session has prepared."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+_pool: Optional[ThreadedConnectionPool] = None
+_pool_slots = threading.BoundedSemaphore(POOL_MAX)  # ThreadedConnectionPool raises instead of waiting
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadedConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                database_url = os.getenv("DATABASE_URL")
+                if not database_url:
+                    raise RuntimeError("DATABASE_URL environment variable not set")
+                _pool = ThreadedConnectionPool(
+                    POOL_MIN, POOL_MAX, database_url,
+                    sslmode=os.getenv("PGSSLMODE", "require"),
+                    connection_factory=PreparedConnection,
+                )
+    return _pool
+
+
+def pool_stats() -> Dict[str, int]:
+    """Connection counts for the metrics exporter; empty until the pool is first used."""
+    if _pool is None:
+        return {}
+    idle, used = len(_pool._pool), len(_pool._used)
+    return {"size": idle + used, "in_use": used, "max": POOL_MAX}
+
+
+# -----------------------------
+# Timing counters
+# -----------------------------
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, float]] = {}
+
+
+def _bump(name: str, **deltas: float):
+    with _stats_lock:
+        s = _stats.setdefault(name, {"prepares": 0, "prepare_seconds": 0.0, "executions": 0,
+                                     "execute_seconds": 0.0, "max_execute_seconds": 0.0,
+                                     "replans": 0, "errors": 0})
+        for key, value in deltas.items():
+            s[key] += value
+        if "execute_seconds" in deltas:
+            s["max_execute_seconds"] = max(s["max_execute_seconds"], deltas["execute_seconds"])
+
+
+def get_statement_stats() -> Dict[str, Dict[str, float]]:
+    """Per-statement counters with mean prepare/execute times in milliseconds."""
+    with _stats_lock:
+        snapshot = {name: dict(s) for name, s in _stats.items()}
+    for s in snapshot.values():
+        s["mean_prepare_ms"] = s["prepare_seconds"] / s["prepares"] * 1000 if s["prepares"] else 0.0
+        s["mean_execute_ms"] = s["execute_seconds"] / s["executions"] * 1000 if s["executions"] else 0.0
+    return snapshot
+
+
+# -----------------------------
+# Execution
+# -----------------------------
+def _prepare(cur, conn: PreparedConnection, name: str):
+    types, sql = HOT_QUERIES[name]
+    started = time.perf_counter()
+    cur.execute(f"PREPARE {name} ({', '.join(types)}) AS {sql}")
+    conn.prepared.add(name)
+    _bump(name, prepares=1, prepare_seconds=time.perf_counter() - started)
+
+
+def _execute(name: str, params: Sequence[Any], fetch_one: bool):
+    if name not in HOT_QUERIES:
+        raise KeyError(f"Unknown registry statement: {name}")
+    placeholders = ", ".join(["%s"] * len(params))
+    execute_sql = f"EXECUTE {name} ({placeholders})" if params else f"EXECUTE {name}"
+
+    pool = _get_pool()
+    _pool_slots.acquire()
+    conn = pool.getconn()
+    broken = False
+    try:
+        for attempt in range(2):
+            try:
+                with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    if name not in conn.prepared:
+                        _prepare(cur, conn, name)
+                    started = time.perf_counter()
+                    cur.execute(execute_sql, tuple(params))
+                    result = cur.fetchone() if fetch_one else cur.fetchall()
+                    _bump(name, executions=1, execute_seconds=time.perf_counter() - started)
+                    return result
+            except psycopg2.errors.FeatureNotSupported:
+                # "cached plan must not change result type": a SELECT * table gained a column.
+                # Drop the stale statement and prepare it again once.
+                if attempt:
+                    raise
+                _bump(name, replans=1)
+                with conn, conn.cursor() as cur:
+                    cur.execute(f"DEALLOCATE {name}")
+                conn.prepared.discard(name)
+            except psycopg2.errors.InvalidSqlStatementName:
+                # Session lost the statement (e.g. server-side DISCARD ALL); prepare it again once.
+                if attempt:
+                    raise
+                conn.prepared.discard(name)
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        _bump(name, errors=1)
+        raise
+    except Exception:
+        _bump(name, errors=1)
+        raise
+    finally:
+        pool.putconn(conn, close=broken or conn.closed != 0)
+        _pool_slots.release()
+
+
+def fetch_one(name: str, params: Sequence[Any] = ()) -> Optional[Dict[str, Any]]:
+    return _execute(name, params, fetch_one=True)
+
+
+def fetch_all(name: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+    return _execute(name, params, fetch_one=False)
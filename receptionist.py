@@ -2,16 +2,25 @@ import os
 import re
 import smtplib
 import base64
+from datetime import date, datetime, time
 from email.message import EmailMessage
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 
 import streamlit as st
 
+import metrics
+import page_profiler
 from auth import get_current_user
 from db_postgres import (
     get_conn,
     find_candidates_by_name,
-    get_all_candidates,
+    get_stage_queue,
+    get_stage_counts,
+    claim_next_candidates,
+    release_claim,
+    get_active_claims,
+    get_candidate_changes,
+    WORK_QUEUES,
     delete_candidate,
     set_candidate_permission,
     get_user_permissions,
@@ -21,17 +30,39 @@ from db_postgres import (
 
 EMAIL_RE = re.compile(r"^[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}$", re.I)
 
+# Work queues (label -> candidate stages); searching looks across every stage instead.
+# "My desk" claims the next few candidates for this user so two desks never assess the same walk-in.
+MY_DESK = "🙋 My desk"
+DESK_SIZE = 5
+RECEPTIONIST_QUEUES = {
+    MY_DESK: WORK_QUEUES["receptionist"],
+    "📥 Awaiting assessment": ("applied",),
+    "✅ Assessed": ("assessed",),
+    "🚫 Rejected": ("rejected",),
+}
+QUEUE_PAGE_SIZE = 50
+
+# Walk-in day lobby board: polls the candidate change feed, so a tick only reads what changed
+LOBBY_REFRESH_SECONDS = 5
+LOBBY_SNAPSHOT_SIZE = 200  # first load: newest candidates, of which today's are shown
+
 
 # -------------------- Performance Optimizations --------------------
 
-@st.cache_data(ttl=30, show_spinner=False)
-def _get_candidates_cached(search_query=""):
-    """Cached candidate loading to avoid database reload after each action."""
+@metrics.cache_data(ttl=30, show_spinner=False)
+def _get_candidates_cached(search_query="", stages=("applied",), desk_user_id=None):
+    """
+    Cached candidate loading (a search, this user's claimed desk, else one stage queue)
+    to avoid database reload after each action. Rows carry who holds a live claim on them.
+    """
     try:
         if search_query and search_query.strip():
             candidates = _search_candidates_all_fields(search_query.strip())
+        elif desk_user_id is not None:
+            candidates = claim_next_candidates("receptionist", desk_user_id, DESK_SIZE)
         else:
-            candidates = get_all_candidates()
+            candidates = get_stage_queue(list(stages), limit=QUEUE_PAGE_SIZE)
+        claims = get_active_claims([c["candidate_id"] for c in candidates])
 
         # Convert to serializable format
         serializable_candidates = []
@@ -47,6 +78,9 @@ def _get_candidates_cached(search_query=""):
                 else:
                     serializable_candidate[key] = str(value) if not isinstance(value, (str, int, float, bool, list,
                                                                                        dict)) else value
+            claim = claims.get(candidate["candidate_id"])
+            serializable_candidate["claimed_by_id"] = claim["user_id"] if claim else None
+            serializable_candidate["claimed_by"] = claim["email"] if claim else None
             serializable_candidates.append(serializable_candidate)
 
         return serializable_candidates
@@ -55,9 +89,15 @@ def _get_candidates_cached(search_query=""):
         return []
 
 
+@metrics.cache_data(ttl=30, show_spinner=False)
+def _get_stage_counts_cached() -> Dict[str, int]:
+    return get_stage_counts()
+
+
 def _clear_candidates_cache():
     """Clear candidates cache for refresh."""
     _get_candidates_cached.clear()
+    _get_stage_counts_cached.clear()
 
 
 # -------------------- Access Control Functions --------------------
@@ -65,7 +105,12 @@ def _clear_candidates_cache():
 def _check_user_permissions(user_id: int) -> Dict[str, Any]:
     """Check user permissions with strict enforcement."""
     try:
-        perms = get_user_permissions(user_id)
+        current = get_current_user()
+        if current and current.get("id") == user_id:
+            # Current user: flags from the verified session token, no DB round trip
+            perms = current
+        else:
+            perms = get_user_permissions(user_id)
         if not perms:
             return {"role": "user", "can_view_cvs": False, "can_delete_records": False, "can_manage_users": False}
 
@@ -196,16 +241,6 @@ def _get_receptionist_assessments_for_candidate(candidate_id: str) -> List[Dict[
     try:
         conn = get_conn()
         with conn.cursor() as cur:
-            # Check if table exists
-            cur.execute("""
-                        SELECT table_name
-                        FROM information_schema.tables
-                        WHERE table_schema = 'public'
-                          AND table_name = 'receptionist_assessments'
-                        """)
-            if not cur.fetchone():
-                return []
-
             cur.execute("""
                         SELECT id,
                                created_at,
@@ -238,9 +273,9 @@ def _get_receptionist_assessments_for_candidate(candidate_id: str) -> List[Dict[
         return []
 
 
-def _render_assessment_history(candidate_id: str):
-    """Show assessment history for the candidate."""
-    assessments = _get_receptionist_assessments_for_candidate(candidate_id)
+def _render_assessment_history(candidate_id: str, assessment_count: Optional[int] = None):
+    """Show assessment history for the candidate (skips the query when the list row says there is none)."""
+    assessments = _get_receptionist_assessments_for_candidate(candidate_id) if assessment_count != 0 else []
 
     if not assessments:
         st.info("📋 No previous assessments found")
@@ -281,7 +316,8 @@ def _search_candidates_all_fields(q: str) -> List[Dict[str, Any]]:
             like = f"%{q}%"
             cur.execute(
                 """
-                SELECT id, candidate_id, name, email, phone, created_at, form_data
+                SELECT id, candidate_id, name, email, phone, created_at, form_data,
+                       assessment_count, last_assessed_at, stage
                 FROM candidates
                 WHERE candidate_id ILIKE %s
                    OR
@@ -309,6 +345,9 @@ def _search_candidates_all_fields(q: str) -> List[Dict[str, Any]]:
                 "phone": r[4],
                 "created_at": r[5],
                 "form_data": r[6],
+                "assessment_count": r[7],
+                "last_assessed_at": r[8],
+                "stage": r[9],
             }
             for r in rows
         ]
@@ -354,8 +393,10 @@ BRV Recruitment
                 server.starttls()
                 server.login(smtp_user, smtp_pass)
                 server.send_message(msg)
+            metrics.record_email("candidate_code", ok=True)
             return True, "Email sent."
         except Exception as e:
+            metrics.record_email("candidate_code", ok=False)
             return False, f"SMTP error: {e}"
     else:
         # fallback: console
@@ -369,6 +410,54 @@ BRV Recruitment
 # ----------------------------
 # Main Receptionist view
 # ----------------------------
+@st.fragment(run_every=LOBBY_REFRESH_SECONDS)
+def _lobby_board():
+    """
+    Today's walk-ins, kept in session_state and patched each tick from get_candidate_changes
+    (rows changed since the last token, plus deletions), so a tick costs one small indexed query.
+    """
+    day_start = datetime.combine(date.today(), time.min)
+    if st.session_state.get("lobby_day") != day_start:
+        st.session_state["lobby_day"] = day_start
+        st.session_state["lobby_board"] = {}
+        st.session_state["lobby_token"] = None
+    board: Dict[str, Dict[str, Any]] = st.session_state["lobby_board"]
+
+    try:
+        delta = get_candidate_changes(st.session_state["lobby_token"], limit=LOBBY_SNAPSHOT_SIZE)
+    except Exception as e:
+        st.warning(f"Lobby board paused: {e}")
+        return
+    st.session_state["lobby_token"] = delta["token"]
+
+    for candidate_id in delta["deleted"]:
+        board.pop(candidate_id, None)
+    for r in delta["changed"]:
+        seen = board.get(r["candidate_id"])
+        if r["created_at"] < day_start or (seen and seen["row_version"] >= r["row_version"]):
+            continue
+        if not delta["full"] and not seen:
+            st.toast(f"🚶 New walk-in: {r['name']} ({r['candidate_id']})")
+        board[r["candidate_id"]] = {
+            "Arrived": r["created_at"].strftime("%H:%M"),
+            "Name": r["name"],
+            "Code": r["candidate_id"],
+            "Stage": (r["stage"] or "applied").title(),
+            "Assessments": r["assessment_count"],
+            "created_at": r["created_at"],
+            "row_version": r["row_version"],
+        }
+
+    waiting = sum(1 for row in board.values() if row["Stage"] == "Applied")
+    st.caption(f"🕐 Updated {datetime.now():%H:%M:%S} • {len(board)} walk-in(s) today • {waiting} waiting for assessment")
+    if board:
+        rows = sorted(board.values(), key=lambda row: row["created_at"], reverse=True)
+        st.dataframe([{k: v for k, v in row.items() if k not in ("created_at", "row_version")} for row in rows],
+                     hide_index=True, use_container_width=True)
+    else:
+        st.info("No walk-ins yet today.")
+
+
 def receptionist_view():
     st.header("🏢 Receptionist — Candidate Assessment & Management")
 
@@ -388,6 +477,12 @@ def receptionist_view():
     st.sidebar.markdown(f"- **View CVs:** {'✅ Enabled' if perms.get('can_view_cvs') else '❌ Disabled'}")
     st.sidebar.markdown(f"- **Delete Records:** {'✅ Enabled' if perms.get('can_delete_records') else '❌ Disabled'}")
 
+    if st.toggle("🚶 Walk-in day: live lobby board", key="lobby_mode",
+                 help=f"Shows today's arrivals, updating every {LOBBY_REFRESH_SECONDS}s without reloading the page"):
+        st.subheader("🏟️ Lobby Board")
+        _lobby_board()
+        st.markdown("---")
+
     # Search section
     st.subheader("🔍 Search & Manage Candidates")
 
@@ -404,9 +499,27 @@ def receptionist_view():
             _clear_candidates_cache()
             st.rerun()
 
+    stage_counts = _get_stage_counts_cached()
+    queue = st.radio(
+        "Queue",
+        list(RECEPTIONIST_QUEUES),
+        format_func=lambda label: f"{label} ({sum(stage_counts.get(s, 0) for s in RECEPTIONIST_QUEUES[label])})",
+        horizontal=True,
+        key="recept_queue",
+        disabled=bool(q and q.strip()),
+        help="Searching looks across all candidates regardless of queue",
+    )
+
     # Load candidates (cached for performance)
-    candidates = _get_candidates_cached(q)
-    st.caption(f"📊 Found {len(candidates)} candidate(s).")
+    with page_profiler.section("candidates"):
+        candidates = _get_candidates_cached(q, RECEPTIONIST_QUEUES[queue],
+                                            user_id if queue == MY_DESK else None)
+    if q and q.strip():
+        st.caption(f"📊 Found {len(candidates)} candidate(s).")
+    elif queue == MY_DESK:
+        st.caption(f"📊 {len(candidates)} candidate(s) claimed for you; finish or release them to get the next.")
+    else:
+        st.caption(f"📊 Showing {len(candidates)} candidate(s) in this queue, longest waiting first.")
 
     if not candidates:
         st.info("No candidates found. Try adjusting your search or refresh the data.")
@@ -433,18 +546,24 @@ def receptionist_view():
 
             # CV section with proper access control
             st.markdown("---")
-            _render_cv_section_with_access(candidate_id, user_id, c)
+            with page_profiler.section("card.cv"):
+                _render_cv_section_with_access(candidate_id, user_id, c)
 
             # Assessment history
             st.markdown("---")
-            _render_assessment_history(candidate_id)
+            with page_profiler.section("card.history"):
+                _render_assessment_history(candidate_id, c.get("assessment_count"))
 
             # New assessment form
             st.markdown("---")
             st.markdown("### ➕ New Receptionist Assessment")
-            st.info("💡 Complete this assessment to make candidate eligible for interviews")
+            claimed_elsewhere = c.get("claimed_by_id") not in (None, user_id)
+            if claimed_elsewhere:
+                st.warning(f"🔒 {c.get('claimed_by')} is assessing this candidate right now.")
+            else:
+                st.info("💡 Complete this assessment to make candidate eligible for interviews")
 
-            with st.form(key=f"recept_assess_{candidate_id}"):
+            with st.form(key=f"recept_assess_{candidate_id}"), page_profiler.section("card.form"):
                 st.markdown("#### 📊 Test Scores")
                 col1, col2 = st.columns(2)
                 with col1:
@@ -479,7 +598,7 @@ def receptionist_view():
                     height=120
                 )
 
-                submitted = st.form_submit_button("💾 Save Assessment", type="primary")
+                submitted = st.form_submit_button("💾 Save Assessment", type="primary", disabled=claimed_elsewhere)
 
             if submitted:
                 try:
@@ -490,6 +609,7 @@ def receptionist_view():
                         work_commitment,
                         english_understanding,
                         comments.strip(),
+                        actor=current_user.get("email"),
                     )
                     if ok:
                         st.success("✅ Assessment saved successfully! Candidate is now eligible for interviews.")
@@ -504,11 +624,17 @@ def receptionist_view():
             st.markdown("---")
             st.markdown("### ⚙️ Quick Actions")
 
+            if c.get("claimed_by_id") == user_id:
+                if st.button("↩️ Release to queue", key=f"release_{candidate_id}"):
+                    release_claim(candidate_id, user_id)
+                    _clear_candidates_cache()
+                    st.rerun()
+
             action_col1, action_col2, action_col3, action_col4 = st.columns(4)
 
             with action_col1:
                 if st.button("🔓 Allow Edit (by code)", key=f"allow_{candidate_id}"):
-                    if set_candidate_permission(candidate_id, True):
+                    if set_candidate_permission(candidate_id, True, actor=current_user.get("email")):
                         st.success("✅ Edit permission granted.")
                         _clear_candidates_cache()
                         st.rerun()
@@ -517,7 +643,7 @@ def receptionist_view():
 
             with action_col2:
                 if st.button("🔒 Revoke Edit", key=f"revoke_{candidate_id}"):
-                    if set_candidate_permission(candidate_id, False):
+                    if set_candidate_permission(candidate_id, False, actor=current_user.get("email")):
                         st.success("✅ Edit permission revoked.")
                         _clear_candidates_cache()
                         st.rerun()
@@ -555,8 +681,8 @@ def receptionist_view():
             # Show current permissions for this candidate
             st.markdown("---")
             st.caption("**Current Status:**")
-            assessments = _get_receptionist_assessments_for_candidate(candidate_id)
-            if assessments:
+            st.caption(f"📍 Stage: {(c.get('stage') or 'applied').title()}")
+            if c.get("assessment_count"):
                 st.caption("✅ Has receptionist assessment - Eligible for interviews")
             else:
                 st.caption("❌ No assessment - Not eligible for interviews")
@@ -573,17 +699,12 @@ def receptionist_view():
             st.rerun()
 
     with summary_col2:
-        total_candidates = len(candidates)
+        total_candidates = sum(stage_counts.values())
         st.metric("Total Candidates", total_candidates)
 
     with summary_col3:
-        # Count assessed candidates
-        assessed_count = 0
-        for c in candidates:
-            assessments = _get_receptionist_assessments_for_candidate(c.get('candidate_id', ''))
-            if assessments:
-                assessed_count += 1
-        st.metric("Assessed", f"{assessed_count}/{total_candidates}")
+        # Stage counts come from one GROUP BY, not from the (paged) list above
+        st.metric("Awaiting Assessment", f"{stage_counts.get('applied', 0)}/{total_candidates}")
 
     st.info("""
     💡 **Receptionist Role:**
@@ -3,13 +3,25 @@ import os
 import smtplib
 from email.message import EmailMessage
 
+import metrics
+
 SMTP_HOST = os.getenv("SMTP_HOST")
 SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
 SMTP_USER = os.getenv("SMTP_USER")
 SMTP_PASS = os.getenv("SMTP_PASS")
 SMTP_FROM = os.getenv("SMTP_FROM", SMTP_USER)
 
-def send_email(to_email, subject, text, html=None):
+def send_email(to_email, subject, text, html=None, kind="general"):
+    try:
+        _send(to_email, subject, text, html)
+    except Exception:
+        metrics.record_email(kind, ok=False)
+        raise
+    metrics.record_email(kind, ok=True)
+    return True
+
+
+def _send(to_email, subject, text, html=None):
     msg = EmailMessage()
     msg["From"] = SMTP_FROM
     msg["To"] = to_email
@@ -21,4 +33,3 @@ def send_email(to_email, subject, text, html=None):
         s.starttls()
         s.login(SMTP_USER, SMTP_PASS)
         s.send_message(msg)
-    return True
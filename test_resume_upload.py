@@ -2,13 +2,24 @@
 import os
 from db_postgres import (
     save_candidate_cv,
-    get_candidate_cv,
-    delete_candidate_cv,
+    get_candidate_cv_secure,
+    clear_candidate_cv,
     create_candidate_in_db,
+    delete_candidate,
+    get_user_by_email,
 )
 import uuid
 
+# Any user allowed to view CVs (ceo/admin or can_view_cvs); the seeded CEO by default
+ACTOR_EMAIL = os.getenv("TEST_ACTOR_EMAIL", "ceo@brv.com")
+
+
 def main():
+    actor = get_user_by_email(ACTOR_EMAIL)
+    if not actor:
+        print(f"❌ Actor user {ACTOR_EMAIL} not found (set TEST_ACTOR_EMAIL)")
+        return
+
     # Step 1: create a dummy candidate
     candidate_id = str(uuid.uuid4())[:8].upper()
     print(f"🔹 Creating test candidate {candidate_id}")
@@ -16,6 +27,9 @@ def main():
     result = create_candidate_in_db(
         candidate_id=candidate_id,
         name="Test User",
+        address="",
+        dob=None,
+        caste=None,
         email="testuser@example.com",
         phone="1234567890",
         form_data={"test": "resume upload"},
@@ -41,20 +55,21 @@ def main():
         return
 
     # Step 3: fetch resume back from DB
-    file_bytes, filename = get_candidate_cv(candidate_id)
+    file_bytes, filename, _, reason = get_candidate_cv_secure(candidate_id, actor["id"])
     if file_bytes:
         print(f"✅ Resume retrieved successfully: {filename}")
         # save it back to disk
-        out_path = f"downloaded_{filename or 'resume.txt'}"
+        out_path = f"downloaded_{os.path.basename(filename or 'resume.txt')}"
         with open(out_path, "wb") as f:
             f.write(file_bytes)
         print(f"📂 Resume saved locally as {out_path}")
     else:
-        print("❌ Resume not found in DB.")
+        print(f"❌ Resume not found in DB ({reason}).")
 
-    # Step 4: delete resume
-    ok = delete_candidate_cv(candidate_id)
+    # Step 4: delete resume, then the test candidate
+    ok = clear_candidate_cv(candidate_id)
     print("🗑️ Resume deleted." if ok else "❌ Failed to delete resume.")
+    delete_candidate(candidate_id, actor["id"])
 
 if __name__ == "__main__":
     main()